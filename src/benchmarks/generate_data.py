@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator
+Fills a new SQLite database with realistic users, memberships, listings,
+photos, amenities and favorites for benchmarks and index tests. Rows are
+written with batched Core (executemany) inserts in a single transaction,
+with explicit ids so nothing is read back; a 1M-listing database takes a
+few minutes.
+
+The data is deterministic for a given --seed. Listing prices follow a
+log-normal distribution scaled by bedrooms and season, and favorites are
+skewed so a small share of listings collects most of them. Every user can
+log in as user<N>@example.com with PASSWORD.
+
+Usage:
+    python benchmarks/generate_data.py --listings 1000000 --output /tmp/bench.db
+    python benchmarks/load_harness.py --database /tmp/bench.db
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(SRC_DIR))
+sys.path.insert(0, SRC_DIR)
+
+PASSWORD = 'benchmark-password'
+
+LOCATIONS = [
+    ('Orlando', 'FL', 'USA', '32830'), ('Kissimmee', 'FL', 'USA', '34747'),
+    ('Las Vegas', 'NV', 'USA', '89109'), ('Lahaina', 'HI', 'USA', '96761'),
+    ('Kapolei', 'HI', 'USA', '96707'), ('Myrtle Beach', 'SC', 'USA', '29577'),
+    ('Hilton Head Island', 'SC', 'USA', '29928'), ('Branson', 'MO', 'USA', '65616'),
+    ('Park City', 'UT', 'USA', '84060'), ('Sedona', 'AZ', 'USA', '86336'),
+    ('Scottsdale', 'AZ', 'USA', '85251'), ('Williamsburg', 'VA', 'USA', '23185'),
+    ('Gatlinburg', 'TN', 'USA', '37738'), ('Palm Springs', 'CA', 'USA', '92262'),
+    ('Lake Tahoe', 'CA', 'USA', '96150'), ('Breckenridge', 'CO', 'USA', '80424'),
+    ('Cancun', 'QR', 'Mexico', '77500'), ('Cabo San Lucas', 'BCS', 'Mexico', '23450'),
+    ('Aruba', 'AR', 'Aruba', ''), ('Whistler', 'BC', 'Canada', 'V8E')
+]
+# Destination popularity, roughly Orlando first and a long tail after
+LOCATION_WEIGHTS = [1 / (rank + 1) ** 0.8 for rank in range(len(LOCATIONS))]
+
+BRANDS = [
+    'Marriott Vacation Club', 'Hilton Grand Vacations', 'Wyndham', 'Westgate',
+    'Bluegreen', 'Diamond Resorts', 'Holiday Inn Club Vacations', 'Disney Vacation Club',
+    'Worldmark', 'Hyatt Residence Club'
+]
+RESORT_SUFFIXES = ['Resort', 'Beach Club', 'Village', 'Lodge', 'Towers', 'Grande Vista', 'Harbour Point']
+SEASONS = [('Platinum', 1.4), ('Gold', 1.15), ('Silver', 0.9), ('Red', 1.2), ('White', 0.95), ('Blue', 0.8)]
+VIEWS = ['Ocean View', 'Mountain View', 'Garden View', 'Pool View', 'Lake View', 'Golf Course View', None]
+OWNERSHIP_TYPES = ['deeded', 'right_to_use', 'points']
+USAGE_TYPES = ['annual', 'annual', 'biennial_odd', 'biennial_even']
+CHECK_IN_DAYS = ['Friday', 'Saturday', 'Sunday']
+AMENITIES = [
+    'Pool', 'Hot Tub', 'Wi-Fi', 'Fitness Center', 'Kitchen', 'Washer/Dryer', 'Balcony',
+    'Beach Access', 'Golf', 'Spa', 'Kids Club', 'Tennis', 'Parking', 'Restaurant'
+]
+PLANS = [('basic_monthly', 14.99, 2), ('premium_monthly', 24.99, 5), ('unlimited_monthly', 39.99, None)]
+FIRST_NAMES = ['James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda',
+               'David', 'Elizabeth', 'Maria', 'Wei', 'Carlos', 'Aisha', 'Yuki', 'Priya']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+              'Rodriguez', 'Martinez', 'Nguyen', 'Patel', 'Kim', 'Lopez', 'Wilson', 'Anderson']
+
+STATUS_WEIGHTS = [('active', 0.88), ('inactive', 0.06), ('sold', 0.04), ('rented', 0.02)]
+
+
+def user_email(index):
+    """Login email of the generated user with this 0-based index"""
+    return f'user{index}@example.com'
+
+
+class Writer:
+    """Buffers rows for a table and inserts them in batches"""
+
+    def __init__(self, connection, table, columns, batch_size):
+        self.connection = connection
+        self.statement = table.insert()
+        self.columns = columns
+        self.batch_size = batch_size
+        self.rows = []
+        self.count = 0
+
+    def add(self, *values):
+        self.rows.append(dict(zip(self.columns, values)))
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.connection.execute(self.statement, self.rows)
+            self.count += len(self.rows)
+            self.rows = []
+
+
+def _money(value):
+    return round(value, -1) if value >= 1000 else round(value, 2)
+
+
+def _favorite_targets(rng, listing_count, active, favorites):
+    """
+    Pick skewed (rank based) favorite targets among active listings
+
+    Listing popularity follows a Zipf-like curve; ranks are scattered over
+    ids with a multiplicative hash so the popular listings are not all old.
+    """
+    active_ids = [listing_id for listing_id in range(1, listing_count + 1) if active[listing_id]]
+    n = len(active_ids)
+    if not n:
+        return []
+    return [active_ids[(int(n * rng.random() ** 3) * 2654435761) % n] for _ in range(favorites)]
+
+
+def generate(connection, listings, users, favorites_per_user=4.0, photos_per_listing=3.0,
+             seed=42, batch_size=5000, progress=print):
+    """
+    Insert a synthetic dataset into an empty database
+
+    Args:
+        connection: SQLAlchemy connection inside a transaction
+        listings (int): Listings to create
+        users (int): Users to create; about a third become owners with a plan
+        favorites_per_user (float): Average favorites per user
+        photos_per_listing (float): Average photos per listing
+        seed (int): Random seed; the same seed gives the same data
+        batch_size (int): Rows per insert statement
+        progress (callable): Called with a status line per table
+
+    Returns:
+        dict: Row counts per table
+    """
+    from models.user import User
+    from models.membership import Membership
+    from models.listing import Listing, ListingPhoto, Amenity, Favorite, listing_amenity
+    from utils.amenities import amenity_slug
+    from utils.passwords import hash_password
+    from sqlalchemy import bindparam
+
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    counts = {}
+
+    def timed(name, writer, started):
+        writer.flush()
+        counts[name] = writer.count
+        progress(f'  {name}: {writer.count:,} rows in {time.perf_counter() - started:.1f}s')
+
+    # Users: one shared hash, since hashing a million passwords is the slow part
+    started = time.perf_counter()
+    password_hash = hash_password(PASSWORD)
+    writer = Writer(connection, User.__table__, [
+        'id', 'username', 'email', 'password_hash', 'first_name', 'last_name',
+        'is_active', 'email_verified', 'account_type', 'created_at', 'updated_at'
+    ], batch_size)
+    owners = []
+    user_created = []
+    for index in range(users):
+        user_id = index + 1
+        is_owner = rng.random() < 0.35 or index == 0
+        if is_owner:
+            owners.append(user_id)
+        created_at = now - timedelta(days=rng.uniform(0, 1100))
+        user_created.append(created_at)
+        writer.add(
+            user_id, f'user{index}', user_email(index), password_hash,
+            rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), True, rng.random() < 0.8,
+            'subscriber' if is_owner else 'browser', created_at, created_at
+        )
+    timed('user', writer, started)
+
+    # Memberships: owners mostly on the cheaper plans; a few heavy sellers on Unlimited
+    started = time.perf_counter()
+    writer = Writer(connection, Membership.__table__, [
+        'id', 'user_id', 'membership_type', 'status', 'payment_amount', 'payment_method',
+        'start_date', 'end_date', 'created_at', 'updated_at'
+    ], batch_size)
+    plan_of = {}
+    for membership_id, user_id in enumerate(owners, start=1):
+        plan, amount, max_listings = rng.choices(PLANS, [0.55, 0.3, 0.15])[0]
+        if membership_id == 1:
+            # At least one owner can take listings other owners' plans have no room for
+            plan, amount, max_listings = PLANS[-1]
+        plan_of[user_id] = (plan, max_listings)
+        start = now - timedelta(days=rng.uniform(0, 25))
+        writer.add(membership_id, user_id, plan, 'active', amount, 'card',
+                   start, start + timedelta(days=30), start, start)
+    timed('membership', writer, started)
+
+    # Listings go mostly to Unlimited owners, like a real marketplace's resellers,
+    # and active listings stay within each owner's plan limit
+    statuses, status_weights = zip(*STATUS_WEIGHTS)
+    statuses_by_id = rng.choices(statuses, status_weights, k=listings)
+    unlimited_owners = [user_id for user_id in owners if plan_of[user_id][1] is None]
+    owner_weights = [50 if plan_of[user_id][1] is None else
+                     3 if plan_of[user_id][1] > 2 else 1 for user_id in owners]
+    listing_owner = rng.choices(owners, owner_weights, k=listings)
+    active_counts = {}
+    for index, status in enumerate(statuses_by_id):
+        if status != 'active':
+            continue
+        user_id = listing_owner[index]
+        max_listings = plan_of[user_id][1]
+        if max_listings is not None and active_counts.get(user_id, 0) >= max_listings:
+            user_id = listing_owner[index] = rng.choice(unlimited_owners)
+        active_counts[user_id] = active_counts.get(user_id, 0) + 1
+
+    started = time.perf_counter()
+    active = [False] * (listings + 1)
+    listing_writer = Writer(connection, Listing.__table__, [
+        'id', 'user_id', 'title', 'description', 'property_type', 'resort_name', 'city',
+        'state', 'country', 'zip_code', 'bedrooms', 'bathrooms', 'sleeps', 'unit_size',
+        'view_type', 'ownership_type', 'week_number', 'season', 'usage_type', 'sale_price',
+        'rental_price_weekly', 'rental_price_nightly', 'maintenance_fee',
+        'effective_sale_price', 'effective_weekly_price', 'effective_nightly_price',
+        'effective_price', 'check_in_day', 'amenities', 'contact_method', 'contact_email',
+        'status', 'is_featured', 'photo_count', 'main_photo_url', 'view_count',
+        'inquiry_count', 'favorite_count', 'created_at', 'updated_at'
+    ], batch_size)
+
+    # Favorites are drawn first so listing.favorite_count matches the favorite table
+    for listing_id, status in enumerate(statuses_by_id, start=1):
+        active[listing_id] = status == 'active'
+    favorite_pairs = set()
+    total_favorites = int(users * favorites_per_user)
+    targets = _favorite_targets(rng, listings, active, total_favorites)
+    for listing_id in targets:
+        favorite_pairs.add((rng.randint(1, users), listing_id))
+    favorite_count = [0] * (listings + 1)
+    for _, listing_id in favorite_pairs:
+        favorite_count[listing_id] += 1
+
+    amenity_rows = [{'id': i, 'slug': amenity_slug(name), 'name': name, 'created_at': now}
+                    for i, name in enumerate(AMENITIES, start=1)]
+    connection.execute(Amenity.__table__.insert(), amenity_rows)
+    counts['amenity'] = len(amenity_rows)
+
+    # Photo and amenity rows are written in their own phases after the
+    # listings, from what each listing drew here
+    listing_photos = []
+    listing_amenities = []
+    for index in range(listings):
+        listing_id = index + 1
+        user_id = listing_owner[index]
+        city, state, country, zip_code = rng.choices(LOCATIONS, LOCATION_WEIGHTS)[0]
+        brand = rng.choice(BRANDS)
+        resort = f'{brand} {city} {rng.choice(RESORT_SUFFIXES)}'
+        season, season_factor = rng.choice(SEASONS)
+        bedrooms = rng.choices([0, 1, 2, 3, 4], [0.1, 0.3, 0.35, 0.2, 0.05])[0]
+        property_type = rng.choices(['sale', 'rental', 'both'], [0.5, 0.3, 0.2])[0]
+        size_factor = (bedrooms + 1) * season_factor
+
+        sale_price = weekly = nightly = None
+        if property_type != 'rental':
+            sale_price = _money(rng.lognormvariate(math.log(4000 * size_factor), 0.7))
+        if property_type != 'sale':
+            weekly = _money(rng.lognormvariate(math.log(700 * size_factor), 0.4))
+            nightly = _money(weekly / 7 * rng.uniform(1.0, 1.2)) if rng.random() < 0.6 else None
+        effective_price = sale_price if sale_price is not None else weekly
+
+        photo_count = min(30, int(rng.expovariate(1 / photos_per_listing))) if photos_per_listing else 0
+        created_at = max(user_created[user_id - 1], now - timedelta(days=rng.uniform(0, 730)))
+        updated_at = created_at + timedelta(days=rng.uniform(0, (now - created_at).days or 1))
+        updated_at = min(updated_at, now)
+
+        if photo_count:
+            listing_photos.append((listing_id, photo_count, created_at))
+
+        amenity_ids = sorted(rng.sample(range(1, len(AMENITIES) + 1), rng.randint(2, 7)))
+        listing_amenities.append(amenity_ids)
+
+        views = int(rng.paretovariate(1.5) * 20) + favorite_count[listing_id] * 10
+        listing_writer.add(
+            listing_id, user_id,
+            f'{bedrooms or "Studio"}{"BR" if bedrooms else ""} {season} Week at {resort}',
+            f'{season} season week at {resort} in {city}. Sleeps {bedrooms * 2 + 2}, '
+            f'{(VIEWS[index % len(VIEWS)] or "resort view").lower()}, close to the beach and golf.',
+            property_type, resort, city, state, country, zip_code, bedrooms,
+            max(1.0, bedrooms * 1.0 + rng.choice([0, 0.5])), bedrooms * 2 + 2,
+            f'{450 + bedrooms * 400 + rng.randint(0, 200)} sq ft', VIEWS[index % len(VIEWS)],
+            rng.choice(OWNERSHIP_TYPES), str(rng.randint(1, 52)), season, rng.choice(USAGE_TYPES),
+            sale_price, weekly, nightly, _money(rng.uniform(600, 2400) * (bedrooms + 1) / 2),
+            sale_price, weekly, nightly, effective_price,
+            rng.choice(CHECK_IN_DAYS), json.dumps([AMENITIES[i - 1] for i in amenity_ids]),
+            'email', user_email(user_id - 1), statuses_by_id[index], rng.random() < 0.03,
+            photo_count, f'/static/uploads/listings/{listing_id}_0.jpg' if photo_count else None,
+            views, int(views * rng.uniform(0, 0.05)), favorite_count[listing_id],
+            created_at, updated_at
+        )
+    timed('listing', listing_writer, started)
+    user_table = User.__table__
+    connection.execute(
+        user_table.update().where(user_table.c.id == bindparam('owner_id')).values(
+            active_listing_count=bindparam('active_count')
+        ),
+        [{'owner_id': user_id, 'active_count': count} for user_id, count in active_counts.items()]
+    )
+
+    started = time.perf_counter()
+    photo_writer = Writer(connection, ListingPhoto.__table__, [
+        'id', 'listing_id', 'filename', 'original_filename', 'file_path', 'file_size',
+        'width', 'height', 'sort_order', 'is_main', 'created_at'
+    ], batch_size)
+    photo_id = 0
+    for listing_id, photo_count, created_at in listing_photos:
+        for sort_order in range(photo_count):
+            photo_id += 1
+            filename = f'{listing_id}_{sort_order}.jpg'
+            photo_writer.add(
+                photo_id, listing_id, filename, f'IMG_{rng.randint(1000, 9999)}.jpg',
+                f'/static/uploads/listings/{filename}', rng.randint(150000, 2500000),
+                1600, 1200, sort_order, sort_order == 0, created_at
+            )
+    timed('listing_photo', photo_writer, started)
+
+    started = time.perf_counter()
+    amenity_writer = Writer(connection, listing_amenity, ['listing_id', 'amenity_id'], batch_size)
+    for listing_id, amenity_ids in enumerate(listing_amenities, start=1):
+        for amenity_id in amenity_ids:
+            amenity_writer.add(listing_id, amenity_id)
+    timed('listing_amenity', amenity_writer, started)
+
+    started = time.perf_counter()
+    writer = Writer(connection, Favorite.__table__, ['id', 'user_id', 'listing_id', 'created_at'], batch_size)
+    for favorite_id, (user_id, listing_id) in enumerate(sorted(favorite_pairs), start=1):
+        writer.add(favorite_id, user_id, listing_id, now - timedelta(days=rng.uniform(0, 365)))
+    timed('favorite', writer, started)
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic SQLite dataset')
+    parser.add_argument('--output', required=True, help='SQLite file to create')
+    parser.add_argument('--listings', type=int, default=100000, help='Listings to create')
+    parser.add_argument('--users', type=int, help='Users to create (default: listings / 5)')
+    parser.add_argument('--favorites-per-user', type=float, default=4.0, help='Average favorites per user')
+    parser.add_argument('--photos-per-listing', type=float, default=3.0, help='Average photos per listing')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--batch-size', type=int, default=5000, help='Rows per insert statement')
+    parser.add_argument('--force', action='store_true', help='Overwrite the output file')
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    if os.path.exists(output):
+        if not args.force:
+            print(f"❌ {output} already exists (use --force to overwrite)")
+            return False
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(output + suffix):
+                os.remove(output + suffix)
+
+    # Point the app at the new file before main.py is imported; it creates the tables
+    os.environ['DATABASE_PATH'] = output
+    os.environ.setdefault('BACKGROUND_JOBS', '0')
+    from src.main import app
+    from models.user import db
+
+    users = args.users or max(1, args.listings // 5)
+    print(f"🔄 Generating {args.listings:,} listings and {users:,} users into {output}...")
+    started = time.perf_counter()
+    with app.app_context():
+        with db.engine.connect() as connection:
+            # Bulk load settings; a crash mid-run just means regenerating the file
+            connection.exec_driver_sql('PRAGMA journal_mode=MEMORY')
+            connection.exec_driver_sql('PRAGMA synchronous=OFF')
+            connection.exec_driver_sql('PRAGMA cache_size=-200000')
+            connection.commit()
+            counts = generate(
+                connection, args.listings, users,
+                favorites_per_user=args.favorites_per_user,
+                photos_per_listing=args.photos_per_listing,
+                seed=args.seed, batch_size=args.batch_size
+            )
+            connection.commit()
+            connection.exec_driver_sql('ANALYZE')
+            connection.commit()
+
+    print(f"✅ Done in {time.perf_counter() - started:.1f}s")
+    print(json.dumps(counts, indent=2, sort_keys=True))
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    if not success:
+        exit(1)
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+HTTP load harness
+Boots the app on a local port against a freshly generated SQLite database
+(or one made by generate_data.py, with --database), drives virtual users through a weighted
+mix of scenarios and reports throughput and p50/p95/p99 latency per
+endpoint as JSON with sorted keys, so runs from two commits diff cleanly
+
+Scenarios: browse (listing search with random filters), search (free
+text), detail (listing page, revalidated with If-None-Match like a browser
+cache), favorite (add then remove) and login. Each virtual user logs in
+once before the clock starts, so favorite requests carry a session cookie.
+
+Use --url to drive an already running server instead; it must hold
+generated data (see generate_data.py) and have rate limiting disabled.
+
+Example:
+    python benchmarks/load_harness.py --concurrency 16 --duration 30 --output before.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.cookiejar import CookieJar
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(SRC_DIR))
+sys.path.insert(0, SRC_DIR)
+
+from benchmarks.generate_data import LOCATIONS, PASSWORD, generate, user_email
+from utils.stats import percentile
+
+DEFAULT_MIX = 'browse=40,search=20,detail=30,favorite=8,login=2'
+SEARCH_TERMS = ['beach', 'Orlando', 'Marriott', 'ocean view', 'Lahaina', 'Lodge', 'Gold', 'golf']
+
+def summarize(samples_ms, errors, statuses, elapsed):
+    """Summary statistics for one endpoint's latency samples in milliseconds"""
+    summary = {
+        'count': len(samples_ms),
+        'errors': errors,
+        'status': {str(code): count for code, count in sorted(statuses.items())},
+        'rps': round(len(samples_ms) / elapsed, 2) if elapsed else 0
+    }
+    if samples_ms:
+        summary.update({
+            'p50_ms': round(percentile(samples_ms, 50), 2),
+            'p95_ms': round(percentile(samples_ms, 95), 2),
+            'p99_ms': round(percentile(samples_ms, 99), 2),
+            'max_ms': round(max(samples_ms), 2)
+        })
+    return summary
+
+def parse_mix(text):
+    """Parse 'browse=40,search=20' into a scenario -> weight dict"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f'Unknown scenario: {name} (choose from {", ".join(SCENARIOS)})')
+        mix[name] = float(weight or 1)
+    return mix
+
+def seed_database(app, users, listings, favorites, seed):
+    """Fill an empty database with generated users, listings and favorites"""
+    from models.user import User, db
+
+    with app.app_context():
+        if User.query.first():
+            return
+        with db.engine.connect() as connection:
+            generate(connection, listings, users, favorites_per_user=favorites / users,
+                     seed=seed, progress=lambda line: None)
+            connection.commit()
+
+def start_server(app):
+    """Serve the app from a background thread on an ephemeral port"""
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+class VirtualUser:
+    """One simulated visitor with its own cookie jar and browser-style ETag cache"""
+
+    def __init__(self, base_url, index, users, listing_ids, rng):
+        self.base_url = base_url
+        self.email = user_email(index % users)
+        self.listing_ids = listing_ids
+        self.rng = rng
+        self.etags = {}
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+    def request(self, method, path, body=None, headers=None):
+        """Send one request; returns (status, headers, parsed JSON or None)"""
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers or {})
+        if data is not None:
+            req.add_header('Content-Type', 'application/json')
+        try:
+            with self.opener.open(req, timeout=30) as response:
+                payload = response.read()
+                status, response_headers = response.status, response.headers
+        except urllib.error.HTTPError as e:
+            payload = e.read()
+            status, response_headers = e.code, e.headers
+        try:
+            parsed = json.loads(payload) if payload else None
+        except ValueError:
+            parsed = None
+        return status, response_headers, parsed
+
+    def login(self):
+        return [('POST /api/auth/login', 'POST', '/api/auth/login',
+                 {'email': self.email, 'password': PASSWORD}, None)]
+
+    def browse(self):
+        params = {'page': self.rng.randint(1, 3), 'per_page': 20}
+        if self.rng.random() < 0.5:
+            params['city'] = self.rng.choice(LOCATIONS)[0]
+        if self.rng.random() < 0.3:
+            params['property_type'] = self.rng.choice(['sale', 'rental'])
+        if self.rng.random() < 0.3:
+            params['bedrooms'] = self.rng.randint(1, 3)
+        if self.rng.random() < 0.2:
+            params['min_price'] = 1000
+            params['max_price'] = self.rng.choice([5000, 20000])
+            params['price_type'] = 'sale'
+        return [('GET /api/listings', 'GET', '/api/listings?' + urllib.parse.urlencode(params), None, None)]
+
+    def search(self):
+        query = urllib.parse.urlencode({'q': self.rng.choice(SEARCH_TERMS)})
+        return [('GET /api/listings/search', 'GET', f'/api/listings/search?{query}', None, None)]
+
+    def detail(self):
+        listing_id = self.rng.choice(self.listing_ids)
+        headers = {}
+        if listing_id in self.etags:
+            headers['If-None-Match'] = self.etags[listing_id]
+        return [('GET /api/listings/<id>', 'GET', f'/api/listings/{listing_id}', None, headers)]
+
+    def favorite(self):
+        listing_id = self.rng.choice(self.listing_ids)
+        return [
+            ('POST /api/favorites', 'POST', '/api/favorites', {'listing_id': listing_id}, None),
+            ('DELETE /api/favorites/listing/<id>', 'DELETE', f'/api/favorites/listing/{listing_id}', None, None)
+        ]
+
+SCENARIOS = {
+    'browse': VirtualUser.browse,
+    'search': VirtualUser.search,
+    'detail': VirtualUser.detail,
+    'favorite': VirtualUser.favorite,
+    'login': VirtualUser.login
+}
+
+class Recorder:
+    """Thread-safe latency, status and error tallies per endpoint"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.statuses = {}
+        self.errors = {}
+
+    def record(self, endpoint, status, elapsed_ms):
+        with self.lock:
+            self.samples.setdefault(endpoint, []).append(elapsed_ms)
+            statuses = self.statuses.setdefault(endpoint, {})
+            statuses[status] = statuses.get(status, 0) + 1
+            # 404s on favorite removal and 409s on re-adding are expected: users share seeded favorites
+            if status >= 500 or status in (0, 401, 429):
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def total(self):
+        with self.lock:
+            return sum(len(samples) for samples in self.samples.values())
+
+def run_load(base_url, args, listing_ids):
+    """Drive args.concurrency virtual users until the duration or request budget runs out"""
+    mix = parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    recorder = Recorder()
+    budget = threading.Semaphore(args.requests) if args.requests else None
+
+    visitors = []
+    for index in range(args.concurrency):
+        visitor = VirtualUser(base_url, index, args.users, listing_ids, random.Random(args.seed + index))
+        status, _, _ = visitor.request(*visitor.login()[0][1:])
+        if status != 200:
+            raise SystemExit(f'Warm-up login failed with HTTP {status}; is rate limiting disabled?')
+        visitors.append(visitor)
+
+    started = time.perf_counter()
+    deadline = started + args.duration
+
+    def worker(visitor):
+        while time.perf_counter() < deadline:
+            name = visitor.rng.choices(names, weights)[0]
+            for endpoint, method, path, body, headers in SCENARIOS[name](visitor):
+                if budget is not None and not budget.acquire(blocking=False):
+                    return
+                request_started = time.perf_counter()
+                try:
+                    status, response_headers, _ = visitor.request(method, path, body, headers)
+                except OSError:
+                    status, response_headers = 0, {}
+                recorder.record(endpoint, status, (time.perf_counter() - request_started) * 1000)
+                if name == 'detail' and status == 200 and response_headers.get('ETag'):
+                    visitor.etags[int(path.rsplit('/', 1)[1])] = response_headers['ETag']
+
+    threads = [threading.Thread(target=worker, args=(visitor,)) for visitor in visitors]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    all_samples = [sample for samples in recorder.samples.values() for sample in samples]
+    all_statuses = {}
+    for statuses in recorder.statuses.values():
+        for status, count in statuses.items():
+            all_statuses[status] = all_statuses.get(status, 0) + count
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'endpoints': {
+            endpoint: summarize(samples, recorder.errors.get(endpoint, 0), recorder.statuses[endpoint], elapsed)
+            for endpoint, samples in recorder.samples.items()
+        },
+        'total': summarize(all_samples, sum(recorder.errors.values()), all_statuses, elapsed)
+    }
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=SRC_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the API with a weighted scenario mix')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds to run')
+    parser.add_argument('--requests', type=int, default=0, help='Stop after this many requests (0: no limit)')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'Scenario weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--users', type=int, default=50, help='Seeded load-test users')
+    parser.add_argument('--listings', type=int, default=2000, help='Seeded listings')
+    parser.add_argument('--favorites', type=int, default=5000, help='Seeded favorites')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for data and scenarios')
+    parser.add_argument('--database', help='Existing SQLite database to use instead of a fresh one')
+    parser.add_argument('--url', help='Drive an already running server instead of booting one')
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='selfserve-load-')
+    server = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+        visitor = VirtualUser(base_url, 0, args.users, [], random.Random(args.seed))
+        _, _, listings = visitor.request('GET', '/api/listings?per_page=100')
+        listing_ids = [listing['id'] for listing in (listings or {}).get('listings', [])]
+    else:
+        # Configure the app before it is imported; main.py reads these at import time
+        os.environ['DATABASE_PATH'] = os.path.abspath(args.database or os.path.join(workdir, 'app.db'))
+        os.environ.setdefault('SESSION_DB_PATH', os.path.join(workdir, 'sessions.db'))
+        os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+        os.environ.setdefault('BACKGROUND_JOBS', '0')
+        from src.main import app
+        from models.listing import Listing, db
+
+        seed_database(app, args.users, args.listings, args.favorites, args.seed)
+        with app.app_context():
+            listing_ids = [row.id for row in db.session.query(Listing.id).filter_by(status='active')
+                           .order_by(Listing.id).limit(10000)]
+        server, base_url = start_server(app)
+
+    if not listing_ids:
+        raise SystemExit('No active listings to request')
+
+    try:
+        results = run_load(base_url, args, listing_ids)
+    finally:
+        if server:
+            server.shutdown()
+
+    report = {
+        'commit': git_commit(),
+        'config': {
+            'concurrency': args.concurrency,
+            'duration_s': args.duration,
+            'requests': args.requests,
+            'mix': parse_mix(args.mix),
+            'seed': args.seed,
+            'users': args.users,
+            'listings': len(listing_ids),
+            'server': args.url or 'in-process'
+        },
+        **results
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+if __name__ == '__main__':
+    main()
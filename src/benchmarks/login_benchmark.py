@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Login hashing benchmark
+Measures password verification throughput and tail latency for concurrent
+logins, hashing inline on the request thread versus on the process pool,
+plus how long a cheap concurrent "other request" waits meanwhile
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import passwords
+from utils.stats import percentile
+
+def summarize(samples_ms):
+    """Summary statistics for latency samples in milliseconds"""
+    return {
+        'count': len(samples_ms),
+        'p50_ms': round(percentile(samples_ms, 50), 2),
+        'p95_ms': round(percentile(samples_ms, 95), 2),
+        'p99_ms': round(percentile(samples_ms, 99), 2),
+        'max_ms': round(max(samples_ms), 2)
+    }
+
+def run_mode(workers, password_hash, logins, concurrency):
+    """Verify `logins` passwords with `concurrency` threads and a bystander probe"""
+    passwords.HASH_WORKERS = workers
+    passwords._pool = None
+
+    # Warm the pool so process start-up is not measured
+    passwords.verify_password(password_hash, 'correct horse')
+
+    login_latencies = []
+    probe_latencies = []
+    done = threading.Event()
+
+    def login():
+        started = time.perf_counter()
+        assert passwords.verify_password(password_hash, 'correct horse')
+        login_latencies.append((time.perf_counter() - started) * 1000)
+
+    def probe():
+        # Stands in for a cheap request sharing the worker with the logins
+        while not done.is_set():
+            started = time.perf_counter()
+            sum(range(1000))
+            probe_latencies.append((time.perf_counter() - started) * 1000)
+            time.sleep(0.005)
+
+    probe_thread = threading.Thread(target=probe, daemon=True)
+    probe_thread.start()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(logins):
+            executor.submit(login)
+    elapsed = time.perf_counter() - started
+
+    done.set()
+    probe_thread.join()
+
+    return {
+        'mode': 'inline' if workers <= 0 else f'pool({workers})',
+        'logins_per_second': round(logins / elapsed, 2),
+        'login_latency': summarize(login_latencies),
+        'other_request_latency': summarize(probe_latencies)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark concurrent login password checks')
+    parser.add_argument('--logins', type=int, default=200, help='Total logins to verify')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent login threads')
+    parser.add_argument('--workers', type=int, default=passwords.HASH_WORKERS, help='Hashing pool size')
+    args = parser.parse_args()
+
+    password_hash = passwords.generate_password_hash('correct horse', passwords.HASH_METHOD)
+    results = {
+        'method': password_hash.split('$', 1)[0],
+        'logins': args.logins,
+        'concurrency': args.concurrency,
+        'results': [
+            run_mode(0, password_hash, args.logins, args.concurrency),
+            run_mode(args.workers, password_hash, args.logins, args.concurrency)
+        ]
+    }
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Rate limiter benchmark
+Measures the cost of one token-bucket check for the memory and SQLite
+stores, single-threaded and with concurrent callers, and the added latency
+of the rate_limit decorator on a trivial Flask route
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+
+from utils import rate_limit
+from utils.stats import percentile
+
+def summarize(samples_us):
+    """Summary statistics for latency samples in microseconds"""
+    return {
+        'count': len(samples_us),
+        'p50_us': round(percentile(samples_us, 50), 2),
+        'p95_us': round(percentile(samples_us, 95), 2),
+        'p99_us': round(percentile(samples_us, 99), 2),
+        'max_us': round(max(samples_us), 2)
+    }
+
+def bench_store(name, store, checks, keys, concurrency):
+    """Time `checks` take() calls spread over `keys` bucket keys"""
+    samples = []
+
+    def check(i):
+        started = time.perf_counter()
+        store.take(f'bench:{i % keys}', 100, 10.0, time.time())
+        samples.append((time.perf_counter() - started) * 1_000_000)
+
+    started = time.perf_counter()
+    if concurrency <= 1:
+        for i in range(checks):
+            check(i)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(check, range(checks)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        'store': name,
+        'concurrency': concurrency,
+        'checks_per_second': round(checks / elapsed),
+        'check_latency': summarize(samples)
+    }
+
+def bench_route(requests_count):
+    """Compare a trivial route with and without the rate_limit decorator"""
+    rate_limit.RATE_LIMITS['bench'] = (requests_count * 2, 60)
+
+    app = Flask(__name__)
+
+    @app.route('/plain')
+    def plain():
+        return jsonify({'ok': True})
+
+    @app.route('/limited')
+    @rate_limit.rate_limit('bench')
+    def limited():
+        return jsonify({'ok': True})
+
+    client = app.test_client()
+    results = {}
+    for path in ('/plain', '/limited'):
+        client.get(path)
+        samples = []
+        for _ in range(requests_count):
+            started = time.perf_counter()
+            client.get(path)
+            samples.append((time.perf_counter() - started) * 1_000_000)
+        results[path] = summarize(samples)
+
+    results['added_p50_us'] = round(results['/limited']['p50_us'] - results['/plain']['p50_us'], 2)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark token-bucket rate limit checks')
+    parser.add_argument('--checks', type=int, default=20000, help='Checks per store run')
+    parser.add_argument('--keys', type=int, default=1000, help='Distinct bucket keys')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent checking threads')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per route')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_store = rate_limit.SQLiteBucketStore(os.path.join(tmp, 'ratelimit.db'))
+        memory_store = rate_limit.MemoryBucketStore()
+
+        rate_limit.RATE_LIMIT_DB_PATH = os.path.join(tmp, 'route.db')
+        rate_limit._store = None
+
+        results = {
+            'checks': args.checks,
+            'keys': args.keys,
+            'stores': [
+                bench_store('memory', memory_store, args.checks, args.keys, 1),
+                bench_store('memory', memory_store, args.checks, args.keys, args.concurrency),
+                bench_store('sqlite', sqlite_store, args.checks, args.keys, 1),
+                bench_store('sqlite', sqlite_store, args.checks, args.keys, args.concurrency)
+            ],
+            'route_overhead': bench_route(args.requests)
+        }
+    print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script for Listing Amenities
+Adds the amenity vocabulary and listing_amenity tables, then backfills them
+from the JSON stored in listing.amenities in batches
+"""
+
+import sqlite3
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from utils.amenities import amenity_slug, parse_amenities
+
+BATCH_SIZE = 500
+
+def backfill_batch(cursor, rows, vocabulary):
+    """Insert vocabulary and junction rows for one batch of listings"""
+    links = []
+    for listing_id, amenities_json in rows:
+        for name in parse_amenities(amenities_json):
+            slug = amenity_slug(name)
+            if not slug:
+                continue
+            if slug not in vocabulary:
+                cursor.execute(
+                    "INSERT OR IGNORE INTO amenity (slug, name, created_at) VALUES (?, ?, CURRENT_TIMESTAMP)",
+                    (slug, name)
+                )
+                cursor.execute("SELECT id FROM amenity WHERE slug = ?", (slug,))
+                vocabulary[slug] = cursor.fetchone()[0]
+            links.append((listing_id, vocabulary[slug]))
+
+    cursor.executemany(
+        "INSERT OR IGNORE INTO listing_amenity (listing_id, amenity_id) VALUES (?, ?)",
+        links
+    )
+    return len(links)
+
+def run_amenities_migration(batch_size=BATCH_SIZE):
+    """Run the database migration to normalize listing amenities"""
+
+    # Database path
+    db_path = os.path.join(os.path.dirname(__file__), 'database', 'app.db')
+
+    print(f"🔄 Starting amenities database migration...")
+    print(f"📍 Database path: {db_path}")
+
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        # 1. Create amenity vocabulary table
+        print("🔧 Creating amenity table...")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS amenity (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                slug VARCHAR(100) NOT NULL UNIQUE,
+                name VARCHAR(100) NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        print("✅ Created amenity table")
+
+        # 2. Create listing_amenity junction table
+        print("🔧 Creating listing_amenity table...")
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS listing_amenity (
+                listing_id INTEGER NOT NULL,
+                amenity_id INTEGER NOT NULL,
+                PRIMARY KEY (listing_id, amenity_id),
+                FOREIGN KEY (listing_id) REFERENCES listing (id) ON DELETE CASCADE,
+                FOREIGN KEY (amenity_id) REFERENCES amenity (id)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_listing_amenity_amenity_id ON listing_amenity(amenity_id, listing_id)')
+        conn.commit()
+        print("✅ Created listing_amenity table")
+
+        # 3. Backfill from listing.amenities in id order, one commit per batch
+        print(f"🔧 Backfilling amenities in batches of {batch_size}...")
+        cursor.execute("SELECT slug, id FROM amenity")
+        vocabulary = dict(cursor.fetchall())
+
+        last_id = 0
+        listings_done = 0
+        links_done = 0
+        while True:
+            cursor.execute(
+                "SELECT id, amenities FROM listing WHERE id > ? AND amenities IS NOT NULL ORDER BY id LIMIT ?",
+                (last_id, batch_size)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            links_done += backfill_batch(cursor, rows, vocabulary)
+            conn.commit()
+
+            last_id = rows[-1][0]
+            listings_done += len(rows)
+            print(f"   processed {listings_done} listings (last id {last_id})")
+
+        print(f"✅ Backfilled {links_done} amenity links across {listings_done} listings")
+        print(f"📊 Amenity vocabulary size: {len(vocabulary)}")
+
+        conn.close()
+        print("✅ Database migration completed successfully!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Database migration failed: {str(e)}")
+        if 'conn' in locals():
+            conn.close()
+        return False
+
+if __name__ == "__main__":
+    print("🚀 Running Listing Amenities Database Migration")
+    print("=" * 50)
+    success = run_amenities_migration()
+    if success:
+        print("🎉 Migration completed successfully!")
+    else:
+        print("💥 Migration failed!")
+        exit(1)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script for Effective Listing Prices
+Adds the indexed effective price columns used by price filters and sorting
+and backfills them from the listed sale and rental prices
+"""
+
+import sqlite3
+import os
+
+EFFECTIVE_PRICE_COLUMNS = [
+    'effective_sale_price',
+    'effective_weekly_price',
+    'effective_nightly_price',
+    'effective_price'
+]
+
+def run_effective_price_migration():
+    """Run the database migration to add effective price columns"""
+
+    # Database path
+    db_path = os.path.join(os.path.dirname(__file__), 'database', 'app.db')
+
+    print(f"🔄 Starting effective price database migration...")
+    print(f"📍 Database path: {db_path}")
+
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        # 1. Add effective price columns to listing table
+        print("🔧 Adding effective price columns to listing table...")
+        cursor.execute("PRAGMA table_info(listing)")
+        columns = [column[1] for column in cursor.fetchall()]
+        for column in EFFECTIVE_PRICE_COLUMNS:
+            if column in columns:
+                print(f"✅ {column} column already exists")
+            else:
+                cursor.execute(f"ALTER TABLE listing ADD COLUMN {column} DECIMAL(10, 2)")
+                print(f"✅ Added {column} column")
+
+        # 2. Backfill using the same rules as Listing.refresh_effective_prices
+        print("🔧 Backfilling effective prices...")
+        cursor.execute('''
+            UPDATE listing SET
+                effective_sale_price = CASE
+                    WHEN property_type IN ('sale', 'both') AND sale_price > 0 THEN sale_price END,
+                effective_weekly_price = CASE
+                    WHEN property_type IN ('rental', 'both') AND rental_price_weekly > 0 THEN rental_price_weekly END,
+                effective_nightly_price = CASE
+                    WHEN property_type IN ('rental', 'both') AND rental_price_nightly > 0 THEN rental_price_nightly END
+        ''')
+        cursor.execute('''
+            UPDATE listing SET effective_price = COALESCE(effective_sale_price, effective_weekly_price)
+        ''')
+        print(f"✅ Backfilled {cursor.rowcount} listings")
+
+        # 3. Create indexes for price range scans and featured-first price sorts
+        print("🔧 Creating database indexes...")
+        for column in EFFECTIVE_PRICE_COLUMNS:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS idx_listing_status_{column} ON listing(status, {column})'
+            )
+        for column in EFFECTIVE_PRICE_COLUMNS:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS idx_listing_status_featured_{column} '
+                f'ON listing(status, is_featured DESC, {column})'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS idx_listing_status_featured_{column}_desc '
+                f'ON listing(status, is_featured DESC, {column} DESC)'
+            )
+        print("✅ Created database indexes")
+
+        conn.commit()
+        conn.close()
+        print("✅ Database migration completed successfully!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Database migration failed: {str(e)}")
+        if 'conn' in locals():
+            conn.close()
+        return False
+
+if __name__ == "__main__":
+    print("🚀 Running Effective Price Database Migration")
+    print("=" * 50)
+    success = run_effective_price_migration()
+    if success:
+        print("🎉 Migration completed successfully!")
+    else:
+        print("💥 Migration failed!")
+        exit(1)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script for the Favorite Change Log
+Indexes favorite_change by user for the recommendation job and prunes
+changes it has already consumed
+"""
+
+import sqlite3
+import os
+
+def run_favorite_change_migration():
+    """Run the database migration to index and prune favorite_change"""
+
+    # Database path
+    db_path = os.path.join(os.path.dirname(__file__), 'database', 'app.db')
+
+    print(f"🔄 Starting favorite change database migration...")
+    print(f"📍 Database path: {db_path}")
+
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='favorite_change'")
+        if not cursor.fetchone():
+            print("✅ favorite_change table does not exist yet; the app creates it with its index")
+            conn.close()
+            return True
+
+        # 1. Index changes by user for the per-batch "later changes" lookup
+        print("🔧 Creating database indexes...")
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_favorite_change_user_id ON favorite_change(user_id, id)')
+        print("✅ Created database indexes")
+
+        # 2. Drop changes the recommendation job has already folded in
+        print("🔧 Pruning consumed favorite changes...")
+        cursor.execute('''
+            DELETE FROM favorite_change WHERE id <= COALESCE(
+                (SELECT last_event_id FROM rollup_state WHERE name = 'favorite_cooccurrence'), 0
+            )
+        ''')
+        print(f"✅ Pruned {cursor.rowcount} changes")
+
+        conn.commit()
+        conn.close()
+        print("✅ Database migration completed successfully!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Database migration failed: {str(e)}")
+        if 'conn' in locals():
+            conn.close()
+        return False
+
+if __name__ == "__main__":
+    print("🚀 Running Favorite Change Database Migration")
+    print("=" * 50)
+    success = run_favorite_change_migration()
+    if success:
+        print("🎉 Migration completed successfully!")
+    else:
+        print("💥 Migration failed!")
+        exit(1)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script for Favorite Versions
+Adds favorite.updated_at, part of the validator the favorites page checks
+before loading a page
+"""
+
+import sqlite3
+import os
+
+def run_favorite_migration():
+    """Run the database migration to add favorite.updated_at"""
+
+    # Database path
+    db_path = os.path.join(os.path.dirname(__file__), 'database', 'app.db')
+
+    print(f"🔄 Starting favorite database migration...")
+    print(f"📍 Database path: {db_path}")
+
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        # 1. Add the version column to the favorite table
+        print("🔧 Adding updated_at column to favorite table...")
+        cursor.execute("PRAGMA table_info(favorite)")
+        columns = [column[1] for column in cursor.fetchall()]
+        if 'updated_at' in columns:
+            print("✅ updated_at column already exists")
+        else:
+            cursor.execute("ALTER TABLE favorite ADD COLUMN updated_at DATETIME")
+            print("✅ Added updated_at column")
+
+        # 2. Backfill from when each favorite was created
+        print("🔧 Backfilling favorite updated_at...")
+        cursor.execute('UPDATE favorite SET updated_at = created_at WHERE updated_at IS NULL')
+        print(f"✅ Backfilled {cursor.rowcount} favorites")
+
+        conn.commit()
+        conn.close()
+        print("✅ Database migration completed successfully!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Database migration failed: {str(e)}")
+        if 'conn' in locals():
+            conn.close()
+        return False
+
+if __name__ == "__main__":
+    print("🚀 Running Favorite Database Migration")
+    print("=" * 50)
+    success = run_favorite_migration()
+    if success:
+        print("🎉 Migration completed successfully!")
+    else:
+        print("💥 Migration failed!")
+        exit(1)
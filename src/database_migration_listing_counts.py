@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script for Owner Listing Counts
+Adds the denormalized active listing count used for plan limit checks,
+backfills it from the listing table and indexes listings by owner
+"""
+
+import sqlite3
+import os
+
+def run_listing_count_migration():
+    """Run the database migration to add user.active_listing_count"""
+
+    # Database path
+    db_path = os.path.join(os.path.dirname(__file__), 'database', 'app.db')
+
+    print(f"🔄 Starting listing count database migration...")
+    print(f"📍 Database path: {db_path}")
+
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+
+        # 1. Add the counter column to the user table
+        print("🔧 Adding active_listing_count column to user table...")
+        cursor.execute("PRAGMA table_info(user)")
+        columns = [column[1] for column in cursor.fetchall()]
+        if 'active_listing_count' in columns:
+            print("✅ active_listing_count column already exists")
+        else:
+            cursor.execute("ALTER TABLE user ADD COLUMN active_listing_count INTEGER DEFAULT 0")
+            print("✅ Added active_listing_count column")
+
+        # 2. Index listings by owner for the backfill, reconciliation and owner pages
+        print("🔧 Creating database indexes...")
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_listing_user_status ON listing(user_id, status)')
+        print("✅ Created database indexes")
+
+        # 3. Backfill from the active listings each user owns
+        print("🔧 Backfilling active listing counts...")
+        cursor.execute('''
+            UPDATE user SET active_listing_count = (
+                SELECT COUNT(*) FROM listing
+                WHERE listing.user_id = user.id AND listing.status = 'active'
+            )
+        ''')
+        print(f"✅ Backfilled {cursor.rowcount} users")
+
+        conn.commit()
+        conn.close()
+        print("✅ Database migration completed successfully!")
+        return True
+
+    except Exception as e:
+        print(f"❌ Database migration failed: {str(e)}")
+        if 'conn' in locals():
+            conn.close()
+        return False
+
+if __name__ == "__main__":
+    print("🚀 Running Listing Count Database Migration")
+    print("=" * 50)
+    success = run_listing_count_migration()
+    if success:
+        print("🎉 Migration completed successfully!")
+    else:
+        print("💥 Migration failed!")
+        exit(1)
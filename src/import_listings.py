@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Bulk Listing Import
+Loads listings for an owner from a CSV or NDJSON file using the same
+validation, batching and plan limits as POST /api/listings/import
+
+Usage:
+    python import_listings.py --user-id 42 listings.csv
+    python import_listings.py --user-id 42 --format ndjson --dry-run listings.ndjson
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk import listings for an owner')
+    parser.add_argument('path', help='CSV or NDJSON file')
+    parser.add_argument('--user-id', type=int, required=True, help='Owner user ID')
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help='File format (default: from extension)')
+    parser.add_argument('--batch-size', type=int, default=200, help='Listings per transaction')
+    parser.add_argument('--dry-run', action='store_true', help='Validate without inserting')
+    args = parser.parse_args()
+
+    fmt = args.format or ('csv' if args.path.lower().endswith('.csv') else 'ndjson')
+
+    from src.main import app
+    from models.user import User
+    from utils.listing_import import import_listings
+
+    with app.app_context():
+        user = User.query.get(args.user_id)
+        if not user:
+            print(f"❌ User {args.user_id} not found")
+            return False
+
+        print(f"🔄 Importing {args.path} ({fmt}) for {user.username}...")
+        with open(args.path, 'rb') as stream:
+            report = import_listings(user, stream, fmt, batch_size=args.batch_size, dry_run=args.dry_run)
+
+    for error in report['errors']:
+        print(f"⚠️  Line {error['line']}: {error['error']}")
+    verb = 'Validated' if args.dry_run else 'Imported'
+    print(f"✅ {verb} {report['imported']} listings, {report['failed']} rows failed")
+    if report['listing_ids']:
+        print(json.dumps({'listing_ids': report['listing_ids']}))
+    return report['failed'] == 0
+
+if __name__ == "__main__":
+    success = main()
+    if not success:
+        exit(1)
@@ -1,8 +1,5 @@
 import os
 import sys
-import threading
-import time
-import requests
 from datetime import datetime
 
 # Environment variables are loaded directly from Render
@@ -12,6 +9,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from flask import Flask, send_from_directory, jsonify
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from models.user import db
 from src.routes.user import user_bp
 from src.routes.payment import payment_bp
@@ -33,7 +31,19 @@ from src.routes.membership_upgrade import membership_upgrade_bp
 from src.routes.web_migration import web_migration_bp
 from src.routes.user_api import user_api_bp
 from src.routes.plan_upgrade import plan_upgrade_bp
+from src.routes.public_api import public_api_bp
 from src.logging_config import setup_logging
+from utils.analytics import rollup_listing_events, refresh_platform_stats
+from utils.counters import reconcile_listing_counters, reconcile_active_listing_counts
+from utils.session_store import init_session_store
+from utils.warmup import run_warmup
+from utils.scheduler import Scheduler
+from utils.maintenance import expire_featured_listings, expire_memberships, clear_reset_tokens
+from utils.api_keys import flush_usage, FLUSH_INTERVAL
+from utils.passwords import PasswordHashBusy
+from utils.recommendations import update_recommendations, rebuild_recommendations
+from utils.valuation import refresh_price_benchmarks
+from utils.similar_listings import refresh_similarity_index, REFRESH_INTERVAL as SIMILAR_REFRESH_INTERVAL
 
 app = Flask(__name__, static_folder='static', static_url_path='/static')
 
@@ -42,9 +52,16 @@ setup_logging(app)
 
 CORS(app)
 
+# Number of reverse proxies in front of the app whose X-Forwarded-For hops are
+# trusted for the client address; 0 (the default) uses the peer address only
+trusted_proxy_hops = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+if trusted_proxy_hops > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxy_hops)
+
 # Configure session
 app.config['SECRET_KEY'] = 'your-secret-key-here-change-in-production'
-app.config['SESSION_TYPE'] = 'filesystem'
+app.config['SESSION_TYPE'] = os.environ.get('SESSION_TYPE', 'sqlite')
+init_session_store(app)
 
 # Register blueprints
 app.register_blueprint(user_bp)
@@ -67,16 +84,29 @@ app.register_blueprint(membership_upgrade_bp)
 app.register_blueprint(web_migration_bp)
 app.register_blueprint(user_api_bp)
 app.register_blueprint(plan_upgrade_bp)
+app.register_blueprint(public_api_bp)
+
+# The password hashing pool is saturated: ask the client to retry instead of failing
+@app.errorhandler(PasswordHashBusy)
+def password_hash_busy(error):
+    response = jsonify({'error': 'Server is busy, please try again shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
 
 # Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+# DATABASE_PATH lets benchmarks and tools run against a different SQLite file
+database_path = os.environ.get('DATABASE_PATH') or os.path.join(os.path.dirname(__file__), 'database', 'app.db')
+app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{database_path}"
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['DATABASE_PATH'] = os.path.join(os.path.dirname(__file__), 'database', 'app.db')
+app.config['DATABASE_PATH'] = database_path
 db.init_app(app)
 
 # Import all models to ensure they are registered
 from models.user import User
 from models.listing import Listing
+from models.analytics import ListingEvent, ListingStatBucket, PlatformStats
+from models.api_key import ApiKey, ApiKeyUsage
 
 @app.route('/')
 def index():
@@ -86,7 +116,7 @@ def index():
 def dashboard():
     return send_from_directory('static', 'dashboard.html')
 
-# Render wake-up ping endpoint
+# Lightweight liveness endpoint for uptime monitors
 @app.route('/ping')
 def ping():
     return jsonify({
@@ -101,44 +131,60 @@ def health():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'service': 'SelfServe Timeshare'
+        'service': 'SelfServe Timeshare',
+        'warmup_ms': app.config.get('WARMUP_REPORT', {}).get('total_ms'),
+        'scheduler': scheduler.get_job_stats()
     })
 
-def keep_alive():
-    """Function to ping the server every 14 minutes to prevent sleeping"""
-    while True:
-        try:
-            # Wait 14 minutes (840 seconds) - Render free tier sleeps after 15 minutes of inactivity
-            time.sleep(840)
-            
-            # Get the app URL from environment or use default
-            app_url = os.environ.get('RENDER_EXTERNAL_URL', 'https://self-serve-timeshare.onrender.com')
-            
-            # Ping the health endpoint
-            response = requests.get(f"{app_url}/ping", timeout=30)
-            print(f"Keep-alive ping sent at {datetime.now()}: Status {response.status_code}")
-            
-        except Exception as e:
-            print(f"Keep-alive ping failed at {datetime.now()}: {e}")
-
-# Start keep-alive thread when app starts
-def start_keep_alive():
-    """Start the keep-alive thread"""
-    keep_alive_thread = threading.Thread(target=keep_alive, daemon=True)
-    keep_alive_thread.start()
-    print("Keep-alive system started - pinging every 14 minutes")
+def analytics_rollup():
+    """Roll up listing events and refresh platform stats"""
+    rolled_up = rollup_listing_events()
+    refresh_platform_stats()
+    if rolled_up:
+        print(f"Analytics rollup at {datetime.now()}: {rolled_up} events")
+    return rolled_up
+
+def counter_reconciliation():
+    """Reconcile denormalized listing counters and owners' active listing counts"""
+    report = reconcile_listing_counters()
+    if report['drifted']:
+        print(f"Counter reconciliation at {datetime.now()}: fixed {len(report['drifted'])} "
+              f"drifted counters across {report['checked']} listings")
+    owner_report = reconcile_active_listing_counts()
+    if owner_report['drifted']:
+        print(f"Counter reconciliation at {datetime.now()}: fixed {len(owner_report['drifted'])} "
+              f"drifted active listing counts across {owner_report['checked']} users")
+    return len(report['drifted']) + len(owner_report['drifted'])
+
+# Periodic maintenance; leader-only jobs run on one worker per deployment
+scheduler = Scheduler(app)
+scheduler.add_job('analytics_rollup', analytics_rollup, 300)
+scheduler.add_job('counter_reconciliation', counter_reconciliation, 3600)
+scheduler.add_job('expire_featured_listings', expire_featured_listings, 300, initial_delay=30)
+scheduler.add_job('expire_memberships', expire_memberships, 600, initial_delay=60)
+scheduler.add_job('clear_reset_tokens', clear_reset_tokens, 3600, initial_delay=120)
+scheduler.add_job('update_recommendations', update_recommendations, 300, initial_delay=90)
+scheduler.add_job('rebuild_recommendations', rebuild_recommendations, 86400)
+scheduler.add_job('refresh_price_benchmarks', refresh_price_benchmarks, 3600, initial_delay=45)
+# Usage is counted in each worker's memory, so every worker flushes its own
+scheduler.add_job('flush_api_usage', flush_usage, FLUSH_INTERVAL, leader_only=False)
+# Each worker keeps its own similar-listings index
+scheduler.add_job('refresh_similar_listings', refresh_similarity_index, SIMILAR_REFRESH_INTERVAL, leader_only=False)
 
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
-    
-    # Start keep-alive system
-    start_keep_alive()
+    run_warmup(app)
+    scheduler.start()
     
     app.run(host='0.0.0.0', port=5000, debug=True)
 else:
-    # For production deployment (Gunicorn), start keep-alive when module is imported
+    # For production deployment (Gunicorn), warm up and start background jobs
+    # when the worker imports the module, before it accepts connections
     with app.app_context():
         db.create_all()
-    start_keep_alive()
+    # BACKGROUND_JOBS=0 for tools that import the app, e.g. the load harness
+    if os.environ.get('BACKGROUND_JOBS', '1') != '0':
+        run_warmup(app)
+        scheduler.start()
 
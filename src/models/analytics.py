@@ -0,0 +1,99 @@
+from datetime import datetime
+from models.user import db
+
+# Compact event type codes stored in ListingEvent.event_type
+EVENT_VIEW = 1
+EVENT_INQUIRY = 2
+EVENT_FAVORITE = 3
+
+EVENT_COLUMNS = {
+    EVENT_VIEW: 'views',
+    EVENT_INQUIRY: 'inquiries',
+    EVENT_FAVORITE: 'favorites'
+}
+
+# Append-only log of listing views, inquiries and favorites
+class ListingEvent(db.Model):
+    __tablename__ = 'listing_event'
+    __table_args__ = {'extend_existing': True}
+    id = db.Column(db.Integer, primary_key=True)
+    listing_id = db.Column(db.Integer, nullable=False)  # No FK so events outlive deleted listings
+    event_type = db.Column(db.SmallInteger, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<ListingEvent {self.event_type} Listing:{self.listing_id}>'
+
+
+# Hourly and daily per-listing event counts produced by the rollup job
+class ListingStatBucket(db.Model):
+    __tablename__ = 'listing_stat_bucket'
+    __table_args__ = (
+        db.UniqueConstraint('listing_id', 'granularity', 'bucket_start', name='unique_listing_stat_bucket'),
+        {'extend_existing': True}
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    listing_id = db.Column(db.Integer, nullable=False)
+    granularity = db.Column(db.String(10), nullable=False)  # 'hour', 'day'
+    bucket_start = db.Column(db.DateTime, nullable=False)
+
+    views = db.Column(db.Integer, default=0, nullable=False)
+    inquiries = db.Column(db.Integer, default=0, nullable=False)
+    favorites = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<ListingStatBucket {self.listing_id} {self.granularity} {self.bucket_start}>'
+
+    def to_dict(self):
+        return {
+            'bucket_start': self.bucket_start.isoformat(),
+            'views': self.views,
+            'inquiries': self.inquiries,
+            'favorites': self.favorites
+        }
+
+
+# High-water mark of the last event folded into the stat buckets
+class RollupState(db.Model):
+    __tablename__ = 'rollup_state'
+    __table_args__ = {'extend_existing': True}
+    name = db.Column(db.String(50), primary_key=True)
+    last_event_id = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<RollupState {self.name}:{self.last_event_id}>'
+
+
+# Snapshot of platform-wide statistics, refreshed by a background job
+class PlatformStats(db.Model):
+    __tablename__ = 'platform_stats'
+    __table_args__ = {'extend_existing': True}
+    id = db.Column(db.Integer, primary_key=True)  # Single row, id 1
+
+    total_users = db.Column(db.Integer, default=0, nullable=False)
+    total_listings = db.Column(db.Integer, default=0, nullable=False)
+    active_listings = db.Column(db.Integer, default=0, nullable=False)
+    new_users_7_days = db.Column(db.Integer, default=0, nullable=False)
+    new_listings_7_days = db.Column(db.Integer, default=0, nullable=False)
+    total_views = db.Column(db.Integer, default=0, nullable=False)
+    total_inquiries = db.Column(db.Integer, default=0, nullable=False)
+
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    refresh_ms = db.Column(db.Float, nullable=True)  # How long the last refresh took
+
+    def __repr__(self):
+        return f'<PlatformStats {self.refreshed_at}>'
+
+    def to_dict(self):
+        return {
+            'total_users': self.total_users,
+            'total_listings': self.total_listings,
+            'active_listings': self.active_listings,
+            'new_users_7_days': self.new_users_7_days,
+            'new_listings_7_days': self.new_listings_7_days,
+            'total_views': self.total_views,
+            'total_inquiries': self.total_inquiries,
+            'avg_views_per_listing': round(self.total_views / max(self.total_listings, 1), 1),
+            'platform_inquiry_rate': round((self.total_inquiries / self.total_views) * 100, 2) if self.total_views > 0 else 0
+        }
@@ -0,0 +1,47 @@
+from datetime import datetime
+from models.user import db
+
+# API key for the public read API; only a SHA-256 of the secret is stored
+class ApiKey(db.Model):
+    __tablename__ = 'api_key'
+    __table_args__ = {'extend_existing': True}
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    prefix = db.Column(db.String(16), unique=True, nullable=False)  # Public lookup part of the key
+    key_hash = db.Column(db.String(64), nullable=False)
+    daily_quota = db.Column(db.Integer, nullable=False)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, nullable=True)  # Updated when usage is flushed
+    revoked_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<ApiKey {self.prefix} User:{self.user_id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'prefix': self.prefix,
+            'daily_quota': self.daily_quota,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'last_used_at': self.last_used_at.isoformat() if self.last_used_at else None,
+            'revoked': self.revoked_at is not None
+        }
+
+
+# Requests made with an API key per UTC day, flushed from memory in batches
+class ApiKeyUsage(db.Model):
+    __tablename__ = 'api_key_usage'
+    __table_args__ = (
+        db.UniqueConstraint('api_key_id', 'day', name='unique_api_key_usage_day'),
+        {'extend_existing': True}
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    api_key_id = db.Column(db.Integer, db.ForeignKey('api_key.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    requests = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<ApiKeyUsage {self.api_key_id} {self.day}: {self.requests}>'
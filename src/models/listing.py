@@ -1,11 +1,30 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from decimal import Decimal
+from sqlalchemy import event, func
 from models.user import db
+from models.analytics import ListingEvent, EVENT_VIEW, EVENT_INQUIRY
+
+# Junction between listings and the normalized amenity vocabulary. The
+# (amenity_id, listing_id) index serves the AND-filter on /api/listings.
+listing_amenity = db.Table(
+    'listing_amenity',
+    db.Column('listing_id', db.Integer, db.ForeignKey('listing.id'), primary_key=True),
+    db.Column('amenity_id', db.Integer, db.ForeignKey('amenity.id'), primary_key=True),
+    db.Index('idx_listing_amenity_amenity_id', 'amenity_id', 'listing_id'),
+    extend_existing=True
+)
 
 class Listing(db.Model):
     __tablename__ = 'listing'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('idx_listing_status_effective_price', 'status', 'effective_price'),
+        db.Index('idx_listing_status_effective_sale_price', 'status', 'effective_sale_price'),
+        db.Index('idx_listing_status_effective_weekly_price', 'status', 'effective_weekly_price'),
+        db.Index('idx_listing_status_effective_nightly_price', 'status', 'effective_nightly_price'),
+        db.Index('idx_listing_user_status', 'user_id', 'status'),
+        {'extend_existing': True}
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
@@ -41,6 +60,14 @@ class Listing(db.Model):
     rental_price_nightly = db.Column(db.Numeric(10, 2), nullable=True)
     maintenance_fee = db.Column(db.Numeric(10, 2), nullable=True)
     
+    # Effective prices used for filtering and sorting (maintained on insert/update)
+    # Each is only set when the listing is offered in that mode, so price
+    # filters can be answered with a single indexed range scan.
+    effective_sale_price = db.Column(db.Numeric(10, 2), nullable=True)
+    effective_weekly_price = db.Column(db.Numeric(10, 2), nullable=True)
+    effective_nightly_price = db.Column(db.Numeric(10, 2), nullable=True)
+    effective_price = db.Column(db.Numeric(10, 2), nullable=True)  # Sale price, else weekly rental
+    
     # Availability
     available_dates = db.Column(db.Text, nullable=True)  # JSON string of available date ranges
     check_in_day = db.Column(db.String(20), nullable=True)  # e.g., "Saturday", "Sunday"
@@ -76,21 +103,45 @@ class Listing(db.Model):
     user = db.relationship('User', backref=db.backref('listings', lazy=True))
     photos = db.relationship('ListingPhoto', backref='listing', lazy=True, cascade='all, delete-orphan')
     favorites = db.relationship('Favorite', backref='listing', lazy=True, cascade='all, delete-orphan')
+    amenity_tags = db.relationship('Amenity', secondary=listing_amenity, lazy=True)
 
     def __repr__(self):
         return f'<Listing {self.title}>'
 
     def increment_view_count(self):
         """Increment the view count for this listing"""
-        self.view_count += 1
-        self.last_viewed = datetime.utcnow()
+        self._increment_counter(Listing.view_count, {Listing.last_viewed: datetime.utcnow()})
+        db.session.add(ListingEvent(listing_id=self.id, event_type=EVENT_VIEW))
         db.session.commit()
 
     def increment_inquiry_count(self):
         """Increment the inquiry count for this listing"""
-        self.inquiry_count += 1
+        self._increment_counter(Listing.inquiry_count)
+        db.session.add(ListingEvent(listing_id=self.id, event_type=EVENT_INQUIRY))
         db.session.commit()
 
+    def _increment_counter(self, column, extra=None):
+        # SQL-side increment that leaves updated_at alone: stats are not
+        # edits, and updated_at versions the cached listing detail
+        Listing.query.filter_by(id=self.id).update(
+            {column: func.coalesce(column, 0) + 1, Listing.updated_at: Listing.updated_at, **(extra or {})},
+            synchronize_session=False
+        )
+
+    def refresh_effective_prices(self):
+        """Recompute the indexed effective price columns from the listed prices"""
+        offers_sale = self.property_type in ['sale', 'both']
+        offers_rental = self.property_type in ['rental', 'both']
+        
+        self.effective_sale_price = _to_price(self.sale_price) if offers_sale else None
+        self.effective_weekly_price = _to_price(self.rental_price_weekly) if offers_rental else None
+        self.effective_nightly_price = _to_price(self.rental_price_nightly) if offers_rental else None
+        
+        if self.effective_sale_price is not None:
+            self.effective_price = self.effective_sale_price
+        else:
+            self.effective_price = self.effective_weekly_price
+
     def is_available_for_dates(self, start_date, end_date):
         """Check if listing is available for given date range"""
         # This would implement date availability logic
@@ -150,8 +201,8 @@ class Listing(db.Model):
             'view_count': self.view_count,
             'inquiry_count': self.inquiry_count,
             'favorite_count': self.favorite_count,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'last_viewed': self.last_viewed.isoformat() if self.last_viewed else None,
             'price_display': self.get_price_display(),
             'location_display': self.get_location_display()
@@ -162,9 +213,59 @@ class Listing(db.Model):
             
         return data
 
+    def to_summary_dict(self):
+        """Compact projection for cards and lists (favorites, grids)"""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'property_type': self.property_type,
+            'resort_name': self.resort_name,
+            'bedrooms': self.bedrooms,
+            'sleeps': self.sleeps,
+            'sale_price': float(self.sale_price) if self.sale_price else None,
+            'rental_price_weekly': float(self.rental_price_weekly) if self.rental_price_weekly else None,
+            'status': self.status,
+            'main_photo_url': self.main_photo_url,
+            'favorite_count': self.favorite_count,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'price_display': self.get_price_display(),
+            'location_display': self.get_location_display()
+        }
+
+
+def _to_price(value):
+    """Convert a submitted price to Decimal, treating blanks and zero as no price"""
+    if value in (None, ''):
+        return None
+    try:
+        price = Decimal(str(value))
+        return price if price > 0 else None
+    except ArithmeticError:
+        return None
+
+
+@event.listens_for(Listing, 'before_insert')
+@event.listens_for(Listing, 'before_update')
+def _listing_refresh_effective_prices(mapper, connection, target):
+    """Keep effective prices in sync whenever a listing is written"""
+    target.refresh_effective_prices()
+
+
+# Browse pages order by is_featured DESC, then price. One index per sort
+# direction lets SQLite read a page straight off the index, in order.
+for _price_column in (Listing.effective_price, Listing.effective_sale_price,
+                      Listing.effective_weekly_price, Listing.effective_nightly_price):
+    db.Index(f'idx_listing_status_featured_{_price_column.key}',
+             Listing.status, Listing.is_featured.desc(), _price_column)
+    db.Index(f'idx_listing_status_featured_{_price_column.key}_desc',
+             Listing.status, Listing.is_featured.desc(), _price_column.desc())
+
 
 class ListingPhoto(db.Model):
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('idx_listing_photo_listing_id', 'listing_id'),  # Same name as the listings migration
+        {'extend_existing': True}
+    )
     id = db.Column(db.Integer, primary_key=True)
     listing_id = db.Column(db.Integer, db.ForeignKey('listing.id'), nullable=False)
     
@@ -204,6 +305,24 @@ class ListingPhoto(db.Model):
         }
 
 
+class Amenity(db.Model):
+    __table_args__ = {'extend_existing': True}
+    id = db.Column(db.Integer, primary_key=True)
+    slug = db.Column(db.String(100), unique=True, nullable=False, index=True)  # e.g. 'pool', 'wifi'
+    name = db.Column(db.String(100), nullable=False)  # Display name as first entered
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Amenity {self.slug}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'slug': self.slug,
+            'name': self.name
+        }
+
+
 class Favorite(db.Model):
     __table_args__ = {'extend_existing': True}
     id = db.Column(db.Integer, primary_key=True)
@@ -213,12 +332,17 @@ class Favorite(db.Model):
     # Favorite Properties
     notes = db.Column(db.Text, nullable=True)  # User's private notes about this listing
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     user = db.relationship('User', backref=db.backref('favorites', lazy=True))
     
-    # Unique constraint to prevent duplicate favorites
-    __table_args__ = (db.UniqueConstraint('user_id', 'listing_id', name='unique_user_listing_favorite'),)
+    # Unique constraint to prevent duplicate favorites; the listing index serves
+    # per-listing counts such as counter reconciliation
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'listing_id', name='unique_user_listing_favorite'),
+        db.Index('idx_favorite_listing_id', 'listing_id'),
+    )
 
     def __repr__(self):
         return f'<Favorite User:{self.user_id} Listing:{self.listing_id}>'
@@ -230,6 +354,6 @@ class Favorite(db.Model):
             'listing_id': self.listing_id,
             'notes': self.notes,
             'created_at': self.created_at.isoformat(),
-            'listing': self.listing.to_dict() if self.listing else None
+            'listing': self.listing.to_summary_dict() if self.listing else None
         }
 
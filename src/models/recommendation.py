@@ -0,0 +1,44 @@
+from datetime import datetime
+from models.user import db
+
+# Log of favorites added (+1) and removed (-1), consumed and pruned by the
+# co-occurrence job in utils/recommendations.py
+class FavoriteChange(db.Model):
+    __tablename__ = 'favorite_change'
+    __table_args__ = (
+        db.Index('idx_favorite_change_user_id', 'user_id', 'id'),
+        {'extend_existing': True}
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    listing_id = db.Column(db.Integer, nullable=False)  # No FK so changes outlive deleted listings
+    delta = db.Column(db.SmallInteger, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<FavoriteChange {self.delta:+d} User:{self.user_id} Listing:{self.listing_id}>'
+
+
+# Sparse co-occurrence matrix: how many users favorited both listings.
+# Stored in both directions so each listing's row is one index range.
+class ListingCooccurrence(db.Model):
+    __tablename__ = 'listing_cooccurrence'
+    __table_args__ = {'extend_existing': True}
+    listing_id = db.Column(db.Integer, primary_key=True)
+    other_id = db.Column(db.Integer, primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<ListingCooccurrence {self.listing_id}:{self.other_id} {self.count}>'
+
+
+# Top-N most co-favorited active listings per listing, by cosine score
+class ListingNeighbor(db.Model):
+    __tablename__ = 'listing_neighbor'
+    __table_args__ = {'extend_existing': True}
+    listing_id = db.Column(db.Integer, primary_key=True)
+    neighbor_id = db.Column(db.Integer, primary_key=True)
+    score = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f'<ListingNeighbor {self.listing_id}:{self.neighbor_id} {self.score:.3f}>'
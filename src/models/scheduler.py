@@ -0,0 +1,13 @@
+from datetime import datetime
+from models.user import db
+
+# When each leader-only scheduled job last ran, so schedules survive restarts
+class ScheduledJobState(db.Model):
+    __tablename__ = 'scheduled_job_state'
+    __table_args__ = {'extend_existing': True}
+    name = db.Column(db.String(50), primary_key=True)
+    last_run_at = db.Column(db.DateTime, nullable=False)  # UTC start of the last run
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ScheduledJobState {self.name}:{self.last_run_at}>'
@@ -1,6 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.passwords import hash_password, verify_password, needs_rehash
 
 db = SQLAlchemy()
 
@@ -20,6 +20,9 @@ class User(db.Model):
     email_verified = db.Column(db.Boolean, default=False)
     account_type = db.Column(db.String(20), default='subscriber')  # 'subscriber', 'browser'
     
+    # Denormalized count of this user's active listings, checked against plan limits
+    active_listing_count = db.Column(db.Integer, default=0)
+    
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -34,11 +37,19 @@ class User(db.Model):
 
     def set_password(self, password):
         """Set password hash"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         """Check password against hash"""
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
+
+    def check_password_and_rehash(self, password):
+        """Check password and upgrade the hash if hashing settings changed (caller commits)"""
+        if not self.check_password(password):
+            return False
+        if needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
 
     def has_active_membership(self):
         """Check if user has an active membership"""
@@ -49,8 +60,8 @@ class User(db.Model):
         ).first()
         return active_membership and active_membership.is_active()
 
-    def to_dict(self):
-        return {
+    def to_dict(self, include_membership=True):
+        data = {
             'id': self.id,
             'username': self.username,
             'email': self.email,
@@ -62,6 +73,10 @@ class User(db.Model):
             'account_type': self.account_type,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
-            'last_login': self.last_login.isoformat() if self.last_login else None,
-            'has_active_membership': self.has_active_membership()
+            'last_login': self.last_login.isoformat() if self.last_login else None
         }
+        
+        if include_membership:
+            data['has_active_membership'] = self.has_active_membership()
+            
+        return data
@@ -0,0 +1,46 @@
+from datetime import datetime
+from models.user import db
+
+# Price percentiles of comparable listings for one group, e.g. all 2-bedroom
+# Gold weeks at one resort; rebuilt by the valuation job in utils/valuation.py
+class PriceBenchmark(db.Model):
+    __tablename__ = 'price_benchmark'
+    __table_args__ = {'extend_existing': True}
+    id = db.Column(db.Integer, primary_key=True)
+    group_key = db.Column(db.String(300), unique=True, nullable=False)  # scope|resort|season|bedrooms
+    scope = db.Column(db.String(30), nullable=False)  # e.g. 'resort_season_bedrooms', 'resort'
+    resort_key = db.Column(db.String(200), nullable=True)  # Normalized resort name
+    season = db.Column(db.String(20), nullable=True)
+    bedrooms = db.Column(db.Integer, nullable=True)  # 4 means 4 or more
+
+    sale_count = db.Column(db.Integer, default=0, nullable=False)
+    sale_p25 = db.Column(db.Numeric(10, 2), nullable=True)
+    sale_median = db.Column(db.Numeric(10, 2), nullable=True)
+    sale_p75 = db.Column(db.Numeric(10, 2), nullable=True)
+
+    rental_count = db.Column(db.Integer, default=0, nullable=False)
+    rental_p25 = db.Column(db.Numeric(10, 2), nullable=True)
+    rental_median = db.Column(db.Numeric(10, 2), nullable=True)
+    rental_p75 = db.Column(db.Numeric(10, 2), nullable=True)
+
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<PriceBenchmark {self.group_key}>'
+
+    def to_dict(self):
+        return {
+            'scope': self.scope,
+            'sale': {
+                'count': self.sale_count,
+                'p25': float(self.sale_p25) if self.sale_p25 is not None else None,
+                'median': float(self.sale_median) if self.sale_median is not None else None,
+                'p75': float(self.sale_p75) if self.sale_p75 is not None else None
+            },
+            'rental_weekly': {
+                'count': self.rental_count,
+                'p25': float(self.rental_p25) if self.rental_p25 is not None else None,
+                'median': float(self.rental_median) if self.rental_median is not None else None,
+                'p75': float(self.rental_p75) if self.rental_p75 is not None else None
+            }
+        }
@@ -1,29 +1,94 @@
 from flask import Blueprint, jsonify, request, session
 from models.listing import Listing, db
 from models.user import User
+from models.membership import Membership
 from datetime import datetime, timedelta
 from sqlalchemy import func, and_
+from models.analytics import ListingStatBucket, EVENT_VIEW, EVENT_INQUIRY
+from utils.analytics import record_listing_event, get_listing_series, get_platform_stats_snapshot
+from utils.counters import adjust_listing_counter
+from utils.plan_limits import get_plan_name, get_max_listings
+from utils.rate_limit import rate_limit
 
 analytics_bp = Blueprint('analytics', __name__)
 
 @analytics_bp.route('/api/analytics/dashboard', methods=['GET'])
 def get_dashboard_analytics():
-    """Get analytics data for user dashboard"""
+    """Get analytics, listings and membership status for the owner dashboard"""
     try:
-        # For demo purposes, return mock data without authentication
-        # In production, you'd check session.get('user_id')
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'Not authenticated'}), 401
+        
+        days = min(request.args.get('days', 30, type=int), 365)
+        since = datetime.utcnow() - timedelta(days=days)
+        
+        # 1. All of the owner's listings
+        listings = Listing.query.filter_by(user_id=user_id).order_by(
+            Listing.created_at.desc()
+        ).all()
+        
+        # 2. Recent views/inquiries per listing from the daily buckets
+        recent_rows = db.session.query(
+            ListingStatBucket.listing_id,
+            func.sum(ListingStatBucket.views),
+            func.sum(ListingStatBucket.inquiries)
+        ).join(
+            Listing, Listing.id == ListingStatBucket.listing_id
+        ).filter(
+            Listing.user_id == user_id,
+            ListingStatBucket.granularity == 'day',
+            ListingStatBucket.bucket_start >= since
+        ).group_by(ListingStatBucket.listing_id).all()
+        recent = {
+            listing_id: (views or 0, inquiries or 0)
+            for listing_id, views, inquiries in recent_rows
+        }
+        
+        # 3. Most recent active membership
+        membership = Membership.query.filter_by(
+            user_id=user_id,
+            status='active'
+        ).order_by(Membership.created_at.desc()).first()
+        
+        listings_data = []
+        for listing in listings:
+            recent_views, recent_inquiries = recent.get(listing.id, (0, 0))
+            listing_data = listing.to_dict()
+            listing_data['views'] = listing.view_count or 0
+            listing_data['inquiries'] = listing.inquiry_count or 0
+            listing_data['recent_views'] = recent_views
+            listing_data['recent_inquiries'] = recent_inquiries
+            listings_data.append(listing_data)
+        
+        total_views = sum(listing['views'] for listing in listings_data)
+        total_inquiries = sum(listing['inquiries'] for listing in listings_data)
+        
+        membership_data = None
+        if membership:
+            membership_data = {
+                'membership_type': membership.membership_type,
+                'plan_name': get_plan_name(membership.membership_type),
+                'max_listings': get_max_listings(membership.membership_type),
+                'status': membership.status,
+                'is_active': membership.is_active(),
+                'end_date': membership.end_date.isoformat() if membership.end_date else None
+            }
         
         return jsonify({
             'success': True,
             'data': {
-                'active_listings': 0,
-                'total_views': 0,
-                'total_inquiries': 0,
-                'recent_views': 0,
-                'recent_inquiries': 0,
-                'avg_views_per_listing': 0,
-                'inquiry_rate': 0,
-                'listings_data': []
+                'active_listings': sum(1 for listing in listings if listing.status == 'active'),
+                'total_listings': len(listings),
+                'total_views': total_views,
+                'total_inquiries': total_inquiries,
+                'recent_views': sum(views for views, _ in recent.values()),
+                'recent_inquiries': sum(inquiries for _, inquiries in recent.values()),
+                'recent_days': days,
+                'avg_views_per_listing': round(total_views / max(len(listings), 1), 1),
+                'inquiry_rate': round((total_inquiries / total_views) * 100, 2) if total_views > 0 else 0,
+                'listings_data': listings_data,
+                'membership': membership_data
             }
         })
         
@@ -43,25 +108,36 @@ def get_listing_analytics(listing_id):
             return jsonify({'error': 'Listing not found'}), 404
         
         # Calculate days since listing was created
-        days_active = (datetime.now() - listing.created_at).days if listing.created_at else 0
+        days_active = (datetime.utcnow() - listing.created_at).days if listing.created_at else 0
         
-        # Calculate performance metrics
-        views_per_day = (listing.views or 0) / max(days_active, 1)
-        inquiries_per_day = (listing.inquiries or 0) / max(days_active, 1)
+        # Calculate performance metrics from the lifetime counters
+        views_per_day = (listing.view_count or 0) / max(days_active, 1)
+        inquiries_per_day = (listing.inquiry_count or 0) / max(days_active, 1)
+        
+        # Time series from the rolled-up hourly/daily buckets
+        granularity = request.args.get('granularity', 'day')
+        if granularity not in ['hour', 'day']:
+            return jsonify({'error': 'Granularity must be hour or day'}), 400
+        default_days = 2 if granularity == 'hour' else 30
+        days = min(request.args.get('days', default_days, type=int), 365)
+        since = datetime.utcnow() - timedelta(days=days)
         
         return jsonify({
             'success': True,
             'data': {
                 'listing_id': listing.id,
                 'title': listing.title,
-                'views': listing.views or 0,
-                'inquiries': listing.inquiries or 0,
+                'views': listing.view_count or 0,
+                'inquiries': listing.inquiry_count or 0,
+                'favorites': listing.favorite_count or 0,
                 'days_active': days_active,
                 'views_per_day': round(views_per_day, 2),
                 'inquiries_per_day': round(inquiries_per_day, 2),
                 'status': listing.status,
                 'created_at': listing.created_at.isoformat() if listing.created_at else None,
-                'last_updated': listing.updated_at.isoformat() if listing.updated_at else None
+                'last_updated': listing.updated_at.isoformat() if listing.updated_at else None,
+                'granularity': granularity,
+                'series': get_listing_series(listing.id, granularity, since)
             }
         })
         
@@ -69,6 +145,7 @@ def get_listing_analytics(listing_id):
         return jsonify({'error': str(e)}), 500
 
 @analytics_bp.route('/api/analytics/track-view', methods=['POST'])
+@rate_limit('track')
 def track_listing_view():
     """Track a view for a listing"""
     try:
@@ -78,24 +155,23 @@ def track_listing_view():
         if not listing_id:
             return jsonify({'error': 'Listing ID required'}), 400
         
-        listing = Listing.query.get(listing_id)
-        if not listing:
+        # Atomic increment that leaves updated_at (the detail cache version) alone
+        views = adjust_listing_counter(listing_id, 'view_count', 1)
+        if views is None:
             return jsonify({'error': 'Listing not found'}), 404
         
-        # Increment view count
-        if listing.views is None:
-            listing.views = 1
-        else:
-            listing.views += 1
+        # Log the event for rollups
+        record_listing_event(listing_id, EVENT_VIEW)
         
         db.session.commit()
         
         return jsonify({
             'success': True,
-            'views': listing.views
+            'views': views
         })
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @analytics_bp.route('/api/analytics/track-inquiry', methods=['POST'])
@@ -108,59 +184,38 @@ def track_listing_inquiry():
         if not listing_id:
             return jsonify({'error': 'Listing ID required'}), 400
         
-        listing = Listing.query.get(listing_id)
-        if not listing:
+        # Atomic increment that leaves updated_at (the detail cache version) alone
+        inquiries = adjust_listing_counter(listing_id, 'inquiry_count', 1)
+        if inquiries is None:
             return jsonify({'error': 'Listing not found'}), 404
         
-        # Increment inquiry count
-        if listing.inquiries is None:
-            listing.inquiries = 1
-        else:
-            listing.inquiries += 1
+        # Log the event for rollups
+        record_listing_event(listing_id, EVENT_INQUIRY)
         
         db.session.commit()
         
         return jsonify({
             'success': True,
-            'inquiries': listing.inquiries
+            'inquiries': inquiries
         })
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @analytics_bp.route('/api/analytics/platform-stats', methods=['GET'])
 def get_platform_stats():
     """Get overall platform statistics (for admin use)"""
     try:
-        # Total counts
-        total_users = User.query.count()
-        total_listings = Listing.query.count()
-        active_listings = Listing.query.filter_by(status='active').count()
-        
-        # Recent activity (last 7 days)
-        seven_days_ago = datetime.now() - timedelta(days=7)
-        new_users = User.query.filter(User.created_at >= seven_days_ago).count()
-        new_listings = Listing.query.filter(Listing.created_at >= seven_days_ago).count()
-        
-        # Total views and inquiries
-        total_views = db.session.query(func.sum(Listing.views)).scalar() or 0
-        total_inquiries = db.session.query(func.sum(Listing.inquiries)).scalar() or 0
+        # Served from the snapshot maintained by the background refresh job
+        stats = get_platform_stats_snapshot()
         
         return jsonify({
             'success': True,
-            'data': {
-                'total_users': total_users,
-                'total_listings': total_listings,
-                'active_listings': active_listings,
-                'new_users_7_days': new_users,
-                'new_listings_7_days': new_listings,
-                'total_views': total_views,
-                'total_inquiries': total_inquiries,
-                'avg_views_per_listing': round(total_views / max(total_listings, 1), 1),
-                'platform_inquiry_rate': round((total_inquiries / max(total_views, 1)) * 100, 2) if total_views > 0 else 0
-            }
+            'data': stats.to_dict(),
+            'refreshed_at': stats.refreshed_at.isoformat(),
+            'age_seconds': round((datetime.utcnow() - stats.refreshed_at).total_seconds(), 1)
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-
@@ -1,8 +1,14 @@
 from flask import Blueprint, jsonify, request, session
 from models.user import User, db
+from utils.session_claims import issue_claims, current_claims, refresh_claims
+from utils.session_store import revoke_user_sessions, regenerate_session
+from utils.rate_limit import rate_limit
+from utils.passwords import PasswordHashBusy
+from utils.tokens import (
+    make_password_reset_token, verify_password_reset_token,
+    make_email_verification_token, verify_email_verification_token
+)
 from datetime import datetime
-import secrets
-import string
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -10,26 +16,26 @@ auth_bp = Blueprint('auth', __name__)
 def check_auth():
     """Check if user is authenticated"""
     try:
-        user_id = session.get('user_id')
-        if user_id:
-            user = User.query.get(user_id)
-            if user and user.is_active:
-                return jsonify({
-                    'authenticated': True,
-                    'user': {
-                        'id': user.id,
-                        'email': user.email,
-                        'username': user.username,
-                        'first_name': user.first_name,
-                        'last_name': user.last_name
-                    }
-                })
+        # Answered from the signed session claims, no user lookup
+        claims = current_claims()
+        if claims:
+            return jsonify({
+                'authenticated': True,
+                'user': {
+                    'id': claims['id'],
+                    'email': claims['email'],
+                    'username': claims['username'],
+                    'first_name': claims['first_name'],
+                    'last_name': claims['last_name']
+                }
+            })
         
         return jsonify({'authenticated': False})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/api/auth/login', methods=['POST'])
+@rate_limit('login')
 def login():
     """User login with session management"""
     try:
@@ -57,12 +63,14 @@ def login():
         
         if user:
             print(f"User active: {user.is_active}")
-            print(f"Password check: {user.check_password(password)}")
         
-        if user and user.check_password(password) and user.is_active:
-            session['user_id'] = user.id
+        # Verify the password before looking at is_active, so a deactivated
+        # account costs the same hash as any other and cannot be told apart
+        if user and user.check_password_and_rehash(password) and user.is_active:
             user.last_login = datetime.utcnow()
             db.session.commit()
+            regenerate_session()
+            issue_claims(user)
             
             return jsonify({
                 'success': True,
@@ -78,6 +86,8 @@ def login():
         else:
             return jsonify({'error': 'Invalid username or password'}), 401
             
+    except PasswordHashBusy:
+        raise  # handled app-wide as a 503
     except Exception as e:
         print(f"Login error: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -127,7 +137,8 @@ def register():
         db.session.commit()
         
         # Auto-login after registration
-        session['user_id'] = user.id
+        regenerate_session()
+        issue_claims(user, plan='free')
         
         return jsonify({
             'success': True,
@@ -141,6 +152,8 @@ def register():
             }
         })
         
+    except PasswordHashBusy:
+        raise  # handled app-wide as a 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -148,24 +161,21 @@ def register():
 def get_profile():
     """Get current user profile"""
     try:
-        user_id = session.get('user_id')
-        if not user_id:
+        # Answered from the signed session claims, no user lookup
+        claims = current_claims()
+        if not claims:
             return jsonify({'error': 'Not authenticated'}), 401
         
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
         return jsonify({
             'user': {
-                'id': user.id,
-                'email': user.email,
-                'username': user.username,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'phone': user.phone,
-                'created_at': user.created_at.isoformat() if user.created_at else None,
-                'last_login': user.last_login.isoformat() if user.last_login else None
+                'id': claims['id'],
+                'email': claims['email'],
+                'username': claims['username'],
+                'first_name': claims['first_name'],
+                'last_name': claims['last_name'],
+                'phone': claims['phone'],
+                'created_at': claims['created_at'],
+                'last_login': claims['last_login']
             }
         })
         
@@ -211,6 +221,9 @@ def update_profile():
         user.updated_at = datetime.utcnow()
         db.session.commit()
         
+        # Refresh claims on every device so they reflect the new profile
+        refresh_claims(user.id)
+        
         return jsonify({
             'success': True,
             'message': 'Profile updated successfully',
@@ -224,6 +237,8 @@ def update_profile():
             }
         })
         
+    except PasswordHashBusy:
+        raise  # handled app-wide as a 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -244,11 +259,8 @@ def forgot_password():
             # Don't reveal if email exists or not for security
             return jsonify({'success': True, 'message': 'If the email exists, a reset link has been sent'})
         
-        # Generate reset token
-        reset_token = ''.join(secrets.choice(string.ascii_letters + string.digits) for _ in range(32))
-        user.reset_token = reset_token
-        user.reset_token_expires = datetime.utcnow().replace(hour=datetime.utcnow().hour + 1)  # 1 hour expiry
-        db.session.commit()
+        # Signed 1 hour token; nothing is stored
+        reset_token = make_password_reset_token(user)
         
         # In a real application, you would send an email here
         # For now, we'll return the token for testing purposes
@@ -272,18 +284,21 @@ def reset_password():
         if not token or not new_password:
             return jsonify({'error': 'Token and new password are required'}), 400
         
-        user = User.query.filter_by(reset_token=token).first()
-        if not user or not user.reset_token_expires or user.reset_token_expires < datetime.utcnow():
+        user = verify_password_reset_token(token)
+        if not user:
             return jsonify({'error': 'Invalid or expired reset token'}), 400
         
-        # Update password and clear reset token
+        # Changing the hash invalidates this and any other outstanding reset token
         user.set_password(new_password)
-        user.reset_token = None
-        user.reset_token_expires = None
         db.session.commit()
         
+        # Sign out everywhere the old password was used
+        revoke_user_sessions(user.id)
+        
         return jsonify({'success': True, 'message': 'Password reset successfully'})
         
+    except PasswordHashBusy:
+        raise  # handled app-wide as a 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -312,8 +327,63 @@ def change_password():
         user.set_password(new_password)
         db.session.commit()
         
+        # Sign out other devices; this session is saved again with fresh claims
+        revoke_user_sessions(user.id)
+        regenerate_session()
+        issue_claims(user)
+        
         return jsonify({'success': True, 'message': 'Password changed successfully'})
         
+    except PasswordHashBusy:
+        raise  # handled app-wide as a 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@auth_bp.route('/api/auth/request-verification', methods=['POST'])
+def request_email_verification():
+    """Issue an email verification token for the authenticated user"""
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'Not authenticated'}), 401
+        
+        user = User.query.get(user_id)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        if user.email_verified:
+            return jsonify({'success': True, 'message': 'Email already verified'})
+        
+        # In a real application, you would email a link containing the token
+        return jsonify({
+            'success': True,
+            'message': 'Verification instructions sent to your email',
+            'verification_token': make_email_verification_token(user)  # Remove this in production
+        })
+        
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@auth_bp.route('/api/auth/verify-email', methods=['POST'])
+def verify_email():
+    """Mark an email as verified with a verification token"""
+    try:
+        data = request.get_json()
+        token = data.get('token')
+        
+        if not token:
+            return jsonify({'error': 'Token is required'}), 400
+        
+        user = verify_email_verification_token(token)
+        if not user:
+            return jsonify({'error': 'Invalid or expired verification token'}), 400
+        
+        user.email_verified = True
+        db.session.commit()
+        refresh_claims(user.id)
+        
+        return jsonify({'success': True, 'message': 'Email verified successfully'})
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
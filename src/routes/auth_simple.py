@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify, session
 from werkzeug.security import check_password_hash, generate_password_hash
 from models.user import User, db
+from utils.session_store import regenerate_session
+from utils.passwords import PasswordHashBusy
 from datetime import datetime
 
 auth_simple_bp = Blueprint('auth_simple', __name__)
@@ -46,7 +48,8 @@ def simple_login():
             print(f"Invalid password for user: {user.username}")
             return jsonify({'success': False, 'message': 'Invalid username or password'}), 401
         
-        # Create session
+        # Create session under a fresh id
+        regenerate_session()
         session['user_id'] = user.id
         session['username'] = user.username
         session['logged_in'] = True
@@ -65,6 +68,8 @@ def simple_login():
             }
         })
         
+    except PasswordHashBusy:
+        raise  # handled app-wide as a 503
     except Exception as e:
         print(f"Login error: {str(e)}")
         return jsonify({'success': False, 'message': f'Login failed: {str(e)}'}), 500
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify, session
 from models.user import User, db
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.session_claims import issue_claims, current_claims, refresh_claims
+from utils.session_store import revoke_user_sessions, regenerate_session
+from utils.rate_limit import rate_limit
+from utils.passwords import PasswordHashBusy
 import re
 
 browser_auth_bp = Blueprint('browser_auth', __name__)
@@ -52,30 +55,32 @@ def register_browser_account():
         user = User(
             username=username,
             email=email,
-            password_hash=generate_password_hash(password),
             first_name=first_name,
             last_name=last_name,
             account_type='browser'  # Browser account for favorites/watchlist
         )
+        user.set_password(password)
         
         db.session.add(user)
         db.session.commit()
         
         # Set session
-        session['user_id'] = user.id
-        session['username'] = user.username
-        session['account_type'] = user.account_type
+        regenerate_session()
+        issue_claims(user, plan='free')
         
         return jsonify({
             'message': 'Browser account created successfully',
             'user': user.to_dict()
         }), 201
         
+    except PasswordHashBusy:
+        raise  # handled app-wide as a 503
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @browser_auth_bp.route('/api/browser/login', methods=['POST'])
+@rate_limit('login')
 def login_browser_account():
     """Login to browser account"""
     try:
@@ -98,19 +103,23 @@ def login_browser_account():
             )
         ).first()
         
-        if not user or not check_password_hash(user.password_hash, password):
+        if not user or not user.check_password_and_rehash(password):
             return jsonify({'error': 'Invalid credentials'}), 401
         
+        # Persist any upgraded password hash
+        db.session.commit()
+        
         # Set session
-        session['user_id'] = user.id
-        session['username'] = user.username
-        session['account_type'] = user.account_type
+        regenerate_session()
+        issue_claims(user)
         
         return jsonify({
             'message': 'Login successful',
             'user': user.to_dict()
         })
         
+    except PasswordHashBusy:
+        raise  # handled app-wide as a 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -132,18 +141,38 @@ def get_browser_profile():
         if not user_id:
             return jsonify({'error': 'Authentication required'}), 401
         
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        # Answered from the signed session claims when they are the caller's;
+        # only other callers (or stale sessions) load the user
+        claims = current_claims()
+        if claims and str(claims['id']) == str(user_id):
+            profile_data = {
+                'id': claims['id'],
+                'username': claims['username'],
+                'email': claims['email'],
+                'first_name': claims['first_name'],
+                'last_name': claims['last_name'],
+                'phone': claims['phone'],
+                'is_active': claims['active'],
+                'email_verified': claims['email_verified'],
+                'account_type': claims['account_type'],
+                'created_at': claims['created_at'],
+                'updated_at': claims['updated_at'],
+                'last_login': claims['last_login'],
+                'has_active_membership': claims['plan'] != 'free'
+            }
+        else:
+            user = User.query.get(user_id)
+            if not user:
+                return jsonify({'error': 'User not found'}), 404
+            profile_data = user.to_dict()
         
         # Get user stats
         from models.listing import Favorite
         favorite_count = Favorite.query.filter_by(user_id=user_id).count()
         
-        profile_data = user.to_dict()
         profile_data['stats'] = {
             'favorite_count': favorite_count,
-            'account_type': user.account_type
+            'account_type': profile_data['account_type']
         }
         
         return jsonify(profile_data)
@@ -188,6 +217,9 @@ def update_browser_profile():
         
         db.session.commit()
         
+        # Refresh claims on every device so they reflect the new profile
+        refresh_claims(user.id)
+        
         return jsonify({
             'message': 'Profile updated successfully',
             'user': user.to_dict()
@@ -220,7 +252,7 @@ def change_browser_password():
             return jsonify({'error': 'Current and new passwords are required'}), 400
         
         # Verify current password
-        if not check_password_hash(user.password_hash, current_password):
+        if not user.check_password(current_password):
             return jsonify({'error': 'Current password is incorrect'}), 401
         
         # Validate new password
@@ -228,11 +260,19 @@ def change_browser_password():
             return jsonify({'error': 'New password must be at least 6 characters long'}), 400
         
         # Update password
-        user.password_hash = generate_password_hash(new_password)
+        user.set_password(new_password)
         db.session.commit()
         
+        # Sign out other devices; this session is saved again with fresh claims
+        revoke_user_sessions(user.id)
+        if session.get('user_id') == user.id:
+            regenerate_session()
+            issue_claims(user)
+        
         return jsonify({'message': 'Password changed successfully'})
         
+    except PasswordHashBusy:
+        raise  # handled app-wide as a 503
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
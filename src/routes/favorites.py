@@ -1,44 +1,83 @@
 from flask import Blueprint, request, jsonify, session
 from models.listing import Listing, Favorite, db
 from models.user import User
+from models.analytics import EVENT_FAVORITE
+from utils.analytics import record_listing_event
+from utils.counters import adjust_listing_counter
+from utils.recommendations import record_favorite_change, get_recommendations
+from utils.session_claims import get_claims
+from utils.http_cache import PRIVATE_CACHE_CONTROL, make_etag, is_not_modified, not_modified_response, set_validators
+from sqlalchemy import func
+from sqlalchemy.orm import contains_eager
 from datetime import datetime
 
 favorites_bp = Blueprint('favorites', __name__)
 
 @favorites_bp.route('/api/favorites', methods=['GET'])
 def get_user_favorites():
-    """Get all favorites for the current user"""
+    """Get a page of favorites for the current user, newest first"""
     try:
         # Get user ID from request headers or session
         user_id = request.headers.get('X-User-ID') or session.get('user_id')
         if not user_id:
             return jsonify({'error': 'Authentication required'}), 401
         
-        # Verify user exists
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        # Cursor is the last favorite ID from the previous page
+        cursor = request.args.get('cursor', type=int)
+        per_page = min(request.args.get('per_page', 24, type=int), 100)
         
-        # Get user's favorites with listing details
-        favorites = db.session.query(Favorite, Listing).join(
-            Listing, Favorite.listing_id == Listing.id
-        ).filter(
+        active_favorites = Favorite.query.join(Favorite.listing).filter(
             Favorite.user_id == user_id,
             Listing.status == 'active'  # Only show active listings
-        ).order_by(Favorite.created_at.desc()).all()
+        )
+        
+        # Version stamp from one aggregate over the user's favorites: any
+        # favorite added, removed or edited, or listing changed, moves it
+        total, newest_id, favorites_updated, listings_updated, favorite_counts = active_favorites.with_entities(
+            func.count(Favorite.id),
+            func.max(Favorite.id),
+            func.max(Favorite.updated_at),
+            func.max(Listing.updated_at),
+            func.sum(Listing.favorite_count)
+        ).one()
+        etag = make_etag(user_id, cursor, per_page, total, newest_id,
+                         favorites_updated, listings_updated, favorite_counts)
+        if is_not_modified(etag):
+            response = not_modified_response(etag)
+            response.headers['Cache-Control'] = PRIVATE_CACHE_CONTROL
+            return response
+        
+        # Get user's favorites with listing summaries in one query
+        query = active_favorites.options(contains_eager(Favorite.listing))
+        if cursor:
+            query = query.filter(Favorite.id < cursor)
+        
+        favorites = query.order_by(Favorite.id.desc()).limit(per_page + 1).all()
+        has_more = len(favorites) > per_page
+        favorites = favorites[:per_page]
         
         favorites_data = []
-        for favorite, listing in favorites:
-            listing_data = listing.to_dict()
+        for favorite in favorites:
+            listing_data = favorite.listing.to_summary_dict()
             listing_data['favorite_id'] = favorite.id
             listing_data['favorite_notes'] = favorite.notes
             listing_data['favorited_at'] = favorite.created_at.isoformat()
             favorites_data.append(listing_data)
         
-        return jsonify({
+        data = {
             'favorites': favorites_data,
-            'count': len(favorites_data)
-        })
+            'count': len(favorites_data),
+            'next_cursor': favorites[-1].id if has_more else None,
+            'has_more': has_more
+        }
+        
+        # Total only on the first page, where the favorites page shows it
+        if not cursor:
+            data['total'] = total
+        
+        response = jsonify(data)
+        response.headers['Cache-Control'] = PRIVATE_CACHE_CONTROL
+        return set_validators(response, etag)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -52,10 +91,12 @@ def add_favorite():
         if not user_id:
             return jsonify({'error': 'Authentication required'}), 401
         
-        # Verify user exists
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        # Verify user exists, unless the signed session claims already vouch for them
+        claims = get_claims()
+        if not claims or str(claims['id']) != str(user_id):
+            user = User.query.get(user_id)
+            if not user:
+                return jsonify({'error': 'User not found'}), 404
         
         # Get request data
         data = request.get_json()
@@ -88,15 +129,17 @@ def add_favorite():
         
         db.session.add(favorite)
         
-        # Update listing favorite count
-        listing.favorite_count = (listing.favorite_count or 0) + 1
+        # Update listing favorite count atomically in the same transaction
+        favorite_count = adjust_listing_counter(listing.id, 'favorite_count', 1)
+        record_listing_event(listing.id, EVENT_FAVORITE)
+        record_favorite_change(user_id, listing.id, 1)
         
         db.session.commit()
         
         return jsonify({
             'message': 'Listing added to favorites',
             'favorite_id': favorite.id,
-            'favorite_count': listing.favorite_count
+            'favorite_count': favorite_count
         }), 201
         
     except Exception as e:
@@ -121,18 +164,15 @@ def remove_favorite(favorite_id):
         if not favorite:
             return jsonify({'error': 'Favorite not found'}), 404
         
-        # Get listing to update favorite count
-        listing = Listing.query.get(favorite.listing_id)
-        if listing:
-            listing.favorite_count = max((listing.favorite_count or 1) - 1, 0)
-        
-        # Delete favorite
+        # Delete favorite and update listing favorite count atomically
         db.session.delete(favorite)
+        favorite_count = adjust_listing_counter(favorite.listing_id, 'favorite_count', -1)
+        record_favorite_change(user_id, favorite.listing_id, -1)
         db.session.commit()
         
         return jsonify({
             'message': 'Listing removed from favorites',
-            'favorite_count': listing.favorite_count if listing else 0
+            'favorite_count': favorite_count or 0
         })
         
     except Exception as e:
@@ -157,18 +197,15 @@ def remove_favorite_by_listing(listing_id):
         if not favorite:
             return jsonify({'error': 'Favorite not found'}), 404
         
-        # Get listing to update favorite count
-        listing = Listing.query.get(listing_id)
-        if listing:
-            listing.favorite_count = max((listing.favorite_count or 1) - 1, 0)
-        
-        # Delete favorite
+        # Delete favorite and update listing favorite count atomically
         db.session.delete(favorite)
+        favorite_count = adjust_listing_counter(favorite.listing_id, 'favorite_count', -1)
+        record_favorite_change(user_id, favorite.listing_id, -1)
         db.session.commit()
         
         return jsonify({
             'message': 'Listing removed from favorites',
-            'favorite_count': listing.favorite_count if listing else 0
+            'favorite_count': favorite_count or 0
         })
         
     except Exception as e:
@@ -240,3 +277,85 @@ def check_favorite_status(listing_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+
+@favorites_bp.route('/api/favorites/status', methods=['GET'])
+def check_favorites_status():
+    """Check which of many listings are favorited by the current user"""
+    try:
+        # Comma separated listing IDs, e.g. ?listing_ids=1,2,3 (max 100)
+        try:
+            listing_ids = [
+                int(listing_id) for listing_id in request.args.get('listing_ids', '').split(',')
+                if listing_id.strip()
+            ]
+        except ValueError:
+            return jsonify({'error': 'listing_ids must be comma separated integers'}), 400
+        
+        if len(listing_ids) > 100:
+            return jsonify({'error': 'At most 100 listing IDs per request'}), 400
+        
+        statuses = {str(listing_id): None for listing_id in listing_ids}
+        
+        # Get user ID from request headers or session
+        user_id = request.headers.get('X-User-ID') or session.get('user_id')
+        if user_id and listing_ids:
+            # Single lookup on the (user_id, listing_id) unique index
+            favorites = db.session.query(Favorite.listing_id, Favorite.id).filter(
+                Favorite.user_id == user_id,
+                Favorite.listing_id.in_(listing_ids)
+            ).all()
+            for listing_id, favorite_id in favorites:
+                statuses[str(listing_id)] = favorite_id
+        
+        return jsonify({
+            'favorites': statuses,
+            'favorited_ids': [int(listing_id) for listing_id, favorite_id in statuses.items() if favorite_id]
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@favorites_bp.route('/api/recommendations', methods=['GET'])
+def get_user_recommendations():
+    """Recommend listings favorited by users with similar favorites"""
+    try:
+        # Get user ID from request headers or session
+        user_id = request.headers.get('X-User-ID') or session.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'Authentication required'}), 401
+        
+        try:
+            user_id = int(user_id)
+        except ValueError:
+            return jsonify({'error': 'Invalid user ID'}), 400
+        
+        limit = max(1, min(request.args.get('limit', 12, type=int), 50))
+        rows = get_recommendations(user_id, limit)
+        
+        # Version the list from what the cards show: ids, edits, favorite
+        # counts (which leave updated_at alone) and scores
+        etag = make_etag(user_id, limit, *(
+            f'{listing.id}:{listing.updated_at}:{listing.favorite_count}:{round(score, 3)}'
+            for listing, score in rows
+        ))
+        if is_not_modified(etag):
+            response = not_modified_response(etag)
+            response.headers['Cache-Control'] = PRIVATE_CACHE_CONTROL
+            return response
+        
+        recommendations = []
+        for listing, score in rows:
+            listing_data = listing.to_summary_dict()
+            listing_data['score'] = round(score, 3)
+            recommendations.append(listing_data)
+        
+        response = jsonify({
+            'recommendations': recommendations,
+            'count': len(recommendations)
+        })
+        response.headers['Cache-Control'] = PRIVATE_CACHE_CONTROL
+        return set_validators(response, etag)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,10 +1,12 @@
 from flask import Blueprint, request, jsonify, session
 from models.listing import Listing, db
 from models.user import User
+from utils.rate_limit import rate_limit
 
 inquiry_bp = Blueprint('inquiry', __name__)
 
 @inquiry_bp.route('/api/listings/<int:listing_id>/inquiry', methods=['POST'])
+@rate_limit('inquiry')
 def track_inquiry(listing_id):
     """Track an inquiry for a listing"""
     try:
@@ -22,8 +24,7 @@ def track_inquiry(listing_id):
         listing = Listing.query.get_or_404(listing_id)
         
         # Increment inquiry count
-        listing.inquiry_count = (listing.inquiry_count or 0) + 1
-        db.session.commit()
+        listing.increment_inquiry_count()
         
         return jsonify({
             'message': 'Inquiry tracked successfully',
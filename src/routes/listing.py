@@ -1,12 +1,39 @@
-from flask import Blueprint, request, jsonify, session
-from models.listing import Listing, ListingPhoto, Favorite, db
+from flask import Blueprint, request, jsonify, session, Response, stream_with_context
+from models.listing import Listing, ListingPhoto, Favorite, Amenity, db
 from models.user import User
 from models.membership import Membership
+from utils.amenities import set_listing_amenities
+from utils.listing_filters import filter_active_listings
+from utils.http_cache import (
+    make_etag, is_not_modified, set_validators, not_modified_response, set_surrogate_keys,
+    PUBLIC_CACHE_CONTROL, PRIVATE_CACHE_CONTROL
+)
+from utils.listing_export import export_listings, FORMATS as LISTING_EXPORT_FORMATS
+from utils.listing_import import import_listings, FORMATS as LISTING_IMPORT_FORMATS
+from utils.plan_limits import has_bulk_tools, get_max_listings, validate_listing_limit
+from utils.counters import reserve_listing_slot, release_listing_slot, get_active_listing_count
+from utils.rate_limit import rate_limit
+from utils.similar_listings import find_similar_listings
+from utils.valuation import suggest_price
+from sqlalchemy import func
 from datetime import datetime
 import json
 
 listing_bp = Blueprint('listing', __name__)
 
+def _take_listing_slot(user_id):
+    """Count one more active listing for an owner; returns an error message if the plan is full"""
+    membership = Membership.query.filter_by(
+        user_id=user_id,
+        status='active'
+    ).order_by(Membership.created_at.desc()).first()
+    membership_type = membership.membership_type if membership and membership.is_active() else None
+    
+    if reserve_listing_slot(user_id, get_max_listings(membership_type)):
+        return None
+    _, error = validate_listing_limit(membership_type, get_active_listing_count(user_id))
+    return error or 'Listing limit reached for your plan'
+
 @listing_bp.route('/api/listings', methods=['GET'])
 def get_listings():
     """Get all active listings with optional filtering"""
@@ -14,55 +41,24 @@ def get_listings():
         # Get query parameters
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 20, type=int), 100)
-        property_type = request.args.get('property_type')
-        city = request.args.get('city')
-        state = request.args.get('state')
-        country = request.args.get('country')
-        min_price = request.args.get('min_price', type=float)
-        max_price = request.args.get('max_price', type=float)
-        bedrooms = request.args.get('bedrooms', type=int)
         sort_by = request.args.get('sort_by', 'created_at')
         sort_order = request.args.get('sort_order', 'desc')
         
-        # Build query
-        query = Listing.query.filter_by(status='active')
-        
-        # Apply filters
-        if property_type:
-            query = query.filter(Listing.property_type.in_([property_type, 'both']))
-        if city:
-            query = query.filter(Listing.city.ilike(f'%{city}%'))
-        if state:
-            query = query.filter(Listing.state.ilike(f'%{state}%'))
-        if country:
-            query = query.filter(Listing.country.ilike(f'%{country}%'))
-        if bedrooms:
-            query = query.filter(Listing.bedrooms >= bedrooms)
-        if min_price:
-            query = query.filter(
-                db.or_(
-                    Listing.sale_price >= min_price,
-                    Listing.rental_price_weekly >= min_price
-                )
-            )
-        if max_price:
-            query = query.filter(
-                db.or_(
-                    Listing.sale_price <= max_price,
-                    Listing.rental_price_weekly <= max_price
-                )
-            )
+        query, price_column = filter_active_listings(request.args)
         
         # Apply sorting
         order_clauses = []
         
         if sort_by == 'price':
+            # Plain ASC/DESC so the (status, is_featured, price) index supplies
+            # the order. In a specific price mode, listings without that price
+            # (e.g. rental-only when sorting by sale price) are left out
+            if price_column is not Listing.effective_price:
+                query = query.filter(price_column.isnot(None))
             if sort_order == 'desc':
-                order_clauses.extend([Listing.sale_price.desc().nullslast(), 
-                                     Listing.rental_price_weekly.desc().nullslast()])
+                order_clauses.append(price_column.desc())
             else:
-                order_clauses.extend([Listing.sale_price.asc().nullsfirst(), 
-                                     Listing.rental_price_weekly.asc().nullsfirst()])
+                order_clauses.append(price_column.asc())
         elif sort_by == 'created_at':
             if sort_order == 'desc':
                 order_clauses.append(Listing.created_at.desc())
@@ -99,26 +95,138 @@ def get_listings():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@listing_bp.route('/api/listings/export', methods=['GET'])
+@rate_limit('export', key='api_key')
+def export_listings_stream():
+    """Stream all active listings matching the listing filters as NDJSON or CSV"""
+    try:
+        fmt = request.args.get('format', 'ndjson')
+        if fmt not in LISTING_EXPORT_FORMATS:
+            return jsonify({'error': f'Unsupported format: {fmt}'}), 400
+        
+        query, _ = filter_active_listings(request.args)
+        
+        return Response(
+            stream_with_context(export_listings(query, fmt)),
+            mimetype=LISTING_EXPORT_FORMATS[fmt],
+            headers={'Content-Disposition': f'attachment; filename=listings.{fmt}'}
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @listing_bp.route('/api/listings/<int:listing_id>', methods=['GET'])
 def get_listing(listing_id):
-    """Get a specific listing by ID"""
+    """Get a specific listing by ID, revalidated with ETag/Last-Modified"""
     try:
-        listing = Listing.query.get_or_404(listing_id)
+        # Version stamp first: listing updated_at, the owner's public name
+        # and a photo fingerprint. Views are counted by the page's
+        # track-view beacon, so this GET does not write and a matching
+        # validator is a 304.
+        photos = db.session.query(
+            func.count(ListingPhoto.id),
+            func.max(ListingPhoto.id),
+            func.max(ListingPhoto.created_at),
+            func.coalesce(func.sum(ListingPhoto.sort_order * 2 + ListingPhoto.is_main), 0)
+        ).filter(ListingPhoto.listing_id == listing_id).one()
+        version = db.session.query(
+            Listing.status, Listing.user_id, Listing.updated_at, Listing.created_at, User.first_name, User.username
+        ).join(User, User.id == Listing.user_id).filter(Listing.id == listing_id).first()
+        if not version:
+            return jsonify({'error': 'Listing not found'}), 404
+        
+        status, owner_id, listing_updated_at, listing_created_at, owner_first_name, owner_username = version
+        owner_name = owner_first_name or owner_username
+        
+        # Only show inactive listings to their owner, and never cache them
+        is_public = status == 'active'
+        if not is_public:
+            user_id = request.headers.get('X-User-ID') or session.get('user_id')
+            if not user_id or int(user_id) != owner_id:
+                return jsonify({'error': 'Listing not found'}), 404
+        
+        etag = make_etag(listing_id, listing_updated_at, owner_name, *photos)
+        # Rows without updated_at fall back to created_at; with no timestamp at
+        # all only the ETag is sent
+        last_modified = max(filter(None, [listing_updated_at or listing_created_at, photos[2]]), default=None)
+        cache_control = PUBLIC_CACHE_CONTROL if is_public else PRIVATE_CACHE_CONTROL
+        
+        if is_not_modified(etag, last_modified):
+            response = not_modified_response(etag, last_modified)
+        else:
+            listing = Listing.query.get(listing_id)
+            
+            # Get listing with the owner's public details only; this body is shared-cached
+            listing_data = listing.to_dict()
+            listing_data['user'] = {'id': owner_id, 'display_name': owner_name}
+            
+            # Get photos
+            photo_rows = ListingPhoto.query.filter_by(listing_id=listing_id).order_by(
+                ListingPhoto.is_main.desc(), 
+                ListingPhoto.sort_order.asc()
+            ).all()
+            listing_data['photos'] = [photo.to_dict() for photo in photo_rows]
+            
+            response = set_validators(jsonify(listing_data), etag, last_modified)
+        
+        response.headers['Cache-Control'] = cache_control
+        return set_surrogate_keys(response, f'listing-{listing_id}', f'user-{owner_id}')
         
-        # Increment view count
-        listing.increment_view_count()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@listing_bp.route('/api/listings/<int:listing_id>/similar', methods=['GET'])
+def get_similar_listings(listing_id):
+    """Get the active listings most like this one, best match first"""
+    try:
+        limit = max(1, min(request.args.get('limit', 6, type=int), 24))
         
-        # Get listing with user info
-        listing_data = listing.to_dict(include_user=True)
+        # Ask for a few spares in case a match was deleted since the last refresh
+        matches = find_similar_listings(listing_id, limit + 4)
+        if matches is None:
+            return jsonify({'error': 'Listing not found'}), 404
         
-        # Get photos
-        photos = ListingPhoto.query.filter_by(listing_id=listing_id).order_by(
-            ListingPhoto.is_main.desc(), 
-            ListingPhoto.sort_order.asc()
+        scores = dict(matches)
+        listings = Listing.query.filter(
+            Listing.id.in_(list(scores)),
+            Listing.status == 'active'
         ).all()
-        listing_data['photos'] = [photo.to_dict() for photo in photos]
+        listings.sort(key=lambda listing: scores[listing.id], reverse=True)
+        
+        similar = []
+        for listing in listings[:limit]:
+            listing_data = listing.to_summary_dict()
+            listing_data['similarity'] = round(scores[listing.id], 3)
+            similar.append(listing_data)
+        
+        response = jsonify({'listing_id': listing_id, 'similar': similar})
+        response.headers['Cache-Control'] = PUBLIC_CACHE_CONTROL
+        # Tagged with every listing shown, so editing any of them purges this page too
+        return set_surrogate_keys(
+            response, f'listing-{listing_id}', *(f"listing-{listing_data['id']}" for listing_data in similar)
+        )
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@listing_bp.route('/api/listings/suggested-price', methods=['GET'])
+def get_suggested_price():
+    """Suggest sale and weekly rental prices from comparable listings"""
+    try:
+        resort_name = request.args.get('resort_name', '').strip()
+        if not resort_name:
+            return jsonify({'error': 'resort_name is required'}), 400
+        
+        # Served from the worker's in-memory percentile tables
+        suggestion = suggest_price(
+            resort_name,
+            request.args.get('season'),
+            request.args.get('bedrooms', type=int)
+        )
         
-        return jsonify(listing_data)
+        response = jsonify(suggestion)
+        response.headers['Cache-Control'] = PUBLIC_CACHE_CONTROL
+        return response
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -127,10 +235,15 @@ def get_listing(listing_id):
 def create_listing():
     """Create a new listing (subscribers only)"""
     try:
-        # For demo purposes, use a default user ID
-        # In production, get from session or authentication
-        user_id = 1  # Default test user
+        # Get user ID from request headers or session
+        user_id = request.headers.get('X-User-ID') or session.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'Authentication required'}), 401
+        
         user = User.query.get(user_id)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        user_id = user.id
         
         # Get listing data from request
         data = request.get_json()
@@ -143,6 +256,12 @@ def create_listing():
             if not data.get(field):
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
+        # Enforce the plan's listing limit; the slot is committed with the listing
+        limit_error = _take_listing_slot(user_id)
+        if limit_error:
+            db.session.rollback()
+            return jsonify({'error': limit_error}), 403
+        
         # Create new listing
         listing = Listing(
             user_id=user_id,
@@ -170,12 +289,13 @@ def create_listing():
             maintenance_fee=data.get('maintenance_fee'),
             available_dates=data.get('available_dates'),
             check_in_day=data.get('check_in_day'),
-            amenities=json.dumps(data.get('amenities', [])) if data.get('amenities') else None,
             contact_method=data.get('contact_method', 'email'),
             contact_phone=data.get('contact_phone'),
-            contact_email=data.get('contact_email') or (user.email if user else 'test@example.com')
+            contact_email=data.get('contact_email') or user.email
         )
         
+        set_listing_amenities(listing, data.get('amenities'))
+        
         db.session.add(listing)
         db.session.commit()
         
@@ -188,6 +308,47 @@ def create_listing():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@listing_bp.route('/api/listings/import', methods=['POST'])
+def import_listings_bulk():
+    """Bulk import listings from a CSV or NDJSON request body (Unlimited plan)"""
+    try:
+        # Get user ID from request headers or session
+        user_id = request.headers.get('X-User-ID') or session.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'Authentication required'}), 401
+        
+        user = User.query.get(user_id)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        membership = Membership.query.filter_by(
+            user_id=user.id,
+            status='active'
+        ).order_by(Membership.created_at.desc()).first()
+        if not membership or not membership.is_active() or not has_bulk_tools(membership.membership_type):
+            return jsonify({'error': 'Bulk import requires the Unlimited plan'}), 403
+        
+        # Format from ?format= or the Content-Type of the body
+        fmt = request.args.get('format')
+        if not fmt:
+            content_type = request.mimetype or ''
+            fmt = 'csv' if content_type in ('text/csv', 'application/csv') else 'ndjson'
+        if fmt not in LISTING_IMPORT_FORMATS:
+            return jsonify({'error': f'Unsupported format: {fmt}'}), 400
+        
+        dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+        report = import_listings(user, request.stream, fmt, dry_run=dry_run)
+        
+        return jsonify({
+            'message': 'Import validated' if dry_run else 'Import completed',
+            'dry_run': dry_run,
+            **report
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @listing_bp.route('/api/listings/<int:listing_id>', methods=['PUT'])
 def update_listing(listing_id):
     """Update an existing listing (owner only)"""
@@ -209,6 +370,18 @@ def update_listing(listing_id):
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
+        # Keep the owner's active listing count in step with status changes
+        new_status = data.get('status', listing.status)
+        if new_status != listing.status:
+            if new_status == 'active':
+                limit_error = _take_listing_slot(listing.user_id)
+                if limit_error:
+                    db.session.rollback()
+                    return jsonify({'error': limit_error}), 403
+            else:
+                # Decided in SQL, not from the status loaded above
+                release_listing_slot(listing.id, listing.user_id, new_status)
+        
         # Update fields
         updatable_fields = [
             'title', 'description', 'property_type', 'resort_name', 'city', 'state', 
@@ -216,13 +389,13 @@ def update_listing(listing_id):
             'floor', 'view_type', 'ownership_type', 'week_number', 'season', 
             'usage_type', 'sale_price', 'rental_price_weekly', 'rental_price_nightly', 
             'maintenance_fee', 'available_dates', 'check_in_day', 'contact_method', 
-            'contact_phone', 'contact_email', 'status'
+            'contact_phone', 'contact_email', 'status', 'amenities'
         ]
         
         for field in updatable_fields:
             if field in data:
                 if field == 'amenities':
-                    setattr(listing, field, json.dumps(data[field]) if data[field] else None)
+                    set_listing_amenities(listing, data[field])
                 else:
                     setattr(listing, field, data[field])
         
@@ -254,6 +427,9 @@ def delete_listing(listing_id):
         if listing.user_id != int(user_id):
             return jsonify({'error': 'Not authorized to delete this listing'}), 403
         
+        # Give the slot back only if this request is the one taking it out of 'active'
+        release_listing_slot(listing.id, listing.user_id, 'deleted')
+        
         # Delete listing (cascade will handle photos and favorites)
         db.session.delete(listing)
         db.session.commit()
@@ -290,7 +466,21 @@ def get_user_listings(user_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@listing_bp.route('/api/amenities', methods=['GET'])
+def get_amenities():
+    """Get the amenity vocabulary for filtering listings"""
+    try:
+        amenities = Amenity.query.order_by(Amenity.name.asc()).all()
+        
+        return jsonify({
+            'amenities': [amenity.to_dict() for amenity in amenities]
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @listing_bp.route('/api/listings/search', methods=['GET'])
+@rate_limit('search')
 def search_listings():
     """Advanced search for listings"""
     try:
@@ -327,37 +517,8 @@ def search_listings():
         return jsonify({'error': str(e)}), 500
 
 
-@listing_bp.route('/api/listings/<int:listing_id>', methods=['GET'])
-def get_listing_detail(listing_id):
-    """Get detailed information for a specific listing"""
-    try:
-        # Get the listing
-        listing = Listing.query.get_or_404(listing_id)
-        
-        # Only show active listings to non-owners
-        user_id = request.headers.get('X-User-ID') or session.get('user_id')
-        if listing.status != 'active' and (not user_id or int(user_id) != listing.user_id):
-            return jsonify({'error': 'Listing not found'}), 404
-        
-        # Increment view count if not the owner
-        if not user_id or int(user_id) != listing.user_id:
-            listing.view_count = (listing.view_count or 0) + 1
-            listing.last_viewed = datetime.utcnow()
-            db.session.commit()
-        
-        # Return listing details
-        listing_data = listing.to_dict()
-        
-        # Add photos if available
-        photos = ListingPhoto.query.filter_by(listing_id=listing_id).all()
-        listing_data['photos'] = [photo.to_dict() for photo in photos]
-        
-        return jsonify(listing_data)
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
 @listing_bp.route('/api/listings/<int:listing_id>/inquiry', methods=['POST'])
+@rate_limit('inquiry')
 def track_inquiry(listing_id):
     """Track when someone inquires about a listing"""
     try:
@@ -365,8 +526,7 @@ def track_inquiry(listing_id):
         listing = Listing.query.get_or_404(listing_id)
         
         # Increment inquiry count
-        listing.inquiry_count = (listing.inquiry_count or 0) + 1
-        db.session.commit()
+        listing.increment_inquiry_count()
         
         return jsonify({'message': 'Inquiry tracked successfully'})
         
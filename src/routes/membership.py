@@ -2,6 +2,7 @@ from flask import Blueprint, jsonify, request
 from datetime import datetime, timedelta
 from models.membership import Membership, db
 from models.user import User
+from utils.session_claims import refresh_claims
 
 membership_bp = Blueprint('membership', __name__)
 
@@ -73,6 +74,7 @@ def create_membership():
     
     db.session.add(membership)
     db.session.commit()
+    refresh_claims(membership.user_id)
     return jsonify(membership.to_dict()), 201
 
 @membership_bp.route('/memberships/<int:membership_id>', methods=['GET'])
@@ -98,6 +100,7 @@ def update_membership(membership_id):
     
     membership.updated_at = datetime.utcnow()
     db.session.commit()
+    refresh_claims(membership.user_id)
     return jsonify(membership.to_dict())
 
 @membership_bp.route('/memberships/<int:membership_id>/cancel', methods=['POST'])
@@ -107,6 +110,7 @@ def cancel_membership(membership_id):
     membership.status = 'cancelled'
     membership.updated_at = datetime.utcnow()
     db.session.commit()
+    refresh_claims(membership.user_id)
     return jsonify(membership.to_dict())
 
 @membership_bp.route('/users/<int:user_id>/membership', methods=['GET'])
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, jsonify, session, redirect
 from models.user import User, db
 from models.membership import Membership
+from utils.session_claims import refresh_claims
 from datetime import datetime
 import stripe
 import os
@@ -141,6 +142,7 @@ def upgrade_success():
             
             db.session.add(new_membership)
             db.session.commit()
+            refresh_claims(user_id)
             
             return render_template('upgrade_success.html', 
                                  plan_type=plan_type,
@@ -216,6 +218,7 @@ def cancel_membership():
                 print(f"Stripe cancellation error: {e}")
         
         db.session.commit()
+        refresh_claims(user_id)
         
         return jsonify({
             'success': True,
@@ -3,6 +3,7 @@ import stripe
 import os
 import logging
 from models.user import User, db
+from utils.session_claims import refresh_claims
 from src.logging_config import log_payment_attempt, log_stripe_error, log_authentication_issue
 
 payment_bp = Blueprint('payment', __name__)
@@ -210,6 +211,7 @@ def payment_success():
                 membership.status = 'active'
                 
                 db.session.commit()
+                refresh_claims(user_id)
                 
                 flash(f'Successfully subscribed to {plan_type.title()} Plan!', 'success')
                 return render_template('payment_success.html', plan_type=plan_type)
@@ -0,0 +1,153 @@
+from flask import Blueprint, request, jsonify, session
+from models.listing import Listing, db
+from models.membership import Membership
+from models.api_key import ApiKey
+from utils.api_keys import create_api_key, forget_api_key, require_api_key
+from utils.http_cache import make_etag, is_not_modified, set_validators, not_modified_response, PRIVATE_CACHE_CONTROL
+from utils.listing_filters import filter_active_listings
+from utils.plan_limits import has_api_access
+from datetime import datetime
+
+public_api_bp = Blueprint('public_api', __name__)
+
+MAX_KEYS_PER_USER = 5
+
+# API key management (session authenticated only; X-User-ID is not trusted here)
+
+@public_api_bp.route('/api/keys', methods=['GET'])
+def list_api_keys():
+    """List the current user's API keys"""
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'Authentication required'}), 401
+
+        keys = ApiKey.query.filter_by(user_id=user_id).order_by(ApiKey.created_at.desc()).all()
+        return jsonify({'keys': [key.to_dict() for key in keys]})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@public_api_bp.route('/api/keys', methods=['POST'])
+def create_key():
+    """Create an API key (plans with API access only)"""
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'Authentication required'}), 401
+
+        membership = Membership.query.filter_by(
+            user_id=user_id,
+            status='active'
+        ).order_by(Membership.created_at.desc()).first()
+        if not membership or not membership.is_active() or not has_api_access(membership.membership_type):
+            return jsonify({'error': 'API access requires the Unlimited plan'}), 403
+
+        active_keys = ApiKey.query.filter_by(user_id=user_id, revoked_at=None).count()
+        if active_keys >= MAX_KEYS_PER_USER:
+            return jsonify({'error': f'You can have at most {MAX_KEYS_PER_USER} active API keys'}), 400
+
+        data = request.get_json(silent=True) or {}
+        name = (data.get('name') or 'API key').strip()[:100]
+
+        api_key, raw_key = create_api_key(user_id, name)
+        db.session.commit()
+
+        key_data = api_key.to_dict()
+        key_data['key'] = raw_key  # Shown once; only the hash is stored
+        return jsonify({
+            'message': 'API key created. Copy it now, it will not be shown again.',
+            'api_key': key_data
+        }), 201
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@public_api_bp.route('/api/keys/<int:key_id>', methods=['DELETE'])
+def revoke_key(key_id):
+    """Revoke one of the current user's API keys"""
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'Authentication required'}), 401
+
+        api_key = ApiKey.query.filter_by(id=key_id, user_id=user_id).first()
+        if not api_key:
+            return jsonify({'error': 'API key not found'}), 404
+
+        if api_key.revoked_at is None:
+            api_key.revoked_at = datetime.utcnow()
+            db.session.commit()
+        # Other workers drop it when their cache entry expires
+        forget_api_key(api_key.prefix)
+
+        return jsonify({'message': 'API key revoked'})
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+# Public read API (X-API-Key)
+
+@public_api_bp.route('/api/v1/listings', methods=['GET'])
+@require_api_key
+def api_list_listings():
+    """Page through active listings in id order with compact payloads"""
+    try:
+        after = request.args.get('after', 0, type=int)
+        limit = min(request.args.get('limit', 50, type=int), 100)
+
+        query, _ = filter_active_listings(request.args)
+
+        # Version the page from ids and timestamps only, so a revalidation
+        # that matches never loads the full rows
+        page = query.with_entities(Listing.id, Listing.updated_at).filter(
+            Listing.id > after
+        ).order_by(Listing.id).limit(limit + 1).all()
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        etag = make_etag(request.query_string.decode(), *(f'{row.id}:{row.updated_at}' for row in page))
+        last_modified = max((row.updated_at for row in page), default=None)
+        if is_not_modified(etag, last_modified):
+            return not_modified_response(etag, last_modified)
+
+        listings = Listing.query.filter(
+            Listing.id.in_([row.id for row in page])
+        ).order_by(Listing.id).all() if page else []
+
+        response = jsonify({
+            'listings': [listing.to_summary_dict() for listing in listings],
+            'next_after': page[-1].id if has_more else None,
+            'has_more': has_more
+        })
+        response.headers['Cache-Control'] = PRIVATE_CACHE_CONTROL
+        return set_validators(response, etag, last_modified)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@public_api_bp.route('/api/v1/listings/<int:listing_id>', methods=['GET'])
+@require_api_key
+def api_get_listing(listing_id):
+    """Get one active listing; API reads are not counted as views"""
+    try:
+        version = db.session.query(Listing.updated_at).filter(
+            Listing.id == listing_id,
+            Listing.status == 'active'
+        ).scalar()
+        if version is None:
+            return jsonify({'error': 'Listing not found'}), 404
+
+        etag = make_etag(listing_id, version)
+        if is_not_modified(etag, version):
+            return not_modified_response(etag, version)
+
+        listing = Listing.query.get(listing_id)
+        response = jsonify(listing.to_dict())
+        response.headers['Cache-Control'] = PRIVATE_CACHE_CONTROL
+        return set_validators(response, etag, version)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request, render_template
 from datetime import datetime
 from models.user import User, db
+from utils.session_claims import refresh_claims
 
 user_bp = Blueprint('user', __name__)
 
@@ -75,6 +76,7 @@ def update_user(user_id):
     
     user.updated_at = datetime.utcnow()
     db.session.commit()
+    refresh_claims(user.id)
     return jsonify(user.to_dict())
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
@@ -84,6 +86,7 @@ def delete_user(user_id):
     user.is_active = False
     user.updated_at = datetime.utcnow()
     db.session.commit()
+    refresh_claims(user.id)
     return '', 204
 
 @user_bp.route('/auth/login', methods=['POST'])
@@ -96,7 +99,7 @@ def login():
     
     user = User.query.filter_by(username=data['username']).first()
     
-    if not user or not user.check_password(data['password']):
+    if not user or not user.check_password_and_rehash(data['password']):
         return jsonify({'error': 'Invalid username or password'}), 401
     
     if not user.is_active:
@@ -1,6 +1,6 @@
 from flask import Blueprint, jsonify, session
-from models.user import User
 from models.membership import Membership
+from utils.session_claims import current_claims
 
 user_api_bp = Blueprint('user_api', __name__)
 
@@ -8,28 +8,22 @@ user_api_bp = Blueprint('user_api', __name__)
 def get_current_user():
     """Get current authenticated user information"""
     try:
-        if 'user_id' not in session:
+        # Answered from the signed session claims, no user or membership lookup
+        claims = current_claims()
+        if not claims:
             return jsonify({'error': 'Not authenticated'}), 401
         
-        user = User.query.get(session['user_id'])
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
-        # Get user's current membership
-        membership = Membership.query.filter_by(user_id=user.id).first()
-        subscription_plan = membership.plan_type if membership else 'free'
-        
         return jsonify({
-            'id': user.id,
-            'username': user.username,
-            'email': user.email,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'phone': user.phone,
-            'subscription_plan': subscription_plan,
-            'sms_consent': user.sms_consent if hasattr(user, 'sms_consent') else False,
-            'is_active': user.is_active,
-            'created_at': user.created_at.isoformat() if user.created_at else None
+            'id': claims['id'],
+            'username': claims['username'],
+            'email': claims['email'],
+            'first_name': claims['first_name'],
+            'last_name': claims['last_name'],
+            'phone': claims['phone'],
+            'subscription_plan': claims['plan'],
+            'sms_consent': claims['sms_consent'],
+            'is_active': claims['active'],
+            'created_at': claims['created_at']
         })
         
     except Exception as e:
@@ -0,0 +1,126 @@
+"""
+Amenity vocabulary helpers for SelfServe Timeshare listings
+"""
+
+import json
+import re
+
+from sqlalchemy import func, select
+
+from models.listing import Amenity, Listing, listing_amenity, db
+
+
+def amenity_slug(name):
+    """
+    Normalize an amenity name into its vocabulary slug
+
+    Args:
+        name (str): Amenity as entered by an owner (e.g., 'Wi-Fi', 'Hot Tub ')
+
+    Returns:
+        str: Lowercase slug (e.g., 'wifi', 'hot_tub'), or '' if nothing usable
+    """
+    words = re.sub(r'[^a-z0-9\s]', '', str(name).lower()).split()
+    return '_'.join(words)
+
+
+def parse_amenities(value):
+    """
+    Parse a stored or submitted amenities value into a list of names
+
+    Args:
+        value: JSON array string, Python list, or comma separated string
+
+    Returns:
+        list: Amenity names with blanks removed
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            value = value.split(',')
+    if not isinstance(value, (list, tuple)):
+        value = [value]
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+def get_or_create_amenities(names, cache=None):
+    """
+    Resolve amenity names to vocabulary rows, creating missing entries
+
+    Args:
+        names (list): Amenity names
+        cache (dict): Optional slug -> Amenity map reused across calls so
+            bulk callers only query slugs they have not seen yet
+
+    Returns:
+        list: Amenity rows, one per distinct slug, in input order
+    """
+    by_slug = {}
+    for name in names:
+        slug = amenity_slug(name)
+        if slug and slug not in by_slug:
+            by_slug[slug] = name.strip()
+
+    if not by_slug:
+        return []
+
+    existing = {} if cache is None else cache
+    missing = [slug for slug in by_slug if slug not in existing]
+    if missing:
+        existing.update({
+            amenity.slug: amenity
+            for amenity in Amenity.query.filter(Amenity.slug.in_(missing)).all()
+        })
+    amenities = []
+    for slug, name in by_slug.items():
+        amenity = existing.get(slug)
+        if not amenity:
+            amenity = Amenity(slug=slug, name=name)
+            db.session.add(amenity)
+            existing[slug] = amenity
+        amenities.append(amenity)
+    return amenities
+
+
+def set_listing_amenities(listing, value, cache=None):
+    """
+    Store amenities on a listing as JSON and sync the normalized index
+
+    The caller is responsible for committing the session.
+
+    Args:
+        listing (Listing): Listing to update
+        value: Amenities as accepted by parse_amenities
+        cache (dict): Optional slug -> Amenity map, see get_or_create_amenities
+    """
+    names = parse_amenities(value)
+    listing.amenities = json.dumps(names) if names else None
+    listing.amenity_tags = get_or_create_amenities(names, cache)
+
+
+def amenity_filter(slugs):
+    """
+    Build a clause matching listings that have ALL of the given amenities
+
+    Args:
+        slugs (list): Amenity names or slugs (e.g., ['pool', 'wifi'])
+
+    Returns:
+        ClauseElement or None: Filter for Listing.id, or None if no slugs given
+    """
+    slugs = {amenity_slug(slug) for slug in slugs} - {''}
+    if not slugs:
+        return None
+
+    matching = select(listing_amenity.c.listing_id).join(
+        Amenity, Amenity.id == listing_amenity.c.amenity_id
+    ).where(
+        Amenity.slug.in_(sorted(slugs))
+    ).group_by(
+        listing_amenity.c.listing_id
+    ).having(func.count() == len(slugs))
+
+    return Listing.id.in_(matching)
@@ -0,0 +1,215 @@
+"""
+Listing event log and time-series rollups for SelfServe Timeshare analytics
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, case
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models.user import User
+from models.listing import Listing
+from models.analytics import (
+    ListingEvent, ListingStatBucket, RollupState, PlatformStats, EVENT_COLUMNS, db
+)
+
+ROLLUP_NAME = 'listing_events'
+
+# SQLite strftime formats that truncate an event timestamp to its bucket
+BUCKET_FORMATS = {
+    'hour': '%Y-%m-%d %H:00:00',
+    'day': '%Y-%m-%d 00:00:00'
+}
+
+# Rows per INSERT ... ON CONFLICT statement, kept under SQLite's variable limit
+UPSERT_CHUNK_SIZE = 100
+
+
+def record_listing_event(listing_id, event_type):
+    """
+    Append a view, inquiry or favorite event for a listing
+
+    The event is added to the current session; the caller commits it
+    together with whatever else the request writes.
+
+    Args:
+        listing_id (int): Listing the event belongs to
+        event_type (int): EVENT_VIEW, EVENT_INQUIRY or EVENT_FAVORITE
+    """
+    db.session.add(ListingEvent(listing_id=listing_id, event_type=event_type))
+
+
+def _bucket_counts(first_id, last_id):
+    """
+    Aggregate events in an id range into per-bucket counts
+
+    Returns:
+        dict: (listing_id, granularity, bucket_start) -> {'views': n, ...}
+    """
+    counts = {}
+    for granularity, bucket_format in BUCKET_FORMATS.items():
+        bucket = func.strftime(bucket_format, ListingEvent.created_at)
+        rows = db.session.query(
+            ListingEvent.listing_id, bucket, ListingEvent.event_type, func.count()
+        ).filter(
+            ListingEvent.id > first_id,
+            ListingEvent.id <= last_id
+        ).group_by(
+            ListingEvent.listing_id, bucket, ListingEvent.event_type
+        ).all()
+
+        for listing_id, bucket_start, event_type, count in rows:
+            column = EVENT_COLUMNS.get(event_type)
+            if not column:
+                continue
+            key = (listing_id, granularity, datetime.strptime(bucket_start, '%Y-%m-%d %H:%M:%S'))
+            bucket_counts = counts.setdefault(key, {'views': 0, 'inquiries': 0, 'favorites': 0})
+            bucket_counts[column] += count
+    return counts
+
+
+def _upsert_buckets(counts):
+    """Add aggregated counts onto existing hourly/daily buckets"""
+    rows = [
+        {
+            'listing_id': listing_id,
+            'granularity': granularity,
+            'bucket_start': bucket_start,
+            **bucket_counts
+        }
+        for (listing_id, granularity, bucket_start), bucket_counts in counts.items()
+    ]
+
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = sqlite_insert(ListingStatBucket).values(rows[start:start + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['listing_id', 'granularity', 'bucket_start'],
+            set_={
+                'views': ListingStatBucket.views + stmt.excluded.views,
+                'inquiries': ListingStatBucket.inquiries + stmt.excluded.inquiries,
+                'favorites': ListingStatBucket.favorites + stmt.excluded.favorites
+            }
+        )
+        db.session.execute(stmt)
+
+
+def rollup_listing_events(batch_size=5000):
+    """
+    Fold new listing events into hourly and daily buckets
+
+    Events are processed in id order, one transaction per batch. The
+    high-water mark only advances if no other worker moved it first, so
+    concurrent runs never count an event twice.
+
+    Args:
+        batch_size (int): Maximum events aggregated per transaction
+
+    Returns:
+        int: Number of events rolled up
+    """
+    if not RollupState.query.get(ROLLUP_NAME):
+        db.session.add(RollupState(name=ROLLUP_NAME, last_event_id=0))
+        db.session.commit()
+
+    processed = 0
+    while True:
+        first_id = RollupState.query.get(ROLLUP_NAME).last_event_id
+        batch_ids = db.session.query(ListingEvent.id).filter(
+            ListingEvent.id > first_id
+        ).order_by(ListingEvent.id).limit(batch_size).subquery()
+        last_id, batch_count = db.session.query(
+            func.max(batch_ids.c.id), func.count(batch_ids.c.id)
+        ).one()
+        if not batch_count:
+            break
+
+        _upsert_buckets(_bucket_counts(first_id, last_id))
+
+        advanced = RollupState.query.filter_by(
+            name=ROLLUP_NAME, last_event_id=first_id
+        ).update({'last_event_id': last_id, 'updated_at': datetime.utcnow()})
+        if not advanced:
+            # Another worker rolled up this range already
+            db.session.rollback()
+            continue
+
+        db.session.commit()
+        processed += batch_count
+
+    return processed
+
+
+def get_listing_series(listing_id, granularity='day', since=None):
+    """
+    Get the rolled-up time series for a listing
+
+    Args:
+        listing_id (int): Listing ID
+        granularity (str): 'hour' or 'day'
+        since (datetime): Only include buckets starting at or after this time
+
+    Returns:
+        list: Bucket dictionaries ordered by bucket_start
+    """
+    query = ListingStatBucket.query.filter_by(
+        listing_id=listing_id,
+        granularity=granularity
+    )
+    if since:
+        query = query.filter(ListingStatBucket.bucket_start >= since)
+
+    buckets = query.order_by(ListingStatBucket.bucket_start.asc()).all()
+    return [bucket.to_dict() for bucket in buckets]
+
+
+def refresh_platform_stats():
+    """
+    Recompute the platform statistics snapshot
+
+    Uses one aggregate pass over user and one over listing instead of a
+    separate COUNT/SUM query per figure.
+
+    Returns:
+        PlatformStats: The refreshed snapshot row
+    """
+    started = time.perf_counter()
+    seven_days_ago = datetime.utcnow() - timedelta(days=7)
+
+    total_users, new_users = db.session.query(
+        func.count(User.id),
+        func.sum(case((User.created_at >= seven_days_ago, 1), else_=0))
+    ).one()
+
+    total_listings, active_listings, new_listings, total_views, total_inquiries = db.session.query(
+        func.count(Listing.id),
+        func.sum(case((Listing.status == 'active', 1), else_=0)),
+        func.sum(case((Listing.created_at >= seven_days_ago, 1), else_=0)),
+        func.sum(Listing.view_count),
+        func.sum(Listing.inquiry_count)
+    ).one()
+
+    stats = PlatformStats.query.get(1) or PlatformStats(id=1)
+    stats.total_users = total_users or 0
+    stats.total_listings = total_listings or 0
+    stats.active_listings = active_listings or 0
+    stats.new_users_7_days = new_users or 0
+    stats.new_listings_7_days = new_listings or 0
+    stats.total_views = total_views or 0
+    stats.total_inquiries = total_inquiries or 0
+    stats.refreshed_at = datetime.utcnow()
+    stats.refresh_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    db.session.add(stats)
+    db.session.commit()
+    return stats
+
+
+def get_platform_stats_snapshot():
+    """
+    Get the platform statistics snapshot, computing it if none exists yet
+
+    Returns:
+        PlatformStats: Latest snapshot row
+    """
+    return PlatformStats.query.get(1) or refresh_platform_stats()
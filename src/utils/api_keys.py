@@ -0,0 +1,257 @@
+"""
+API keys and daily quotas for the SelfServe Timeshare public API
+
+Keys look like 'sst_<prefix>_<secret>'. Only a SHA-256 of the whole key is
+stored; the prefix is the lookup column. Verified keys are cached in
+memory for a short time so most requests never query api_key.
+
+Usage is counted in memory and flushed to api_key_usage in batches, either
+every FLUSH_EVERY requests or FLUSH_INTERVAL seconds, whichever comes
+first. Each flush re-reads the day's totals, so quotas are shared by all
+workers to within one unflushed batch per worker.
+
+Configuration (environment variables):
+    API_KEY_DAILY_QUOTA     requests per key per UTC day (default: 10000)
+    API_KEY_CACHE_SECONDS   how long a verified key is cached (default: 60)
+"""
+
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+
+from flask import request, jsonify, g, after_this_request
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models.api_key import ApiKey, ApiKeyUsage
+from models.user import db
+
+KEY_PREFIX = 'sst_'
+
+DEFAULT_DAILY_QUOTA = int(os.environ.get('API_KEY_DAILY_QUOTA', 10000))
+CACHE_SECONDS = float(os.environ.get('API_KEY_CACHE_SECONDS', 60))
+
+FLUSH_EVERY = 100  # requests
+FLUSH_INTERVAL = 10  # seconds
+
+_lock = threading.Lock()
+_key_cache = {}  # prefix -> (key info dict or None, cached_at)
+_usage = {}  # (api_key_id, day) -> requests already flushed, as last read back
+_pending = {}  # (api_key_id, day) -> requests counted since the last flush
+_pending_total = 0
+_last_flush = time.time()
+
+
+def _hash_key(raw_key):
+    return hashlib.sha256(raw_key.encode()).hexdigest()
+
+
+def create_api_key(user_id, name, daily_quota=None):
+    """
+    Create an API key for a user
+
+    The caller commits the session. The raw key is only available here.
+
+    Args:
+        user_id (int): Key owner
+        name (str): Label shown in the key list
+        daily_quota (int): Requests per UTC day, defaults to API_KEY_DAILY_QUOTA
+
+    Returns:
+        tuple: (ApiKey row, raw key string)
+    """
+    prefix = secrets.token_hex(6)
+    raw_key = f'{KEY_PREFIX}{prefix}_{secrets.token_urlsafe(32)}'
+    api_key = ApiKey(
+        user_id=user_id,
+        name=name,
+        prefix=prefix,
+        key_hash=_hash_key(raw_key),
+        daily_quota=daily_quota or DEFAULT_DAILY_QUOTA
+    )
+    db.session.add(api_key)
+    return api_key, raw_key
+
+
+def forget_api_key(prefix):
+    """Drop a key from this worker's cache, e.g. after revoking it"""
+    with _lock:
+        _key_cache.pop(prefix, None)
+
+
+def _lookup(prefix):
+    """Get cached key info for a prefix, loading it if missing or stale"""
+    now = time.time()
+    with _lock:
+        cached = _key_cache.get(prefix)
+    if cached and now - cached[1] < CACHE_SECONDS:
+        return cached[0]
+
+    api_key = ApiKey.query.filter_by(prefix=prefix).first()
+    info = None
+    if api_key and api_key.revoked_at is None:
+        info = {
+            'id': api_key.id,
+            'user_id': api_key.user_id,
+            'key_hash': api_key.key_hash,
+            'daily_quota': api_key.daily_quota
+        }
+    with _lock:
+        # Unknown prefixes are cached too so bad keys cannot hammer the table
+        _key_cache[prefix] = (info, now)
+    return info
+
+
+def verify_api_key(raw_key):
+    """
+    Check a raw API key
+
+    Args:
+        raw_key (str): Key from the X-API-Key header
+
+    Returns:
+        dict or None: Key info (id, user_id, daily_quota), or None if invalid
+    """
+    if not raw_key or not raw_key.startswith(KEY_PREFIX):
+        return None
+    prefix = raw_key[len(KEY_PREFIX):].split('_', 1)[0]
+    info = _lookup(prefix)
+    if not info or not hmac.compare_digest(info['key_hash'], _hash_key(raw_key)):
+        return None
+    return info
+
+
+def _used_today(api_key_id, day):
+    """Requests made today as this worker knows it: flushed plus pending"""
+    key = (api_key_id, day)
+    with _lock:
+        known = key in _usage
+        used = _usage.get(key, 0)
+    if not known:
+        usage = ApiKeyUsage.query.filter_by(api_key_id=api_key_id, day=day).first()
+        used = usage.requests if usage else 0
+        with _lock:
+            _usage.setdefault(key, used)
+    with _lock:
+        return _usage[key] + _pending.get(key, 0)
+
+
+def meter_request(info):
+    """
+    Count one request against a key's daily quota
+
+    Args:
+        info (dict): Key info from verify_api_key
+
+    Returns:
+        tuple: (allowed, remaining requests today)
+    """
+    global _pending_total
+    day = datetime.utcnow().date()
+    used = _used_today(info['id'], day)
+    if used >= info['daily_quota']:
+        return False, 0
+
+    with _lock:
+        key = (info['id'], day)
+        _pending[key] = _pending.get(key, 0) + 1
+        _pending_total += 1
+        should_flush = _pending_total >= FLUSH_EVERY or time.time() - _last_flush >= FLUSH_INTERVAL
+
+    if should_flush:
+        try:
+            flush_usage()
+        except Exception as e:
+            # Counts stay pending; metering must not fail the request
+            print(f"API usage flush failed at {datetime.now()}: {e}")
+    return True, info['daily_quota'] - used - 1
+
+
+def flush_usage():
+    """
+    Write pending usage counts to api_key_usage and read back the day's totals
+
+    Returns:
+        int: Number of requests flushed
+    """
+    global _pending, _pending_total, _last_flush
+    with _lock:
+        pending, _pending = _pending, {}
+        _pending_total = 0
+        _last_flush = time.time()
+    if not pending:
+        return 0
+
+    try:
+        stmt = sqlite_insert(ApiKeyUsage).values([
+            {'api_key_id': api_key_id, 'day': day, 'requests': count}
+            for (api_key_id, day), count in pending.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['api_key_id', 'day'],
+            set_={'requests': ApiKeyUsage.requests + stmt.excluded.requests}
+        )
+        db.session.execute(stmt)
+        ApiKey.query.filter(
+            ApiKey.id.in_({api_key_id for api_key_id, _ in pending})
+        ).update({'last_used_at': datetime.utcnow()}, synchronize_session=False)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        # Keep the counts for the next flush rather than losing them
+        with _lock:
+            for key, count in pending.items():
+                _pending[key] = _pending.get(key, 0) + count
+                _pending_total += count
+        raise
+
+    # Pick up requests other workers flushed since we last looked
+    totals = ApiKeyUsage.query.filter(
+        ApiKeyUsage.api_key_id.in_({api_key_id for api_key_id, _ in pending}),
+        ApiKeyUsage.day.in_({day for _, day in pending})
+    ).all()
+    today = datetime.utcnow().date()
+    with _lock:
+        for usage in totals:
+            _usage[(usage.api_key_id, usage.day)] = usage.requests
+        for key in [key for key in _usage if key[1] < today]:
+            del _usage[key]
+    return sum(pending.values())
+
+
+def require_api_key(view):
+    """
+    Decorator for public API views: authenticate X-API-Key and meter its quota
+
+    Sets g.api_key_id and g.api_user_id for the view and adds X-Quota-Limit
+    and X-Quota-Remaining headers to the response.
+    """
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        info = verify_api_key(request.headers.get('X-API-Key'))
+        if not info:
+            return jsonify({'error': 'Valid API key required'}), 401
+
+        allowed, remaining = meter_request(info)
+        if not allowed:
+            response = jsonify({'error': 'Daily API quota exceeded'})
+            response.status_code = 429
+            response.headers['X-Quota-Limit'] = str(info['daily_quota'])
+            response.headers['X-Quota-Remaining'] = '0'
+            return response
+
+        g.api_key_id = info['id']
+        g.api_user_id = info['user_id']
+
+        @after_this_request
+        def add_quota_headers(response):
+            response.headers['X-Quota-Limit'] = str(info['daily_quota'])
+            response.headers['X-Quota-Remaining'] = str(remaining)
+            return response
+
+        return view(*args, **kwargs)
+    return wrapped
@@ -0,0 +1,272 @@
+"""
+Atomic updates and reconciliation for denormalized listing counters
+"""
+
+from sqlalchemy import func, case, or_, select
+
+from models.user import User
+from models.listing import Listing, ListingPhoto, Favorite, db
+
+# Denormalized Listing counters and the source table rows they count
+RECONCILED_COUNTERS = {
+    'favorite_count': (Favorite, Favorite.listing_id),
+    'photo_count': (ListingPhoto, ListingPhoto.listing_id)
+}
+
+
+def _count_subquery(*criteria):
+    """Correlated COUNT(*) subquery for recounting inside an UPDATE"""
+    return select(func.count()).where(*criteria).scalar_subquery()
+
+
+def adjust_listing_counter(listing_id, column_name, delta):
+    """
+    Atomically add delta to a Listing counter column, never going below zero
+
+    The increment happens in SQL, so concurrent requests cannot lose
+    updates. updated_at is left untouched because a counter change is not
+    an edit of the listing. The caller commits.
+
+    Args:
+        listing_id (int): Listing ID
+        column_name (str): Counter column, e.g. 'favorite_count'
+        delta (int): Amount to add (negative to decrement)
+
+    Returns:
+        int: The counter value after the update, or None if no such listing
+    """
+    column = getattr(Listing, column_name)
+    current = func.coalesce(column, 0)
+    new_value = case((current + delta > 0, current + delta), else_=0)
+
+    Listing.query.filter_by(id=listing_id).update(
+        {column: new_value, Listing.updated_at: Listing.updated_at},
+        synchronize_session=False
+    )
+    return db.session.query(column).filter(Listing.id == listing_id).scalar()
+
+
+def reconcile_listing_counters(batch_size=1000, fix=True):
+    """
+    Recompute denormalized listing counters from their source tables
+
+    Listings are checked in id-ordered chunks, one grouped COUNT per
+    counter per chunk, and each chunk is committed separately. Fixes are
+    one UPDATE per chunk that recounts in correlated subqueries, so an
+    adjust_listing_counter() committed after the check is not overwritten;
+    the report is the drift seen by the check.
+
+    Args:
+        batch_size (int): Listings checked per chunk
+        fix (bool): Write corrected values back, or only report drift
+
+    Returns:
+        dict: {'checked': int, 'drifted': [ {listing_id, counter, stored, actual} ]}
+    """
+    report = {'checked': 0, 'drifted': []}
+    last_id = 0
+
+    while True:
+        rows = db.session.query(
+            Listing.id, *[getattr(Listing, name) for name in RECONCILED_COUNTERS]
+        ).filter(Listing.id > last_id).order_by(Listing.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        first_id, last_id = rows[0][0], rows[-1][0]
+        actual_counts = {}
+        for name, (model, listing_column) in RECONCILED_COUNTERS.items():
+            actual_counts[name] = dict(
+                db.session.query(listing_column, func.count()).filter(
+                    listing_column.between(first_id, last_id)
+                ).group_by(listing_column).all()
+            )
+
+        drifted_before = len(report['drifted'])
+        for row in rows:
+            listing_id = row[0]
+            for index, name in enumerate(RECONCILED_COUNTERS, start=1):
+                stored = row[index] or 0
+                actual = actual_counts[name].get(listing_id, 0)
+                if stored != actual:
+                    report['drifted'].append({
+                        'listing_id': listing_id,
+                        'counter': name,
+                        'stored': stored,
+                        'actual': actual
+                    })
+
+        if fix and len(report['drifted']) > drifted_before:
+            actual = {name: _count_subquery(listing_column == Listing.id)
+                      for name, (model, listing_column) in RECONCILED_COUNTERS.items()}
+            Listing.query.filter(
+                Listing.id.between(first_id, last_id),
+                or_(*[func.coalesce(getattr(Listing, name), 0) != actual[name] for name in RECONCILED_COUNTERS])
+            ).update(
+                {**{getattr(Listing, name): actual[name] for name in RECONCILED_COUNTERS},
+                 Listing.updated_at: Listing.updated_at},
+                synchronize_session=False
+            )
+
+        db.session.commit()
+        report['checked'] += len(rows)
+
+    return report
+
+
+def reserve_listing_slot(user_id, max_listings):
+    """
+    Atomically count one more active listing for an owner if the plan allows it
+
+    The limit check and the increment are one conditional UPDATE, so two
+    concurrent creates cannot both take the last slot. The caller commits
+    together with the listing insert or status change, or rolls back.
+
+    Args:
+        user_id (int): Owner ID
+        max_listings (int): Plan limit, -1 for unlimited
+
+    Returns:
+        bool: True if the slot was reserved, False if the limit is reached
+    """
+    return reserve_listing_slots(user_id, max_listings, 1)
+
+
+def reserve_listing_slots(user_id, max_listings, count):
+    """
+    Atomically count several more active listings for an owner if all of them fit
+
+    Same conditional UPDATE as reserve_listing_slot, for batch inserts
+    such as bulk imports. The caller commits or rolls back.
+
+    Args:
+        user_id (int): Owner ID
+        max_listings (int): Plan limit, -1 for unlimited
+        count (int): Listings to reserve
+
+    Returns:
+        bool: True if every slot was reserved, False (and nothing reserved) otherwise
+    """
+    current = func.coalesce(User.active_listing_count, 0)
+    query = User.query.filter(User.id == user_id)
+    if max_listings != -1:
+        query = query.filter(current + count <= max_listings)
+    updated = query.update(
+        {User.active_listing_count: current + count, User.updated_at: User.updated_at},
+        synchronize_session=False
+    )
+    return updated == 1
+
+
+def adjust_active_listing_count(user_id, delta):
+    """
+    Atomically add delta to an owner's active listing count, never going below zero
+
+    Like adjust_listing_counter, updated_at is left untouched. The caller commits.
+
+    Args:
+        user_id (int): Owner ID
+        delta (int): Amount to add (negative to decrement)
+    """
+    current = func.coalesce(User.active_listing_count, 0)
+    User.query.filter(User.id == user_id).update(
+        {User.active_listing_count: case((current + delta > 0, current + delta), else_=0),
+         User.updated_at: User.updated_at},
+        synchronize_session=False
+    )
+
+
+def release_listing_slot(listing_id, user_id, status):
+    """
+    Atomically move an active listing to another status and count one less for its owner
+
+    The status change is a conditional UPDATE on status = 'active', and the
+    owner's count only goes down when it matched, so two concurrent
+    deactivations (or a deactivation racing a delete) release the slot
+    once. The caller commits.
+
+    Args:
+        listing_id (int): Listing ID
+        user_id (int): Owner ID
+        status (str): New status, e.g. 'inactive'
+
+    Returns:
+        bool: True if this call took the listing out of 'active'
+    """
+    updated = Listing.query.filter(
+        Listing.id == listing_id,
+        Listing.status == 'active'
+    ).update({Listing.status: status}, synchronize_session=False)
+    if updated == 1:
+        adjust_active_listing_count(user_id, -1)
+    return updated == 1
+
+
+def get_active_listing_count(user_id):
+    """
+    Get an owner's active listing count from the denormalized counter
+
+    Args:
+        user_id (int): Owner ID
+
+    Returns:
+        int: Active listings (0 for unknown users)
+    """
+    return db.session.query(User.active_listing_count).filter(User.id == user_id).scalar() or 0
+
+
+def reconcile_active_listing_counts(batch_size=1000, fix=True):
+    """
+    Recompute owners' active listing counts from the listing table
+
+    Users are checked in id-ordered chunks with one grouped COUNT per chunk,
+    and each chunk is committed separately. As in reconcile_listing_counters,
+    fixes recount inside a single UPDATE per chunk so concurrent
+    reservations are not overwritten.
+
+    Args:
+        batch_size (int): Users checked per chunk
+        fix (bool): Write corrected values back, or only report drift
+
+    Returns:
+        dict: {'checked': int, 'drifted': [ {user_id, stored, actual} ]}
+    """
+    report = {'checked': 0, 'drifted': []}
+    last_id = 0
+
+    while True:
+        rows = db.session.query(User.id, User.active_listing_count).filter(
+            User.id > last_id
+        ).order_by(User.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        first_id, last_id = rows[0][0], rows[-1][0]
+        drifted_before = len(report['drifted'])
+        actual_counts = dict(
+            db.session.query(Listing.user_id, func.count()).filter(
+                Listing.user_id.between(first_id, last_id),
+                Listing.status == 'active'
+            ).group_by(Listing.user_id).all()
+        )
+
+        for user_id, stored in rows:
+            stored = stored or 0
+            actual = actual_counts.get(user_id, 0)
+            if stored != actual:
+                report['drifted'].append({'user_id': user_id, 'stored': stored, 'actual': actual})
+
+        if fix and len(report['drifted']) > drifted_before:
+            actual = _count_subquery(Listing.user_id == User.id, Listing.status == 'active')
+            User.query.filter(
+                User.id.between(first_id, last_id),
+                func.coalesce(User.active_listing_count, 0) != actual
+            ).update(
+                {User.active_listing_count: actual, User.updated_at: User.updated_at},
+                synchronize_session=False
+            )
+
+        db.session.commit()
+        report['checked'] += len(rows)
+
+    return report
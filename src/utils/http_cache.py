@@ -0,0 +1,97 @@
+"""
+HTTP validator helpers for conditional GET requests
+
+Endpoints compute a cheap version stamp (ids and updated_at values)
+before loading full rows, so a matching If-None-Match or
+If-Modified-Since can be answered with a 304 without building the body.
+"""
+
+import hashlib
+from datetime import timezone
+
+from flask import Response, request
+
+# Public pages a shared cache may keep: fresh for a minute in browsers and
+# five at the edge, then served stale while one request revalidates
+PUBLIC_CACHE_CONTROL = 'public, max-age=60, s-maxage=300, stale-while-revalidate=600, stale-if-error=86400'
+PRIVATE_CACHE_CONTROL = 'private, no-cache'
+
+
+def make_etag(*parts):
+    """
+    Build an ETag value from version parts
+
+    Args:
+        *parts: Values identifying the representation (ids, timestamps, ...)
+
+    Returns:
+        str: Opaque ETag value (without quotes)
+    """
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return digest[:20]
+
+
+def http_datetime(value):
+    """Convert a naive UTC datetime to an aware one with whole seconds, as HTTP dates carry"""
+    if value is None:
+        return None
+    return value.replace(microsecond=0, tzinfo=timezone.utc)
+
+
+def is_not_modified(etag, last_modified=None):
+    """
+    Check the request's conditional headers against current validators
+
+    If-None-Match takes precedence over If-Modified-Since, as in RFC 9110.
+
+    Args:
+        etag (str): Current ETag value
+        last_modified (datetime): Current naive UTC modification time
+
+    Returns:
+        bool: True if the client's copy is current
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since:
+        return http_datetime(last_modified) <= request.if_modified_since
+    return False
+
+
+def set_validators(response, etag, last_modified=None, weak=True):
+    """
+    Attach ETag and Last-Modified headers to a response
+
+    Args:
+        response (Response): Response to update
+        etag (str): ETag value
+        last_modified (datetime): Naive UTC modification time
+        weak (bool): Send a weak ETag (W/"...")
+
+    Returns:
+        Response: The same response
+    """
+    response.set_etag(etag, weak=weak)
+    if last_modified is not None:
+        response.last_modified = http_datetime(last_modified)
+    return response
+
+
+def not_modified_response(etag, last_modified=None, weak=True):
+    """Build an empty 304 response carrying the current validators"""
+    return set_validators(Response(status=304), etag, last_modified, weak)
+
+
+def set_surrogate_keys(response, *keys):
+    """
+    Tag a response for targeted purges in a fronting cache (Fastly-style Surrogate-Key)
+
+    Args:
+        response (Response): Response to update
+        *keys (str): Keys such as 'listing-42'
+
+    Returns:
+        Response: The same response
+    """
+    response.headers['Surrogate-Key'] = ' '.join(keys)
+    return response
@@ -0,0 +1,65 @@
+"""
+Listing filters shared by listing search, export and the public API
+"""
+
+from models.listing import Listing
+from utils.amenities import amenity_filter
+
+
+def filter_active_listings(args):
+    """
+    Build the active listing query from request filter arguments
+
+    Args:
+        args: Request query arguments
+
+    Returns:
+        tuple: (query, price column used for price filters and sorting)
+    """
+    property_type = args.get('property_type')
+    city = args.get('city')
+    state = args.get('state')
+    country = args.get('country')
+    min_price = args.get('min_price', type=float)
+    max_price = args.get('max_price', type=float)
+    price_type = args.get('price_type')  # 'sale', 'weekly', 'nightly'
+    bedrooms = args.get('bedrooms', type=int)
+    amenities = args.get('amenities', '')
+
+    # Build query
+    query = Listing.query.filter_by(status='active')
+
+    # Apply filters
+    if property_type:
+        query = query.filter(Listing.property_type.in_([property_type, 'both']))
+    if city:
+        query = query.filter(Listing.city.ilike(f'%{city}%'))
+    if state:
+        query = query.filter(Listing.state.ilike(f'%{state}%'))
+    if country:
+        query = query.filter(Listing.country.ilike(f'%{country}%'))
+    if bedrooms:
+        query = query.filter(Listing.bedrooms >= bedrooms)
+    if amenities:
+        # Listings must have every requested amenity (e.g. amenities=pool,wifi)
+        amenities_clause = amenity_filter(amenities.split(','))
+        if amenities_clause is not None:
+            query = query.filter(amenities_clause)
+
+    # Price filters and sorting use the indexed effective price for the
+    # requested mode: sale, weekly or nightly rental
+    if price_type == 'sale' or (not price_type and property_type == 'sale'):
+        price_column = Listing.effective_sale_price
+    elif price_type == 'weekly' or (not price_type and property_type == 'rental'):
+        price_column = Listing.effective_weekly_price
+    elif price_type == 'nightly':
+        price_column = Listing.effective_nightly_price
+    else:
+        price_column = Listing.effective_price
+
+    if min_price:
+        query = query.filter(price_column >= min_price)
+    if max_price:
+        query = query.filter(price_column <= max_price)
+
+    return query, price_column
@@ -0,0 +1,315 @@
+"""
+Streaming bulk listing import for SelfServe Timeshare
+
+Reads CSV or NDJSON one row at a time, validates each row on its own and
+inserts valid listings in batched transactions. Invalid rows are reported
+by line number and never stop the import. The owner's plan listing limit
+is enforced by reserving slots on the owner's active listing count in
+each batch's transaction, so concurrent imports and creates cannot
+together go over it.
+
+Columns/keys match the create listing API. In CSV, amenities may be
+separated with '|' or given as a quoted comma separated list.
+"""
+
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+from models.listing import Listing, db
+from models.membership import Membership
+from utils.amenities import set_listing_amenities
+from utils.counters import reserve_listing_slot, reserve_listing_slots, get_active_listing_count
+from utils.plan_limits import get_max_listings, get_plan_name
+
+FORMATS = ('csv', 'ndjson')
+
+REQUIRED_FIELDS = ['title', 'property_type', 'resort_name', 'city', 'state', 'country']
+PROPERTY_TYPES = ('sale', 'rental', 'both')
+
+# Optional fields and how to coerce them from CSV text or JSON values
+INT_FIELDS = ['bedrooms', 'sleeps']
+FLOAT_FIELDS = ['bathrooms']
+PRICE_FIELDS = ['sale_price', 'rental_price_weekly', 'rental_price_nightly', 'maintenance_fee']
+TEXT_FIELDS = [
+    'description', 'zip_code', 'unit_size', 'floor', 'view_type', 'ownership_type',
+    'week_number', 'season', 'usage_type', 'available_dates', 'check_in_day',
+    'contact_method', 'contact_phone', 'contact_email'
+]
+
+# Keep the report bounded however bad the upload is
+MAX_REPORTED_ERRORS = 500
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def iter_rows(stream, fmt):
+    """
+    Lazily parse an uploaded byte stream into rows
+
+    Args:
+        stream: Binary file-like object (request.stream or an open file)
+        fmt (str): 'csv' or 'ndjson'
+
+    Yields:
+        tuple: (line_number, row dict or ImportRowError)
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, ImportRowError(f'Invalid JSON: {e}')
+            continue
+        if not isinstance(row, dict):
+            yield line_number, ImportRowError('Each line must be a JSON object')
+            continue
+        yield line_number, row
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _coerce(field, value, convert):
+    try:
+        return convert(value.strip() if isinstance(value, str) else value)
+    except (TypeError, ValueError, InvalidOperation):
+        raise ImportRowError(f'Invalid value for {field}: {value!r}')
+
+
+def _price(value):
+    price = Decimal(str(value).replace(',', '').lstrip('$'))
+    if price < 0:
+        raise ValueError
+    return price
+
+
+def validate_row(row):
+    """
+    Turn a parsed row into Listing column values
+
+    Args:
+        row (dict): Row from iter_rows
+
+    Returns:
+        tuple: (column values dict, amenities value)
+
+    Raises:
+        ImportRowError: If a required field is missing or a value is invalid
+    """
+    missing = [field for field in REQUIRED_FIELDS if _blank(row.get(field))]
+    if missing:
+        raise ImportRowError(f'Missing required field: {", ".join(missing)}')
+
+    values = {field: str(row[field]).strip() for field in REQUIRED_FIELDS}
+    values['property_type'] = values['property_type'].lower()
+    if values['property_type'] not in PROPERTY_TYPES:
+        raise ImportRowError(f'property_type must be one of {", ".join(PROPERTY_TYPES)}')
+
+    for field in INT_FIELDS:
+        if not _blank(row.get(field)):
+            values[field] = _coerce(field, row[field], int)
+    for field in FLOAT_FIELDS:
+        if not _blank(row.get(field)):
+            values[field] = _coerce(field, row[field], float)
+    for field in PRICE_FIELDS:
+        if not _blank(row.get(field)):
+            values[field] = _coerce(field, row[field], _price)
+    for field in TEXT_FIELDS:
+        if not _blank(row.get(field)):
+            values[field] = str(row[field]).strip()
+
+    amenities = row.get('amenities')
+    if isinstance(amenities, str) and '|' in amenities:
+        # CSV cells list amenities as 'Pool|Wi-Fi' to avoid quoting commas
+        amenities = amenities.split('|')
+
+    return values, amenities
+
+
+def _plan_limit(user_id):
+    """Get (max listings, plan name) for a user's current plan"""
+    membership = Membership.query.filter_by(
+        user_id=user_id,
+        status='active'
+    ).order_by(Membership.created_at.desc()).first()
+    membership_type = membership.membership_type if membership and membership.is_active() else None
+    return get_max_listings(membership_type), get_plan_name(membership_type)
+
+
+def remaining_listing_slots(user_id):
+    """
+    Get how many more active listings a user's plan allows
+
+    Args:
+        user_id (int): Owner ID
+
+    Returns:
+        tuple: (remaining slots or None for unlimited, plan name)
+    """
+    max_listings, plan_name = _plan_limit(user_id)
+    if max_listings == -1:
+        return None, plan_name
+
+    active = get_active_listing_count(user_id)
+    return max(max_listings - active, 0), plan_name
+
+
+def _reserve_slots(user_id, max_listings, wanted):
+    """Reserve up to `wanted` listing slots in the current transaction; returns how many"""
+    while wanted > 0:
+        if reserve_listing_slots(user_id, max_listings, wanted):
+            return wanted
+        # Not all fit: ask for what is left now, which a concurrent create may have taken
+        wanted = min(wanted, max_listings - get_active_listing_count(user_id))
+    return 0
+
+
+class _Report:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.listing_ids = []
+
+    def error(self, line_number, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_number, 'error': message})
+
+    def to_dict(self):
+        return {
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+            'listing_ids': self.listing_ids
+        }
+
+
+def _commit_batch(user_id, max_listings, plan_name, batch, report):
+    """Commit a batch of (line_number, listing) whose slots are reserved; on failure retry row by row"""
+    try:
+        # Read the new IDs after the flush; after commit each would be a SELECT
+        db.session.flush()
+        listing_ids = [listing.id for _, listing in batch]
+        db.session.commit()
+        report.imported += len(batch)
+        report.listing_ids.extend(listing_ids)
+        return True
+    except Exception:
+        # Also releases the batch's slot reservation
+        db.session.rollback()
+
+    # Isolate the bad rows so the rest of the batch still lands
+    for line_number, listing in batch:
+        try:
+            if not reserve_listing_slot(user_id, max_listings):
+                db.session.rollback()
+                report.error(line_number, f'Listing limit reached for your {plan_name} plan')
+                continue
+            db.session.add(listing)
+            db.session.flush()
+            listing_id = listing.id
+            db.session.commit()
+            report.imported += 1
+            report.listing_ids.append(listing_id)
+        except Exception as e:
+            db.session.rollback()
+            report.error(line_number, str(getattr(e, 'orig', e)))
+    return False
+
+
+def _import_batch(user_id, user_email, max_listings, plan_name, rows, report, amenity_cache):
+    """
+    Reserve plan slots for a batch of validated rows and insert the ones that fit
+
+    Returns:
+        bool: False if the batch had to be retried row by row
+    """
+    granted = _reserve_slots(user_id, max_listings, len(rows))
+    for line_number, _, _ in rows[granted:]:
+        report.error(line_number, f'Listing limit reached for your {plan_name} plan')
+
+    batch = []
+    for line_number, values, amenities in rows[:granted]:
+        values.setdefault('contact_email', user_email)
+        listing = Listing(user_id=user_id, **values)
+        set_listing_amenities(listing, amenities, amenity_cache)
+        db.session.add(listing)
+        batch.append((line_number, listing))
+
+    if not batch:
+        db.session.rollback()
+        return True
+    return _commit_batch(user_id, max_listings, plan_name, batch, report)
+
+
+def import_listings(user, stream, fmt, batch_size=200, dry_run=False):
+    """
+    Import listings for an owner from a CSV or NDJSON stream
+
+    Args:
+        user (User): Owner the listings are created for
+        stream: Binary file-like object to read rows from
+        fmt (str): 'csv' or 'ndjson'
+        batch_size (int): Listings inserted per transaction
+        dry_run (bool): Validate every row without inserting anything
+
+    Returns:
+        dict: Report with imported/failed counts, per-row errors and new listing IDs
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f'Unsupported format: {fmt}')
+
+    user_id, user_email = user.id, user.email  # Read once; commits expire the user
+    max_listings, plan_name = _plan_limit(user_id)
+    # A dry run writes nothing, so it checks against a local estimate instead
+    remaining = remaining_listing_slots(user_id)[0] if dry_run else None
+    report = _Report()
+    amenity_cache = {}
+    rows = []
+
+    for line_number, row in iter_rows(stream, fmt):
+        if isinstance(row, ImportRowError):
+            report.error(line_number, str(row))
+            continue
+        try:
+            values, amenities = validate_row(row)
+        except ImportRowError as e:
+            report.error(line_number, str(e))
+            continue
+
+        if dry_run:
+            if remaining is not None:
+                if remaining <= 0:
+                    report.error(line_number, f'Listing limit reached for your {plan_name} plan')
+                    continue
+                remaining -= 1
+            report.imported += 1
+            continue
+
+        rows.append((line_number, values, amenities))
+        if len(rows) >= batch_size:
+            if not _import_batch(user_id, user_email, max_listings, plan_name, rows, report, amenity_cache):
+                amenity_cache.clear()
+            rows = []
+
+    if rows:
+        _import_batch(user_id, user_email, max_listings, plan_name, rows, report, amenity_cache)
+
+    return report.to_dict()
@@ -0,0 +1,101 @@
+"""
+Time-based maintenance jobs for SelfServe Timeshare
+
+Each job finds due rows by id in batches and updates one batch per
+transaction, so a large backlog never holds the SQLite write lock for
+long. Jobs are idempotent; the scheduler runs them on the leader worker.
+"""
+
+from datetime import datetime
+
+from models.user import User, db
+from models.listing import Listing
+from models.membership import Membership
+
+BATCH_SIZE = 500
+
+
+def _in_batches(model, condition, values, batch_size):
+    """
+    Apply values to every row matching condition, one id batch per commit
+
+    Returns:
+        int: Rows updated
+    """
+    updated = 0
+    while True:
+        ids = [row[0] for row in db.session.query(model.id).filter(condition).order_by(model.id).limit(batch_size)]
+        if not ids:
+            break
+        # Re-check the condition so rows changed since the select are left alone
+        updated += model.query.filter(model.id.in_(ids), condition).update(values, synchronize_session=False)
+        db.session.commit()
+        if len(ids) < batch_size:
+            break
+    return updated
+
+
+def expire_featured_listings(batch_size=BATCH_SIZE):
+    """
+    Un-feature listings whose featured_until has passed
+
+    updated_at is bumped because is_featured is part of the listing payload
+    and its cache validators.
+
+    Args:
+        batch_size (int): Listings updated per transaction
+
+    Returns:
+        int: Listings un-featured
+    """
+    now = datetime.utcnow()
+    return _in_batches(
+        Listing,
+        Listing.is_featured.is_(True) & (Listing.featured_until < now),
+        {Listing.is_featured: False, Listing.updated_at: now},
+        batch_size
+    )
+
+
+def expire_memberships(batch_size=BATCH_SIZE):
+    """
+    Mark active memberships past their end_date as expired
+
+    Membership.is_active() already treats them as inactive; this makes the
+    stored status agree so queries on status='active' stay correct.
+
+    Args:
+        batch_size (int): Memberships updated per transaction
+
+    Returns:
+        int: Memberships expired
+    """
+    now = datetime.utcnow()
+    return _in_batches(
+        Membership,
+        (Membership.status == 'active') & (Membership.end_date < now),
+        {Membership.status: 'expired', Membership.updated_at: now},
+        batch_size
+    )
+
+
+def clear_reset_tokens(batch_size=BATCH_SIZE):
+    """
+    Clear stored password reset tokens
+
+    Reset links are signed tokens now (see utils/tokens.py), so any token
+    still stored on a user is a leftover of the old flow and can never be
+    redeemed.
+
+    Args:
+        batch_size (int): Users updated per transaction
+
+    Returns:
+        int: Users cleared
+    """
+    return _in_batches(
+        User,
+        User.reset_token.isnot(None) | User.reset_token_expires.isnot(None),
+        {User.reset_token: None, User.reset_token_expires: None, User.updated_at: User.updated_at},
+        batch_size
+    )
@@ -0,0 +1,134 @@
+"""
+Password hashing for SelfServe Timeshare, offloaded to a bounded process pool
+
+Hashing is deliberately slow, so running it on the request thread lets a
+burst of logins starve every other request on the worker. Hashes are
+computed on a small process pool instead; callers block on the result but
+the CPU work no longer holds the worker's interpreter.
+
+Configuration (environment variables):
+    PASSWORD_HASH_METHOD   werkzeug method string, e.g. 'scrypt' or
+                           'pbkdf2:sha256:600000' (default: 'scrypt')
+    PASSWORD_HASH_WORKERS  pool size; 0 hashes inline (default: 2)
+    PASSWORD_HASH_TIMEOUT  seconds to wait for a pool result (default: 10)
+
+A hash still waiting after PASSWORD_HASH_TIMEOUT is cancelled and
+PasswordHashBusy is raised; the app answers it with a 503 and
+Retry-After instead of letting the request fail as a 500.
+"""
+
+import math
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+
+
+class PasswordHashBusy(Exception):
+    """Raised when the hashing pool cannot return a result within HASH_TIMEOUT"""
+
+    retry_after = max(1, math.ceil(HASH_TIMEOUT))  # seconds, for the Retry-After header
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_method_prefix = None
+
+
+def _get_pool():
+    """Get the process pool for this process, creating it after any fork"""
+    global _pool, _pool_pid
+    if HASH_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _run(func, *args):
+    """Run a hashing function on the pool, falling back to inline if it is broken"""
+    global _pool
+    pool = _get_pool()
+    if pool is None:
+        return func(*args)
+    try:
+        future = pool.submit(func, *args)
+        return future.result(timeout=HASH_TIMEOUT)
+    except FutureTimeoutError:
+        # Still queued behind a burst; drop it rather than hash for a client that gave up
+        future.cancel()
+        raise PasswordHashBusy() from None
+    except BrokenProcessPool:
+        with _pool_lock:
+            _pool = None
+        return func(*args)
+
+
+def start_pool():
+    """
+    Start the hashing processes ahead of the first login
+
+    Returns:
+        int: Number of pool processes started (0 when hashing inline)
+    """
+    pool = _get_pool()
+    if pool is None:
+        return 0
+    # Each task is picked up by a fresh process while the others are busy starting
+    list(pool.map(abs, range(HASH_WORKERS)))
+    return HASH_WORKERS
+
+
+def hash_password(password):
+    """
+    Hash a password with the configured method
+
+    Args:
+        password (str): Plain text password
+
+    Returns:
+        str: werkzeug password hash
+    """
+    return _run(generate_password_hash, password, HASH_METHOD)
+
+
+def verify_password(password_hash, password):
+    """
+    Check a password against a stored hash
+
+    Args:
+        password_hash (str): Stored werkzeug password hash
+        password (str): Plain text password to check
+
+    Returns:
+        bool: True if the password matches
+    """
+    if not password_hash or password is None:
+        return False
+    return _run(check_password_hash, password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """
+    Check whether a stored hash was made with different method or cost
+
+    Args:
+        password_hash (str): Stored werkzeug password hash
+
+    Returns:
+        bool: True if the hash should be regenerated with the current settings
+    """
+    global _method_prefix
+    if _method_prefix is None:
+        # Expand defaults such as 'scrypt' -> 'scrypt:32768:8:1' once
+        _method_prefix = generate_password_hash('', HASH_METHOD).split('$', 1)[0]
+    return password_hash.split('$', 1)[0] != _method_prefix
@@ -121,6 +121,30 @@ def is_unlimited_plan(membership_type):
     """
     return get_max_listings(membership_type) == -1
 
+def has_bulk_tools(membership_type):
+    """
+    Check if a membership type includes the bulk listing tools
+    
+    Args:
+        membership_type (str): The membership type
+        
+    Returns:
+        bool: True if bulk import is available, False otherwise
+    """
+    return 'Bulk listing tools' in get_plan_limits(membership_type)['features']
+
+def has_api_access(membership_type):
+    """
+    Check if a membership type includes public API access
+    
+    Args:
+        membership_type (str): The membership type
+        
+    Returns:
+        bool: True if API keys can be created, False otherwise
+    """
+    return 'API access' in get_plan_limits(membership_type)['features']
+
 def get_plan_name(membership_type):
     """
     Get the display name for a membership type
@@ -0,0 +1,248 @@
+"""
+Token-bucket rate limiting for SelfServe Timeshare
+
+Each limited route names a bucket and a key (client IP, user or API key).
+A bucket holds up to `capacity` tokens and refills continuously over
+`period` seconds; a request spends one token or gets a 429.
+
+Buckets live in a small SQLite file by default so every Gunicorn worker
+on the host shares them. Each check is one INSERT ... ON CONFLICT ...
+RETURNING statement on a primary key, so it is atomic across workers and
+O(1). The 'memory' store keeps buckets in a per-process dict instead.
+
+Configuration (environment variables):
+    RATE_LIMIT_ENABLED         '0' disables all limits (default: '1')
+    RATE_LIMIT_STORAGE         'sqlite' or 'memory' (default: 'sqlite')
+    RATE_LIMIT_DB_PATH         SQLite file (default: database/ratelimit.db)
+    RATE_LIMIT_<NAME>          override a limit as 'capacity/period', e.g.
+                               RATE_LIMIT_LOGIN='5/60'
+
+Limits are keyed on the peer address. Behind a reverse proxy, set
+TRUSTED_PROXY_HOPS (read in main.py) to the number of proxies so the
+client address is taken from X-Forwarded-For; otherwise every client
+would share the proxy's bucket.
+"""
+
+import os
+import math
+import time
+import sqlite3
+import threading
+from functools import wraps
+
+from flask import request, session, jsonify
+
+from utils.api_keys import verify_api_key
+
+# name -> (capacity, period in seconds)
+RATE_LIMITS = {
+    'login': (10, 60),        # 10 attempts a minute
+    'search': (60, 60),       # 60 searches a minute
+    'track': (120, 60),       # 120 view pings a minute
+    'inquiry': (5, 3600),     # 5 inquiries an hour
+    'export': (10, 3600)      # 10 full exports an hour
+}
+
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') != '0'
+RATE_LIMIT_STORAGE = os.environ.get('RATE_LIMIT_STORAGE', 'sqlite')
+RATE_LIMIT_DB_PATH = os.environ.get(
+    'RATE_LIMIT_DB_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database', 'ratelimit.db')
+)
+
+# Seconds between sweeps of idle buckets
+SWEEP_INTERVAL = 300
+SWEEP_BATCH_SIZE = 500
+
+
+def get_limit(name):
+    """
+    Get the configured limit for a bucket name
+
+    Args:
+        name (str): Bucket name, e.g. 'login'
+
+    Returns:
+        tuple: (capacity, period in seconds)
+    """
+    override = os.environ.get(f'RATE_LIMIT_{name.upper()}')
+    if override:
+        capacity, period = override.split('/', 1)
+        return int(capacity), float(period)
+    return RATE_LIMITS[name]
+
+
+class MemoryBucketStore:
+    """Token buckets in a per-process dict"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+
+    def take(self, key, capacity, rate, now):
+        with self._lock:
+            tokens, updated_at, _ = self._buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now, now + capacity / rate)
+
+            if now - self._last_sweep > SWEEP_INTERVAL:
+                self._sweep(now)
+        return allowed, tokens
+
+    def _sweep(self, now):
+        # Buckets past their expiry have refilled completely, so dropping them is exact
+        self._last_sweep = now
+        for key in [key for key, (_, _, expires_at) in self._buckets.items() if expires_at < now]:
+            del self._buckets[key]
+
+
+class SQLiteBucketStore:
+    """Token buckets in a local SQLite file shared by all workers"""
+
+    TAKE_SQL = '''
+        INSERT INTO rate_bucket (key, tokens, allowed, updated_at, expires_at)
+        VALUES (:key, :capacity - 1, 1, :now, :expires_at)
+        ON CONFLICT(key) DO UPDATE SET
+            tokens = CASE
+                WHEN min(:capacity, tokens + (:now - updated_at) * :rate) >= 1
+                THEN min(:capacity, tokens + (:now - updated_at) * :rate) - 1
+                ELSE min(:capacity, tokens + (:now - updated_at) * :rate)
+            END,
+            allowed = min(:capacity, tokens + (:now - updated_at) * :rate) >= 1,
+            updated_at = :now,
+            expires_at = :expires_at
+        RETURNING allowed, tokens
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._last_sweep = time.time()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn().execute('''
+            CREATE TABLE IF NOT EXISTS rate_bucket (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                allowed INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        self._conn().execute('CREATE INDEX IF NOT EXISTS idx_rate_bucket_expires_at ON rate_bucket(expires_at)')
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # Losing a few bucket updates on power loss is harmless
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def take(self, key, capacity, rate, now):
+        conn = self._conn()
+        allowed, tokens = conn.execute(self.TAKE_SQL, {
+            'key': key,
+            'capacity': capacity,
+            'rate': rate,
+            'now': now,
+            'expires_at': now + capacity / rate
+        }).fetchone()
+
+        if now - self._last_sweep > SWEEP_INTERVAL:
+            self._last_sweep = now
+            # Buckets past expires_at have refilled completely, so dropping them is exact
+            while conn.execute(
+                'DELETE FROM rate_bucket WHERE rowid IN '
+                '(SELECT rowid FROM rate_bucket WHERE expires_at < ? LIMIT ?)',
+                (now, SWEEP_BATCH_SIZE)
+            ).rowcount == SWEEP_BATCH_SIZE:
+                pass
+        return bool(allowed), tokens
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Get the configured bucket store, creating it on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if RATE_LIMIT_STORAGE == 'memory':
+                    _store = MemoryBucketStore()
+                else:
+                    _store = SQLiteBucketStore(RATE_LIMIT_DB_PATH)
+    return _store
+
+
+def check_rate_limit(name, key):
+    """
+    Spend one token from a bucket
+
+    Args:
+        name (str): Bucket name from RATE_LIMITS
+        key (str): Caller identity within the bucket
+
+    Returns:
+        tuple: (allowed, retry_after seconds)
+    """
+    capacity, period = get_limit(name)
+    rate = capacity / period
+    allowed, tokens = get_store().take(f'{name}:{key}', capacity, rate, time.time())
+    retry_after = 0 if allowed else math.ceil((1 - tokens) / rate)
+    return allowed, retry_after
+
+
+def client_ip():
+    """
+    Get the client IP the limits are keyed on
+
+    This is the peer address. X-Forwarded-For is client-supplied and is
+    only honoured through ProxyFix, which main.py installs when
+    TRUSTED_PROXY_HOPS says how many proxies sit in front of the app.
+    """
+    return request.remote_addr or 'unknown'
+
+
+def _key_for(key):
+    if key == 'user':
+        user_id = session.get('user_id') or request.headers.get('X-User-ID')
+        return f'user:{user_id}' if user_id else f'ip:{client_ip()}'
+    if key == 'api_key':
+        # Only verified keys get their own bucket, keyed by id so no secret is stored
+        info = verify_api_key(request.headers.get('X-API-Key'))
+        return f"key:{info['id']}" if info else f'ip:{client_ip()}'
+    return f'ip:{client_ip()}'
+
+
+def rate_limit(name, key='ip'):
+    """
+    Decorator that rejects requests over a route's limit with 429
+
+    Args:
+        name (str): Bucket name from RATE_LIMITS
+        key (str): 'ip', 'user' or 'api_key'; the latter two fall back to IP,
+            as does an API key that does not verify
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if RATE_LIMIT_ENABLED:
+                allowed, retry_after = check_rate_limit(name, _key_for(key))
+                if not allowed:
+                    response = jsonify({'error': 'Too many requests, please try again later'})
+                    response.status_code = 429
+                    response.headers['Retry-After'] = str(retry_after)
+                    return response
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
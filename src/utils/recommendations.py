@@ -0,0 +1,289 @@
+"""
+Item-to-item recommendations from favorite co-occurrence
+
+Two listings are related when the same users favorited both. The job
+keeps a sparse co-occurrence matrix (listing_cooccurrence) up to date from
+the favorite change log, then re-ranks only the listings whose counts
+changed into a compact top-N table (listing_neighbor), scored by cosine
+similarity:
+
+    score(a, b) = co-favorites(a, b) / sqrt(favorites(a) * favorites(b))
+
+so popular listings do not crowd out everything else. Users with more
+than MAX_USER_FAVORITES favorites are left out of the matrix; they add
+many pairs and little signal.
+
+A periodic full rebuild recomputes the matrix from the favorite table,
+which also drops pairs left behind by deleted listings.
+"""
+
+import heapq
+import math
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import aliased
+
+from models.listing import Listing, Favorite, db
+from models.analytics import RollupState
+from models.recommendation import FavoriteChange, ListingCooccurrence, ListingNeighbor
+
+ROLLUP_NAME = 'favorite_cooccurrence'
+
+NEIGHBORS_PER_LISTING = 20
+MAX_USER_FAVORITES = 200
+
+# Rows per INSERT ... ON CONFLICT statement, kept under SQLite's variable limit
+UPSERT_CHUNK_SIZE = 300
+
+# Listings re-ranked per neighbour query
+RANK_CHUNK_SIZE = 500
+
+
+def record_favorite_change(user_id, listing_id, delta):
+    """
+    Log a favorite being added (delta 1) or removed (delta -1)
+
+    The change is added to the current session; the caller commits it
+    together with the favorite itself.
+
+    Args:
+        user_id (int): User who changed their favorites
+        listing_id (int): Listing favorited or unfavorited
+        delta (int): 1 or -1
+    """
+    db.session.add(FavoriteChange(user_id=int(user_id), listing_id=int(listing_id), delta=delta))
+
+
+def _pair_deltas(before, after, deltas):
+    """
+    Add the co-occurrence changes of one user going from `before` to `after`
+
+    Only pairs touching a listing that entered or left the set can change,
+    so the work is (changed listings) x (favorites), not favorites squared.
+    """
+    if len(before) > MAX_USER_FAVORITES:
+        before = set()
+    if len(after) > MAX_USER_FAVORITES:
+        after = set()
+    changed = before ^ after
+    union = before | after
+    for first in changed:
+        for second in union:
+            # Pairs of two changed listings are visited from both ends; count once
+            if second == first or (second in changed and second < first):
+                continue
+            delta = (first in after and second in after) - (first in before and second in before)
+            if delta:
+                deltas[(first, second)] += delta
+                deltas[(second, first)] += delta
+
+
+def _apply_deltas(deltas):
+    """Add pair deltas onto the co-occurrence matrix, dropping pairs that reach zero"""
+    rows = [
+        {'listing_id': listing_id, 'other_id': other_id, 'count': delta}
+        for (listing_id, other_id), delta in deltas.items() if delta
+    ]
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = sqlite_insert(ListingCooccurrence).values(rows[start:start + UPSERT_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['listing_id', 'other_id'],
+            set_={'count': ListingCooccurrence.count + stmt.excluded.count}
+        )
+        db.session.execute(stmt)
+    if rows:
+        ListingCooccurrence.query.filter(ListingCooccurrence.count <= 0).delete(synchronize_session=False)
+
+
+def _rank_neighbors(listing_ids):
+    """Rewrite the top-N neighbour rows for the given listings from the matrix"""
+    listing_ids = sorted(listing_ids)
+    for start in range(0, len(listing_ids), RANK_CHUNK_SIZE):
+        chunk = listing_ids[start:start + RANK_CHUNK_SIZE]
+        favorite_counts = dict(
+            db.session.query(Listing.id, Listing.favorite_count).filter(Listing.id.in_(chunk))
+        )
+        rows = db.session.query(
+            ListingCooccurrence.listing_id,
+            ListingCooccurrence.other_id,
+            ListingCooccurrence.count,
+            Listing.favorite_count
+        ).join(
+            Listing, Listing.id == ListingCooccurrence.other_id
+        ).filter(
+            ListingCooccurrence.listing_id.in_(chunk),
+            Listing.status == 'active'
+        ).all()
+
+        candidates = defaultdict(list)
+        for listing_id, other_id, count, other_favorites in rows:
+            # Stored counters can lag the matrix; never let a pair outweigh its listings
+            own = max(favorite_counts.get(listing_id) or 0, count)
+            other = max(other_favorites or 0, count)
+            candidates[listing_id].append((count / math.sqrt(own * other), other_id))
+
+        ListingNeighbor.query.filter(ListingNeighbor.listing_id.in_(chunk)).delete(synchronize_session=False)
+        neighbors = [
+            {'listing_id': listing_id, 'neighbor_id': other_id, 'score': round(score, 6)}
+            for listing_id, scored in candidates.items()
+            for score, other_id in heapq.nlargest(NEIGHBORS_PER_LISTING, scored)
+        ]
+        if neighbors:
+            db.session.execute(ListingNeighbor.__table__.insert(), neighbors)
+
+
+def _favorite_sets(user_ids):
+    """Current favorite listing ids for each user"""
+    sets = {user_id: set() for user_id in user_ids}
+    rows = db.session.query(Favorite.user_id, Favorite.listing_id).filter(Favorite.user_id.in_(list(user_ids)))
+    for user_id, listing_id in rows:
+        sets[user_id].add(listing_id)
+    return sets
+
+
+def _undo(favorites, changes):
+    """Roll favorite sets back past changes, given newest first"""
+    for user_id, listing_id, delta in changes:
+        if delta > 0:
+            favorites[user_id].discard(listing_id)
+        else:
+            favorites[user_id].add(listing_id)
+
+
+def update_recommendations(batch_size=1000):
+    """
+    Fold new favorite changes into the matrix and re-rank affected listings
+
+    Changes are processed in id order, one transaction per batch, behind
+    the same conditional high-water mark as the analytics rollup. Each
+    user's favorites before and after the batch are rebuilt from their
+    current favorites by undoing logged changes, so the counts stay exact
+    however many changes a user made. The first run builds the matrix
+    from scratch.
+
+    Args:
+        batch_size (int): Maximum changes processed per transaction
+
+    Returns:
+        int: Number of changes processed
+    """
+    if not RollupState.query.get(ROLLUP_NAME):
+        rebuild_recommendations()
+        return 0
+
+    processed = 0
+    while True:
+        first_id = RollupState.query.get(ROLLUP_NAME).last_event_id
+        batch = db.session.query(
+            FavoriteChange.id, FavoriteChange.user_id, FavoriteChange.listing_id, FavoriteChange.delta
+        ).filter(FavoriteChange.id > first_id).order_by(FavoriteChange.id).limit(batch_size).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+        user_ids = {change.user_id for change in batch}
+
+        # Favorites as of the end of the batch: undo anything logged since
+        after = _favorite_sets(user_ids)
+        later = db.session.query(
+            FavoriteChange.user_id, FavoriteChange.listing_id, FavoriteChange.delta
+        ).filter(
+            FavoriteChange.id > last_id,
+            FavoriteChange.user_id.in_(list(user_ids))
+        ).order_by(FavoriteChange.id.desc()).all()
+        _undo(after, later)
+
+        before = {user_id: set(listing_ids) for user_id, listing_ids in after.items()}
+        _undo(before, [(change.user_id, change.listing_id, change.delta) for change in reversed(batch)])
+
+        deltas = Counter()
+        for user_id in user_ids:
+            _pair_deltas(before[user_id], after[user_id], deltas)
+        _apply_deltas(deltas)
+        _rank_neighbors({listing_id for listing_id, _ in deltas})
+
+        advanced = RollupState.query.filter_by(
+            name=ROLLUP_NAME, last_event_id=first_id
+        ).update({'last_event_id': last_id, 'updated_at': datetime.utcnow()})
+        if not advanced:
+            # Another worker processed this range already
+            db.session.rollback()
+            continue
+
+        # Consumed changes are only needed again by a rebuild, which reads favorites
+        FavoriteChange.query.filter(FavoriteChange.id <= last_id).delete(synchronize_session=False)
+        db.session.commit()
+        processed += len(batch)
+
+    return processed
+
+
+def rebuild_recommendations():
+    """
+    Recompute the co-occurrence matrix and every neighbour list from favorites
+
+    The matrix is one grouped self-join of the favorite table. The change
+    log is marked as consumed, and pruned, up to its newest entry at the
+    start.
+
+    Returns:
+        int: Pairs in the rebuilt matrix
+    """
+    last_id = db.session.query(func.max(FavoriteChange.id)).scalar() or 0
+
+    eligible_users = db.session.query(Favorite.user_id).group_by(
+        Favorite.user_id
+    ).having(func.count() <= MAX_USER_FAVORITES)
+    first = aliased(Favorite)
+    second = aliased(Favorite)
+    pairs = db.session.query(
+        first.listing_id, second.listing_id, func.count()
+    ).join(
+        second, (second.user_id == first.user_id) & (second.listing_id != first.listing_id)
+    ).filter(
+        first.user_id.in_(eligible_users)
+    ).group_by(first.listing_id, second.listing_id)
+
+    ListingCooccurrence.query.delete(synchronize_session=False)
+    ListingNeighbor.query.delete(synchronize_session=False)
+    db.session.execute(
+        ListingCooccurrence.__table__.insert().from_select(['listing_id', 'other_id', 'count'], pairs)
+    )
+    _rank_neighbors([row[0] for row in db.session.query(ListingCooccurrence.listing_id).distinct()])
+
+    FavoriteChange.query.filter(FavoriteChange.id <= last_id).delete(synchronize_session=False)
+    state = RollupState.query.get(ROLLUP_NAME) or RollupState(name=ROLLUP_NAME)
+    state.last_event_id = last_id
+    state.updated_at = datetime.utcnow()
+    db.session.add(state)
+    db.session.commit()
+    return db.session.query(func.count()).select_from(ListingCooccurrence).scalar()
+
+
+def get_recommendations(user_id, limit=12):
+    """
+    Recommend active listings from the neighbours of a user's favorites
+
+    One grouped query sums each candidate's neighbour scores over all of
+    the user's favorites, leaving out listings the user already favorited
+    or owns.
+
+    Args:
+        user_id (int): User to recommend for
+        limit (int): Maximum listings returned
+
+    Returns:
+        list: [(Listing, score)] best first
+    """
+    favorited = db.session.query(Favorite.listing_id).filter(Favorite.user_id == user_id)
+    score = func.sum(ListingNeighbor.score).label('score')
+    return db.session.query(Listing, score).join(
+        ListingNeighbor, ListingNeighbor.neighbor_id == Listing.id
+    ).filter(
+        ListingNeighbor.listing_id.in_(favorited),
+        ListingNeighbor.neighbor_id.notin_(favorited),
+        Listing.status == 'active',
+        Listing.user_id != user_id
+    ).group_by(Listing.id).order_by(score.desc(), Listing.id.desc()).limit(limit).all()
@@ -0,0 +1,214 @@
+"""
+In-process periodic job scheduler for SelfServe Timeshare
+
+One daemon thread per worker runs due jobs one after another inside an
+app context. Most jobs only need to run once per deployment, so they are
+marked leader-only: across all Gunicorn workers, only the worker holding
+an exclusive lock on SCHEDULER_LOCK_PATH runs them. The OS drops the lock
+when that process exits, and another worker takes over on its next tick.
+Per-worker jobs (such as flushing in-memory counters) run everywhere.
+
+Leader-only jobs record when they last ran in scheduled_job_state. A job
+runs once that record says it is overdue, so restarts and deploys do not
+reset its schedule; a job that has never run is due at start-up. Per-worker
+jobs keep an in-memory timer.
+
+Every run is timed; Scheduler.get_job_stats() returns runs, failures and
+duration metrics per job for this worker.
+
+Configuration (environment variables):
+    SCHEDULER_LOCK_PATH   leader lock file (default: src/database/scheduler.lock)
+"""
+
+import calendar
+import os
+import threading
+import time
+from datetime import datetime
+
+from models.user import db
+from models.scheduler import ScheduledJobState
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows dev machines run a single process
+    fcntl = None
+
+DEFAULT_LOCK_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'scheduler.lock')
+
+TICK_SECONDS = 1
+
+# How often a follower re-checks leader-only jobs, so it takes over promptly
+FOLLOWER_CHECK_SECONDS = 60
+
+
+class Job:
+    """A function run every `interval` seconds, with timing metrics"""
+
+    def __init__(self, name, func, interval, leader_only=True, initial_delay=None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.leader_only = leader_only
+        if initial_delay is None:
+            # Leader-only jobs are checked against their stored last run right away
+            initial_delay = 0 if leader_only else interval
+        self.next_run = time.time() + initial_delay
+        self.runs = 0
+        self.failures = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = None
+        self.last_run_at = None
+        self.last_result = None
+        self.last_error = None
+
+    def to_dict(self):
+        return {
+            'interval_seconds': self.interval,
+            'leader_only': self.leader_only,
+            'runs': self.runs,
+            'failures': self.failures,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+            'last_ms': self.last_ms,
+            'avg_ms': round(self.total_ms / self.runs, 1) if self.runs else None,
+            'max_ms': round(self.max_ms, 1),
+            'last_result': self.last_result,
+            'last_error': self.last_error
+        }
+
+
+class Scheduler:
+    """Runs registered jobs on a background thread, leader-only jobs under a file lock"""
+
+    def __init__(self, app, lock_path=None):
+        self.app = app
+        self.lock_path = lock_path or os.environ.get('SCHEDULER_LOCK_PATH', DEFAULT_LOCK_PATH)
+        self.jobs = []
+        self._lock_file = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def add_job(self, name, func, interval, leader_only=True, initial_delay=None):
+        """
+        Register a job
+
+        Args:
+            name (str): Name used in logs and stats
+            func (callable): Called with no arguments inside an app context
+            interval (float): Seconds between runs
+            leader_only (bool): Run on the leader worker only
+            initial_delay (float): Seconds before the first check (default: 0 for
+                leader-only jobs, which then run if overdue; interval otherwise)
+        """
+        self.jobs.append(Job(name, func, interval, leader_only, initial_delay))
+
+    def is_leader(self):
+        """Whether this worker holds the leader lock, trying to take it if not"""
+        if self._lock_file is not None:
+            return True
+        if fcntl is None:
+            return True
+        lock_file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        print(f"Scheduler leader lock taken by pid {os.getpid()}")
+        return True
+
+    def _stored_last_run(self, job):
+        """When a leader-only job last ran on any worker, as epoch seconds, or None"""
+        with self.app.app_context():
+            state = ScheduledJobState.query.get(job.name)
+            return calendar.timegm(state.last_run_at.utctimetuple()) if state else None
+
+    def _store_last_run(self, job):
+        state = ScheduledJobState.query.get(job.name) or ScheduledJobState(name=job.name)
+        state.last_run_at = job.last_run_at
+        db.session.add(state)
+        db.session.commit()
+
+    def run_job(self, job):
+        """Run one job now and record its timing"""
+        started = time.perf_counter()
+        job.last_run_at = datetime.utcnow()
+        try:
+            with self.app.app_context():
+                job.last_result = job.func()
+            job.last_error = None
+        except Exception as e:
+            job.failures += 1
+            job.last_error = str(e)
+            print(f"Scheduled job {job.name} failed at {datetime.now()}: {e}")
+        if job.leader_only:
+            # Failed runs count too, so a failing job is retried next interval, not every tick
+            try:
+                with self.app.app_context():
+                    self._store_last_run(job)
+            except Exception as e:
+                print(f"Scheduled job {job.name} could not record its run at {datetime.now()}: {e}")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        job.runs += 1
+        job.total_ms += elapsed_ms
+        job.max_ms = max(job.max_ms, elapsed_ms)
+        job.last_ms = round(elapsed_ms, 1)
+
+    def run_pending(self):
+        """Run every job that is due; returns how many ran"""
+        now = time.time()
+        due = [job for job in self.jobs if job.next_run <= now]
+        if not due:
+            return 0
+        leader = any(job.leader_only for job in due) and self.is_leader()
+        ran = 0
+        for job in due:
+            if job.leader_only:
+                if not leader:
+                    # Check again soon so this worker takes over promptly if it becomes leader
+                    job.next_run = now + min(job.interval, FOLLOWER_CHECK_SECONDS)
+                    continue
+                last_run = self._stored_last_run(job)
+                if last_run is not None and last_run + job.interval > now:
+                    # Ran recently, e.g. before a restart or on the previous leader
+                    job.next_run = last_run + job.interval
+                    continue
+            job.next_run = now + job.interval
+            self.run_job(job)
+            ran += 1
+        return ran
+
+    def _loop(self):
+        while not self._stop.wait(TICK_SECONDS):
+            try:
+                self.run_pending()
+            except Exception as e:
+                print(f"Scheduler tick failed at {datetime.now()}: {e}")
+
+    def start(self):
+        """Start the scheduler thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+            print(f"Scheduler started with {len(self.jobs)} jobs: {', '.join(job.name for job in self.jobs)}")
+
+    def stop(self):
+        """Stop the scheduler thread and release the leader lock"""
+        self._stop.set()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def get_job_stats(self):
+        """
+        Timing metrics for this worker's jobs
+
+        Returns:
+            dict: {'leader': bool, 'jobs': {name: stats}}
+        """
+        return {
+            'leader': self._lock_file is not None or fcntl is None,
+            'jobs': {job.name: job.to_dict() for job in self.jobs}
+        }
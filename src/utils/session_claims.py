@@ -0,0 +1,145 @@
+"""
+Signed identity claims carried in the Flask session
+
+The session cookie is already signed with SECRET_KEY, so claims stored in
+it cannot be forged. Authenticated read paths use them to learn who the
+caller is (id, active flag, account type, plan tier) without querying the
+user or membership tables. Claims are short-lived and re-issued from the
+database once they expire, or immediately when the user or their
+membership changes: refresh_claims() drops the claims held in every one
+of that user's server-side sessions, so other devices re-read them too.
+"""
+
+import os
+import time
+
+from flask import session
+
+from models.user import User
+from models.membership import Membership
+from utils.session_store import regenerate_session, discard_user_session_key
+
+# Bump when the claim fields change so old cookies are re-issued
+CLAIMS_VERSION = 3
+
+CLAIMS_TTL = int(os.environ.get('SESSION_CLAIMS_TTL', 300))  # seconds
+
+
+def _plan_for(user_id):
+    """Get the plan tier of a user's current active membership, or 'free'"""
+    membership = Membership.query.filter_by(
+        user_id=user_id,
+        status='active'
+    ).order_by(Membership.created_at.desc()).first()
+    if membership and membership.is_active():
+        return membership.membership_type
+    return 'free'
+
+
+def issue_claims(user, plan=None):
+    """
+    Store fresh claims for a user in the session
+
+    If the session belonged to someone else (or nobody), it is moved to a
+    new session id first, so a pre-login id never carries the new identity.
+
+    Args:
+        user (User): Authenticated user
+        plan (str): Plan tier if already known, otherwise looked up
+
+    Returns:
+        dict: The issued claims
+    """
+    claims = {
+        'ver': CLAIMS_VERSION,
+        'exp': int(time.time()) + CLAIMS_TTL,
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'phone': user.phone,
+        'sms_consent': bool(getattr(user, 'sms_consent', False)),
+        'created_at': user.created_at.isoformat() if user.created_at else None,
+        'updated_at': user.updated_at.isoformat() if user.updated_at else None,
+        'last_login': user.last_login.isoformat() if user.last_login else None,
+        'active': bool(user.is_active),
+        'email_verified': bool(user.email_verified),
+        'account_type': user.account_type,
+        'plan': plan or _plan_for(user.id)
+    }
+    if session.get('user_id') != user.id:
+        regenerate_session()
+    session['user_id'] = user.id
+    session['claims'] = claims
+    return claims
+
+
+def get_claims():
+    """
+    Get the caller's claims if they are current, without touching the database
+
+    Returns:
+        dict or None: Claims, or None if missing, expired or from an old version
+    """
+    claims = session.get('claims')
+    if not claims or claims.get('ver') != CLAIMS_VERSION:
+        return None
+    if claims.get('exp', 0) < time.time():
+        return None
+    if claims.get('id') != session.get('user_id'):
+        return None
+    return claims
+
+
+def current_claims():
+    """
+    Get the caller's claims, re-issuing them from the database if stale
+
+    Returns:
+        dict or None: Claims for an active user, or None if not authenticated
+    """
+    claims = get_claims()
+    if claims is None:
+        user_id = session.get('user_id')
+        if not user_id:
+            return None
+        user = User.query.get(user_id)
+        if not user:
+            clear_claims()
+            return None
+        claims = issue_claims(user)
+
+    return claims if claims['active'] else None
+
+
+def refresh_claims(user_id=None):
+    """
+    Re-issue claims after a user or their membership changed
+
+    Claims stored in the user's other sessions are dropped, so each of
+    them is re-issued from the database on its next request; the caller's
+    own claims are re-issued now if the change was theirs.
+
+    Args:
+        user_id (int): User that changed, defaults to the caller
+    """
+    session_user_id = session.get('user_id')
+    if user_id is None:
+        user_id = session_user_id
+    if not user_id:
+        return
+    discard_user_session_key(user_id, 'claims')
+    if session_user_id != user_id:
+        return
+    user = User.query.get(session_user_id)
+    if user:
+        issue_claims(user)
+    else:
+        clear_claims()
+
+
+def clear_claims():
+    """Remove identity claims from the session"""
+    session.pop('claims', None)
+    session.pop('user_id', None)
@@ -0,0 +1,422 @@
+"""
+Server-side session store for SelfServe Timeshare
+
+Replaces Flask's cookie session with a signed session id cookie. Session
+data lives in an in-process LRU cache in front of a local SQLite file, so
+sessions can hold more than fits in a cookie and logging out revokes the
+session on the server instead of just dropping the cookie. The session id
+is regenerated whenever the signed-in user changes or re-authenticates.
+
+Lookups are a dict hit in the LRU or a primary-key read in SQLite. Expired
+rows are deleted in small batches, at most once per sweep interval, from
+whichever request happens to save a session.
+
+Configuration (app.config, falling back to environment variables):
+    SESSION_TYPE            'sqlite' (LRU + SQLite), 'memory' (LRU only) or
+                            anything else to keep Flask's cookie sessions
+    SESSION_DB_PATH         SQLite file (default: database/sessions.db)
+    SESSION_LRU_SIZE        sessions cached per process (default: 10000)
+    SESSION_CACHE_SECONDS   how long a cached session is trusted before it is
+                            re-read from SQLite, bounding how long a revoke
+                            takes to reach other workers (default: 5)
+    SESSION_SWEEP_INTERVAL  seconds between expiry sweeps (default: 60)
+"""
+
+import os
+import time
+import sqlite3
+import secrets
+import threading
+from collections import OrderedDict
+
+from flask import current_app, session
+from flask.sessions import SessionInterface, SessionMixin
+from flask.json.tag import TaggedJSONSerializer
+from itsdangerous import Signer, BadSignature
+from werkzeug.datastructures import CallbackDict
+
+SWEEP_BATCH_SIZE = 500
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """Session dictionary identified by a server-side session id"""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.accessed = False
+
+    # Reads mark the session accessed so responses get Vary: Cookie
+    def __getitem__(self, key):
+        self.accessed = True
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.accessed = True
+        return super().get(key, default)
+
+    def setdefault(self, key, default=None):
+        self.accessed = True
+        return super().setdefault(key, default)
+
+
+class LRUCache:
+    """Thread-safe LRU of session id -> (payload, user_id, expires_at, cached_at)"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        with self._lock:
+            item = self._items.get(sid)
+            if item is not None:
+                self._items.move_to_end(sid)
+            return item
+
+    def set(self, sid, payload, user_id, expires_at):
+        with self._lock:
+            self._items[sid] = (payload, user_id, expires_at, time.time())
+            self._items.move_to_end(sid)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, sid):
+        with self._lock:
+            self._items.pop(sid, None)
+
+    def items_where(self, predicate):
+        with self._lock:
+            return [(sid, item) for sid, item in self._items.items() if predicate(item)]
+
+    def delete_where(self, predicate):
+        with self._lock:
+            for sid in [sid for sid, item in self._items.items() if predicate(item)]:
+                del self._items[sid]
+
+
+class SQLiteSessionBackend:
+    """Session rows in a local SQLite file, one connection per thread"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._conn()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS session_store (
+                sid TEXT PRIMARY KEY,
+                user_id INTEGER,
+                data TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_session_store_expires_at ON session_store(expires_at)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_session_store_user_id ON session_store(user_id)')
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, sid):
+        return self._conn().execute(
+            'SELECT data, user_id, expires_at FROM session_store WHERE sid = ?', (sid,)
+        ).fetchone()
+
+    def set(self, sid, user_id, data, expires_at):
+        self._conn().execute(
+            'INSERT OR REPLACE INTO session_store (sid, user_id, data, expires_at) VALUES (?, ?, ?, ?)',
+            (sid, user_id, data, expires_at)
+        )
+
+    def delete(self, sid):
+        self._conn().execute('DELETE FROM session_store WHERE sid = ?', (sid,))
+
+    def user_sessions(self, user_id):
+        return self._conn().execute(
+            'SELECT sid, data, expires_at FROM session_store WHERE user_id = ?', (user_id,)
+        ).fetchall()
+
+    def delete_user(self, user_id):
+        return self._conn().execute(
+            'DELETE FROM session_store WHERE user_id = ?', (user_id,)
+        ).rowcount
+
+    def sweep(self, now, batch_size=SWEEP_BATCH_SIZE):
+        conn = self._conn()
+        removed = 0
+        while True:
+            deleted = conn.execute(
+                'DELETE FROM session_store WHERE rowid IN '
+                '(SELECT rowid FROM session_store WHERE expires_at < ? LIMIT ?)',
+                (now, batch_size)
+            ).rowcount
+            removed += deleted
+            if deleted < batch_size:
+                return removed
+
+
+class ServerSessionInterface(SessionInterface):
+    """Flask session interface backed by an LRU and an optional SQLite store"""
+
+    serializer = TaggedJSONSerializer()
+    session_class = ServerSession
+
+    def __init__(self, backend=None, lru_size=10000, cache_seconds=5, sweep_interval=60):
+        self.backend = backend
+        self.cache = LRUCache(lru_size)
+        # Without a backend the LRU is the store, so its entries are authoritative
+        self.cache_seconds = cache_seconds if backend is not None else None
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0
+        self._sweep_lock = threading.Lock()
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt='server-session')
+
+    def _load(self, sid, now):
+        """Get a session's data, or None if it does not exist or has expired"""
+        item = self.cache.get(sid)
+        if item is not None:
+            payload, user_id, expires_at, cached_at = item
+            if expires_at < now:
+                self.cache.delete(sid)
+                return None
+            if self.cache_seconds is None or now - cached_at < self.cache_seconds:
+                # Cached serialized so requests never share mutable session state
+                return self.serializer.loads(payload)
+
+        if self.backend is None:
+            return None
+
+        row = self.backend.get(sid)
+        if row is None or row[2] < now:
+            self.cache.delete(sid)
+            return None
+        payload, user_id, expires_at = row
+        self.cache.set(sid, payload, user_id, expires_at)
+        return self.serializer.loads(payload)
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode()
+            except BadSignature:
+                sid = None
+            if sid:
+                data = self._load(sid, time.time())
+                if data is not None:
+                    return self.session_class(data, sid=sid)
+        return self.session_class(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            # Logged out or never used: revoke server-side and drop the cookie
+            if session.modified and not session.new:
+                self.revoke(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        now = time.time()
+        expires_at = now + app.permanent_session_lifetime.total_seconds()
+        if session.modified or session.new:
+            payload = self.serializer.dumps(dict(session))
+            user_id = session.get('user_id')
+            if self.backend is not None:
+                self.backend.set(session.sid, user_id, payload, expires_at)
+            self.cache.set(session.sid, payload, user_id, expires_at)
+            self._maybe_sweep(now)
+        elif not self.should_set_cookie(app, session):
+            return
+
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid).decode(),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+    def revoke(self, sid):
+        """Delete a single session"""
+        self.cache.delete(sid)
+        if self.backend is not None:
+            self.backend.delete(sid)
+
+    def regenerate(self, session):
+        """
+        Move a session to a fresh id, revoking the old one
+
+        Called when privileges change (login, password change) so a session
+        id planted before login never becomes an authenticated one. The
+        data is saved under the new id at the end of the request.
+
+        Args:
+            session (ServerSession): The current session
+        """
+        if not session.new:
+            self.revoke(session.sid)
+        session.sid = secrets.token_urlsafe(32)
+        session.modified = True
+
+    def revoke_user(self, user_id):
+        """
+        Delete every session belonging to a user
+
+        Args:
+            user_id (int): User whose sessions are revoked
+
+        Returns:
+            int: Number of stored sessions deleted
+        """
+        self.cache.delete_where(lambda item: item[1] == user_id)
+        if self.backend is not None:
+            return self.backend.delete_user(user_id)
+        return 0
+
+    def discard_user_key(self, user_id, key):
+        """
+        Remove one key from every session belonging to a user
+
+        Other workers see the change once their cached copy expires, as
+        with revokes.
+
+        Args:
+            user_id (int): User whose sessions are updated
+            key (str): Session key to remove, e.g. 'claims'
+
+        Returns:
+            int: Number of stored sessions updated
+        """
+        if self.backend is not None:
+            sessions = self.backend.user_sessions(user_id)
+        else:
+            sessions = [(sid, item[0], item[2]) for sid, item in self.cache.items_where(lambda item: item[1] == user_id)]
+        updated = 0
+        for sid, payload, expires_at in sessions:
+            data = self.serializer.loads(payload)
+            if data.pop(key, None) is None:
+                continue
+            payload = self.serializer.dumps(data)
+            if self.backend is not None:
+                self.backend.set(sid, user_id, payload, expires_at)
+            self.cache.set(sid, payload, user_id, expires_at)
+            updated += 1
+        return updated
+
+    def _maybe_sweep(self, now):
+        """Delete expired sessions if the sweep interval has passed"""
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep = now
+            self.cache.delete_where(lambda item: item[2] < now)
+            if self.backend is not None:
+                self.backend.sweep(now)
+        finally:
+            self._sweep_lock.release()
+
+
+def _setting(app, name, default):
+    return app.config.get(name, os.environ.get(name, default))
+
+
+def init_session_store(app):
+    """
+    Install the server-side session interface configured by SESSION_TYPE
+
+    Args:
+        app (Flask): Application to configure
+
+    Returns:
+        ServerSessionInterface or None: Installed interface, or None if the
+        default cookie sessions are kept
+    """
+    session_type = _setting(app, 'SESSION_TYPE', 'sqlite')
+    if session_type not in ('sqlite', 'memory'):
+        return None
+
+    backend = None
+    if session_type == 'sqlite':
+        default_path = os.path.join(app.root_path, 'database', 'sessions.db')
+        backend = SQLiteSessionBackend(_setting(app, 'SESSION_DB_PATH', default_path))
+
+    interface = ServerSessionInterface(
+        backend=backend,
+        lru_size=int(_setting(app, 'SESSION_LRU_SIZE', 10000)),
+        cache_seconds=float(_setting(app, 'SESSION_CACHE_SECONDS', 5)),
+        sweep_interval=float(_setting(app, 'SESSION_SWEEP_INTERVAL', 60))
+    )
+    app.session_interface = interface
+    return interface
+
+
+def revoke_user_sessions(user_id):
+    """
+    Revoke every server-side session of a user, e.g. after a password change
+
+    Args:
+        user_id (int): User whose sessions are revoked
+
+    Returns:
+        int: Number of stored sessions deleted
+    """
+    interface = current_app.session_interface
+    if isinstance(interface, ServerSessionInterface):
+        return interface.revoke_user(user_id)
+    return 0
+
+
+def discard_user_session_key(user_id, key):
+    """
+    Remove a key from every server-side session of a user, e.g. stale claims
+
+    Args:
+        user_id (int): User whose sessions are updated
+        key (str): Session key to remove
+
+    Returns:
+        int: Number of stored sessions updated
+    """
+    interface = current_app.session_interface
+    if isinstance(interface, ServerSessionInterface):
+        return interface.discard_user_key(user_id, key)
+    return 0
+
+
+def regenerate_session():
+    """
+    Give the caller's session a new id and revoke the old one
+
+    Returns:
+        bool: True if the session moved to a new id, False with cookie sessions
+    """
+    interface = current_app.session_interface
+    if isinstance(interface, ServerSessionInterface):
+        interface.regenerate(session)
+        return True
+    return False
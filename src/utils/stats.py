@@ -0,0 +1,21 @@
+"""
+Small statistics helpers shared by batch jobs and benchmarks
+"""
+
+
+def percentile(samples, pct):
+    """
+    Linearly interpolated percentile of a list of samples, as numpy's default
+
+    Args:
+        samples (list): Numbers, in any order; must not be empty
+        pct (float): Percentile between 0 and 100
+
+    Returns:
+        float: The percentile value
+    """
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
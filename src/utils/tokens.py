@@ -0,0 +1,100 @@
+"""
+Signed, time-limited account tokens for SelfServe Timeshare
+
+Password reset and email verification tokens carry the user id and a
+fingerprint of the state they are meant to change, signed with the app's
+SECRET_KEY. Verifying one is a signature check plus a primary-key lookup;
+nothing is stored. A reset token stops working once the password hash
+changes, and a verification token once the email is verified or changed,
+so each is single-use without a database write to revoke it.
+"""
+
+import hashlib
+
+from flask import current_app
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+
+from models.user import User
+
+PASSWORD_RESET_MAX_AGE = 3600  # 1 hour
+EMAIL_VERIFICATION_MAX_AGE = 3 * 24 * 3600  # 3 days
+
+
+def _serializer(purpose):
+    return URLSafeTimedSerializer(current_app.secret_key, salt=f'account-token:{purpose}')
+
+
+def _fingerprint(value):
+    return hashlib.sha256((value or '').encode()).hexdigest()[:16]
+
+
+def _password_fingerprint(user):
+    return _fingerprint(user.password_hash)
+
+
+def _email_fingerprint(user):
+    return _fingerprint(f'{user.email}:{bool(user.email_verified)}')
+
+
+def _load(purpose, token, max_age, fingerprint):
+    try:
+        payload = _serializer(purpose).loads(token, max_age=max_age)
+    except (BadSignature, SignatureExpired):
+        return None
+
+    user = User.query.get(payload.get('uid'))
+    if not user or fingerprint(user) != payload.get('fp'):
+        return None
+    return user
+
+
+def make_password_reset_token(user):
+    """
+    Create a password reset token for a user
+
+    Args:
+        user (User): User resetting their password
+
+    Returns:
+        str: URL-safe signed token
+    """
+    return _serializer('password-reset').dumps({'uid': user.id, 'fp': _password_fingerprint(user)})
+
+
+def verify_password_reset_token(token):
+    """
+    Get the user a password reset token was issued to
+
+    Args:
+        token (str): Token from make_password_reset_token
+
+    Returns:
+        User or None: User, or None if the token is invalid, expired or used
+    """
+    return _load('password-reset', token, PASSWORD_RESET_MAX_AGE, _password_fingerprint)
+
+
+def make_email_verification_token(user):
+    """
+    Create an email verification token for a user's current email
+
+    Args:
+        user (User): User verifying their email
+
+    Returns:
+        str: URL-safe signed token
+    """
+    return _serializer('email-verification').dumps({'uid': user.id, 'fp': _email_fingerprint(user)})
+
+
+def verify_email_verification_token(token):
+    """
+    Get the user an email verification token was issued to
+
+    Args:
+        token (str): Token from make_email_verification_token
+
+    Returns:
+        User or None: User, or None if the token is invalid, expired or used
+    """
+    return _load('email-verification', token, EMAIL_VERIFICATION_MAX_AGE, _email_fingerprint)
@@ -0,0 +1,191 @@
+"""
+Comparable-price valuation for SelfServe Timeshare listings
+
+A batch job groups active, sold and rented listings by resort, season and
+bedrooms and stores the 25th, 50th and 75th percentile of their sale and
+weekly rental prices in price_benchmark. Groups are kept at several
+scopes, most specific first:
+
+    resort_season_bedrooms   2-bedroom Gold weeks at this resort
+    resort_bedrooms          2-bedroom weeks at this resort
+    resort_season            Gold weeks at this resort
+    resort                   any week at this resort
+    season_bedrooms          2-bedroom Gold weeks anywhere
+
+A group needs MIN_SAMPLES prices to be stored. Each worker holds the
+table in a dict keyed by group, so a suggestion is a few dict lookups
+that fall back to the next scope until one has enough comparables.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import Float, select, type_coerce
+
+from models.listing import Listing, db
+from models.valuation import PriceBenchmark
+from utils.stats import percentile
+
+# Listing statuses whose prices count as comparables
+COMPARABLE_STATUSES = ('active', 'sold', 'rented')
+
+GROUP_FIELDS = ('resort', 'season', 'bedrooms')
+
+SCOPES = [
+    ('resort_season_bedrooms', ('resort', 'season', 'bedrooms')),
+    ('resort_bedrooms', ('resort', 'bedrooms')),
+    ('resort_season', ('resort', 'season')),
+    ('resort', ('resort',)),
+    ('season_bedrooms', ('season', 'bedrooms'))
+]
+
+MIN_SAMPLES = 5
+MAX_BEDROOMS = 4  # Larger units are grouped with 4 bedrooms, as on the listing form
+
+CACHE_SECONDS = 300  # how long a worker serves its in-memory copy of the table
+
+INSERT_CHUNK_SIZE = 1000
+
+_benchmarks = {}
+_loaded_at = 0
+_load_lock = threading.Lock()
+
+
+def _group_values(resort_name, season, bedrooms):
+    """Normalized (resort, season, bedrooms); missing values are None"""
+    try:
+        bedrooms = min(max(int(bedrooms), 0), MAX_BEDROOMS)
+    except (TypeError, ValueError):
+        bedrooms = None
+    return (
+        ' '.join(str(resort_name or '').lower().split()) or None,
+        str(season or '').strip().lower() or None,
+        bedrooms
+    )
+
+
+def _scope_values(fields, values):
+    """Values narrowed to a scope's fields, or None if one of them is missing"""
+    narrowed = tuple(value if field in fields else None for field, value in zip(GROUP_FIELDS, values))
+    if any(narrowed[GROUP_FIELDS.index(field)] is None for field in fields):
+        return None
+    return narrowed
+
+
+def _group_key(scope, values):
+    return '|'.join([scope] + ['' if value is None else str(value) for value in values])
+
+
+def _percentiles(prices):
+    if len(prices) < MIN_SAMPLES:
+        return len(prices), None, None, None
+    return len(prices), *(round(percentile(prices, pct), 2) for pct in (25, 50, 75))
+
+
+def refresh_price_benchmarks():
+    """
+    Recompute every price benchmark group from current listings
+
+    Prices are first collected per (resort, season, bedrooms) cell, then
+    each cell is merged into the groups of every scope it belongs to, and
+    the table is replaced in one transaction.
+
+    Returns:
+        int: Groups stored
+    """
+    rows = db.session.execute(
+        select(
+            Listing.resort_name, Listing.season, Listing.bedrooms,
+            type_coerce(Listing.effective_sale_price, Float),
+            type_coerce(Listing.effective_weekly_price, Float)
+        ).where(Listing.status.in_(COMPARABLE_STATUSES))
+    )
+
+    cells = {}
+    for resort_name, season, bedrooms, sale_price, weekly_price in rows:
+        cell = cells.get((resort_name, season, bedrooms))
+        if cell is None:
+            cell = cells[(resort_name, season, bedrooms)] = ([], [])
+        if sale_price:
+            cell[0].append(sale_price)
+        if weekly_price:
+            cell[1].append(weekly_price)
+
+    groups = {}
+    for (resort_name, season, bedrooms), (sale_prices, weekly_prices) in cells.items():
+        values = _group_values(resort_name, season, bedrooms)
+        for scope, fields in SCOPES:
+            narrowed = _scope_values(fields, values)
+            if narrowed is None:
+                continue
+            group = groups.get((scope, narrowed))
+            if group is None:
+                group = groups[(scope, narrowed)] = ([], [])
+            group[0].extend(sale_prices)
+            group[1].extend(weekly_prices)
+
+    now = datetime.utcnow()
+    benchmarks = []
+    for (scope, (resort_key, season, bedrooms)), (sale_prices, weekly_prices) in groups.items():
+        sale_count, sale_p25, sale_median, sale_p75 = _percentiles(sale_prices)
+        rental_count, rental_p25, rental_median, rental_p75 = _percentiles(weekly_prices)
+        if sale_median is None and rental_median is None:
+            continue
+        benchmarks.append({
+            'group_key': _group_key(scope, (resort_key, season, bedrooms)),
+            'scope': scope, 'resort_key': resort_key, 'season': season, 'bedrooms': bedrooms,
+            'sale_count': sale_count, 'sale_p25': sale_p25, 'sale_median': sale_median, 'sale_p75': sale_p75,
+            'rental_count': rental_count, 'rental_p25': rental_p25, 'rental_median': rental_median,
+            'rental_p75': rental_p75, 'refreshed_at': now
+        })
+
+    PriceBenchmark.query.delete(synchronize_session=False)
+    for start in range(0, len(benchmarks), INSERT_CHUNK_SIZE):
+        db.session.execute(PriceBenchmark.__table__.insert(), benchmarks[start:start + INSERT_CHUNK_SIZE])
+    db.session.commit()
+    return len(benchmarks)
+
+
+def _load_benchmarks():
+    """This worker's copy of the benchmark table, reloaded every CACHE_SECONDS"""
+    global _benchmarks, _loaded_at
+    if time.time() - _loaded_at < CACHE_SECONDS:
+        return _benchmarks
+    with _load_lock:
+        if time.time() - _loaded_at >= CACHE_SECONDS:
+            _benchmarks = {benchmark.group_key: benchmark.to_dict() for benchmark in PriceBenchmark.query.all()}
+            _loaded_at = time.time()
+    return _benchmarks
+
+
+def suggest_price(resort_name, season=None, bedrooms=None):
+    """
+    Suggest sale and weekly rental prices from comparable listings
+
+    Sale and rental are looked up independently, each from the most
+    specific scope that has enough comparables for that price.
+
+    Args:
+        resort_name (str): Resort as entered on the listing form
+        season (str): Season, e.g. 'Gold'
+        bedrooms (int): Bedrooms, 0 for a studio
+
+    Returns:
+        dict: {'sale': {...} or None, 'rental_weekly': {...} or None}, each
+        with count, p25, median, p75 and the scope it came from
+    """
+    benchmarks = _load_benchmarks()
+    values = _group_values(resort_name, season, bedrooms)
+    suggestion = {'sale': None, 'rental_weekly': None}
+    for scope, fields in SCOPES:
+        narrowed = _scope_values(fields, values)
+        benchmark = benchmarks.get(_group_key(scope, narrowed)) if narrowed else None
+        if not benchmark:
+            continue
+        for price_type in suggestion:
+            if suggestion[price_type] is None and benchmark[price_type]['median'] is not None:
+                suggestion[price_type] = dict(benchmark[price_type], scope=scope)
+        if all(suggestion.values()):
+            break
+    return suggestion
@@ -0,0 +1,177 @@
+"""
+Startup warm-up for SelfServe Timeshare workers
+
+Runs once per worker process before it starts accepting requests, so the
+first visitors after a deploy or restart do not pay for cold caches:
+
+    db_pool         open the pooled database connections
+    page_cache      read the SQLite file through the OS page cache and scan
+                    the hot listing indexes on each pooled connection
+    templates       compile every Jinja template into the template cache
+    password_pool   start the password hashing processes
+    similar_index   build the similar-listings feature arrays
+    pages           render the pricing, SEO and first browse pages
+                    in-process, which also fills SQLAlchemy's statement
+                    compilation cache
+
+Each step is timed, printed and kept in app.config['WARMUP_REPORT']. A
+failing step is reported and skipped; warm-up never stops the worker from
+starting.
+
+Configuration (environment variables):
+    WARMUP_ENABLED          set to '0' to skip warm-up (default: 1)
+    WARMUP_MAX_CACHE_MB     cap on database bytes read into the page cache
+                            (default: 256)
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import text
+
+from models.user import db
+from utils import passwords
+from utils.similar_listings import refresh_similarity_index
+
+WARMUP_ENABLED = os.environ.get('WARMUP_ENABLED', '1') != '0'
+MAX_CACHE_BYTES = int(float(os.environ.get('WARMUP_MAX_CACHE_MB', 256)) * 1024 * 1024)
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+# Index-only scans that pull the pages browse and detail requests touch first
+HOT_INDEX_QUERIES = [
+    "SELECT COUNT(*) FROM listing INDEXED BY idx_listing_status_effective_price WHERE status = 'active'",
+    "SELECT COUNT(*) FROM listing_amenity INDEXED BY idx_listing_amenity_amenity_id",
+    'SELECT COUNT(*) FROM user',
+    'SELECT COUNT(*) FROM favorite'
+]
+
+# Cacheable pages every worker is likely to serve in its first minute
+WARM_PAGES = [
+    '/api/pricing/plans',
+    '/api/pricing/compare',
+    '/api/listings?page=1&per_page=20',
+    '/blog',
+    '/sitemap.xml',
+    '/robots.txt',
+    '/commission-free-timeshare-selling',
+    '/sell-timeshare-without-agent'
+]
+
+
+@contextmanager
+def _pooled_connections():
+    """Check out as many connections as the pool keeps open, closing them afterwards"""
+    pool = db.engine.pool
+    size = pool.size() if hasattr(pool, 'size') else 1
+    connections = []
+    try:
+        for _ in range(size):
+            connections.append(db.engine.connect())
+        yield connections
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def _open_pool():
+    """Open every pooled connection so no request pays for connecting"""
+    with _pooled_connections() as connections:
+        for connection in connections:
+            connection.execute(text('SELECT 1'))
+        return {'connections': len(connections)}
+
+
+def _prime_page_cache(database_path):
+    """Read the database file once, then scan the hot indexes on each pooled connection"""
+    read = 0
+    if database_path and os.path.exists(database_path):
+        with open(database_path, 'rb') as f:
+            while read < MAX_CACHE_BYTES:
+                chunk = f.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                read += len(chunk)
+
+    scans = 0
+    with _pooled_connections() as connections:
+        for connection in connections:
+            for query in HOT_INDEX_QUERIES:
+                try:
+                    connection.execute(text(query))
+                    scans += 1
+                except Exception:
+                    # Older databases may lack an index; the rest still help
+                    connection.rollback()
+    return {'bytes_read': read, 'index_scans': scans}
+
+
+def _compile_templates(app):
+    """Load every template so the first render skips parsing and compiling"""
+    names = app.jinja_env.list_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    return {'templates': len(names)}
+
+
+def _start_password_pool():
+    """Start the hashing processes and resolve the current hash method once"""
+    processes = passwords.start_pool()
+    passwords.needs_rehash('')
+    return {'processes': processes}
+
+
+def _render_pages(app):
+    """Request the warm pages in-process and report their status codes"""
+    statuses = {}
+    with app.test_client() as client:
+        for path in WARM_PAGES:
+            response = client.get(path, environ_base={'REMOTE_ADDR': '127.0.0.1'})
+            statuses[path] = response.status_code
+    return {'statuses': statuses}
+
+
+def run_warmup(app):
+    """
+    Warm the worker's connections and caches before it serves traffic
+
+    Args:
+        app (Flask): Application with the database configured
+
+    Returns:
+        dict: Per-step results with 'ms' timings, plus 'total_ms'
+    """
+    if not WARMUP_ENABLED:
+        return {}
+
+    steps = [
+        ('db_pool', _open_pool),
+        ('page_cache', lambda: _prime_page_cache(app.config.get('DATABASE_PATH'))),
+        ('templates', lambda: _compile_templates(app)),
+        ('password_pool', _start_password_pool),
+        ('similar_index', lambda: {'listings': refresh_similarity_index(rebuild=True)}),
+        ('pages', lambda: _render_pages(app))
+    ]
+
+    report = {}
+    started = time.perf_counter()
+    with app.app_context():
+        for name, step in steps:
+            step_started = time.perf_counter()
+            try:
+                result = step()
+            except Exception as e:
+                result = {'error': str(e)}
+            result['ms'] = round((time.perf_counter() - step_started) * 1000, 1)
+            report[name] = result
+    report['total_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+    app.config['WARMUP_REPORT'] = report
+    timings = ', '.join(f"{name} {report[name]['ms']}ms" for name, _ in steps)
+    print(f"Warm-up finished at {datetime.now()} in {report['total_ms']}ms ({timings})")
+    for name, _ in steps:
+        if 'error' in report[name]:
+            print(f"Warm-up step {name} failed: {report[name]['error']}")
+    return report